@@ -1,33 +1,219 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import asyncio
+import inspect
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
 import json
 import re
+import sys
+import threading
+import time
+import metrics
+import attempt_store
+import instrumentation
+import level_estimator
+import llm_provider
+import question_bank
+import question_schema
+from question_bank import bucket_of, fingerprint
+import session_store
+from history_digest import HistoryDigest
+from session_store import AskedQuestion, Session
+from question_stream import QuestionStreamParser, question_events, sse
+from question_batch import parse_question_batch
+from singleflight import SingleFlight
 
 # -----------------------------
 # Load environment variables
 # -----------------------------
 load_dotenv()
-google_api_key = os.getenv("GOOGLE_API_KEY")
-if not google_api_key:
-    raise ValueError("Set GOOGLE_API_KEY in .env")
 
 # -----------------------------
 # Initialize FastAPI app
 # -----------------------------
-app = FastAPI(title="Adaptive Skill Evaluation API")
+# Importing this module is kept cheap: the LLM client (and its SDK), the
+# prompt templates (langchain_core) and the demand model are built on first
+# use. With PREWARM=1 the startup hook builds them before serving, in a
+# thread, so no request pays for them; PREWARM=0 starts faster, and a
+# missing GOOGLE_API_KEY then only shows on the first question.
+PREWARM = os.getenv("PREWARM", "1") == "1"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if PREWARM:
+        await asyncio.to_thread(prewarm)
+    workers = start_background_workers()
+    yield
+    for worker in workers:
+        worker.cancel()
+    if attempt_writer is not None:
+        await attempt_writer.close()
+
+# Endpoints are registered on the router; create_app() (end of file) builds the app
+router = APIRouter()
+
+# -----------------------------
+# Instrumentation
+# -----------------------------
+# Per-endpoint and per-phase timings on /metrics (INSTRUMENTATION=0 turns
+# them off). Requests slower than SLOW_REQUEST_SECONDS print their phase
+# breakdown; PROFILE_SAMPLE_RATE of requests run under cProfile, and the
+# slow ones among them are saved to PROFILE_DIR.
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "5"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# -----------------------------
+# Initialize the LLM
+# -----------------------------
+# "gemini" (needs GOOGLE_API_KEY) or "fake" for load tests, see llm_provider.py
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+# Created by get_llm(); benchmarks assign their own
+llm = None
+
+def get_llm():
+    global llm
+    if llm is None:
+        llm = llm_provider.create_llm(LLM_PROVIDER)
+    return llm
+
+# -----------------------------
+# LLM concurrency limits
+# -----------------------------
+# Cap on in-flight Gemini calls per worker and per-call timeout (seconds).
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+# How often to check whether the client has gone away while waiting on the LLM
+DISCONNECT_POLL_SECONDS = 0.1
+
+llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+# Extra LLM calls allowed per question to fix a reply that local repairs
+# could not: a targeted re-prompt for the missing fields, or a full
+# regeneration if nothing usable came back.
+REPAIR_MAX_REPROMPTS = int(os.getenv("REPAIR_MAX_REPROMPTS", "2"))
+
+llm_calls = metrics.counter("llm_calls_total", "LLM calls started.")
+llm_errors = metrics.counter("llm_errors_total", "LLM calls that failed (other than timeouts).")
+llm_timeouts = metrics.counter("llm_timeouts_total", "LLM calls that hit LLM_TIMEOUT_SECONDS.")
+parse_failures = metrics.counter(
+    "question_parse_failures_total", "Questions still invalid after all repairs and re-prompts.")
+local_repairs = metrics.counter(
+    "question_local_repairs_total", "Questions made valid by local repairs, without another LLM call.")
+reprompts = metrics.counter(
+    "question_reprompts_total", "Targeted re-prompts asking only for the missing or invalid fields.")
+regenerations = metrics.counter(
+    "question_regenerations_total", "Full regenerations after a reply with no usable JSON.")
+prompt_chars = metrics.histogram(
+    "llm_prompt_chars", "Prompt size per LLM call, in characters.", metrics.SIZE_BUCKETS)
+response_chars = metrics.histogram(
+    "llm_response_chars", "Response size per LLM call, in characters.", metrics.SIZE_BUCKETS)
+
+# -----------------------------
+# Speculative prefetch
+# -----------------------------
+# After serving a question, generate the follow-up for both a correct and a
+# wrong answer in the background. Set PREFETCH_ENABLED=0 to turn it off.
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+# Answer time used to predict the branch levels (time_factor == 1)
+PREFETCH_TIME_TAKEN = 29.0
+
+# -----------------------------
+# Question bank
+# -----------------------------
+# "memory", "sqlite:///path/to/bank.db" or "off"
+QUESTION_BANK = os.getenv("QUESTION_BANK", "memory")
+BANK_TARGET_DEPTH = int(os.getenv("BANK_TARGET_DEPTH", "20"))
+BANK_TTL_SECONDS = float(os.getenv("BANK_TTL_SECONDS", str(24 * 3600)))
+# A banked question is retired after being served this many times
+BANK_MAX_USES = int(os.getenv("BANK_MAX_USES", "50"))
+BANK_MAX_BYTES = int(os.getenv("BANK_MAX_BYTES", str(64 * 1024 * 1024)))
+BANK_MAX_ROWS = int(os.getenv("BANK_MAX_ROWS", "100000"))
+BANK_REFILL_INTERVAL = float(os.getenv("BANK_REFILL_INTERVAL", "5"))
+# Max questions generated per bucket per refill pass
+BANK_REFILL_BATCH = int(os.getenv("BANK_REFILL_BATCH", "4"))
+# Questions requested per LLM call when generating in bulk
+GENERATION_BATCH_SIZE = int(os.getenv("GENERATION_BATCH_SIZE", "8"))
+# Skills kept warm in every bucket from startup, e.g. "Python,React"
+BANK_WARM_SKILLS = [s for s in os.getenv("BANK_WARM_SKILLS", "").split(",") if s.strip()]
+# Other buckets are refilled only while asked for within this many seconds,
+# and at most this many of them (skill names are user input)
+BANK_DEMAND_TTL_SECONDS = float(os.getenv("BANK_DEMAND_TTL_SECONDS", "3600"))
+BANK_MAX_WANTED = int(os.getenv("BANK_MAX_WANTED", "1000"))
+
+# -----------------------------
+# Request coalescing
+# -----------------------------
+# Concurrent first-question requests for the same skill and bucket share an
+# LLM call; up to COALESCE_VARIANTS distinct calls run per key.
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "1") == "1"
+COALESCE_VARIANTS = int(os.getenv("COALESCE_VARIANTS", "1"))
+
+# -----------------------------
+# Prompt history
+# -----------------------------
+# Upper bound on the tokens spent describing previous questions in a prompt
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "300"))
+
+# -----------------------------
+# Level estimation
+# -----------------------------
+# "step" (the original ±5 rule scaled by time_taken; never ends the test)
+# or "irt" (1-PL IRT posterior, see backend/level_estimator.py). "irt" is
+# opt-in because it changes the API for clients:
+# - /next_question answers {"user_id", "test_complete": true, "estimate"}
+#   instead of a question once the level is known, and
+#   /next_question/stream sends a single "complete" event;
+# - time_taken no longer affects the level.
+LEVEL_ESTIMATOR = os.getenv("LEVEL_ESTIMATOR", "step")
+# With "irt": the test ends once the 90% interval of the level is this many points wide...
+STOP_INTERVAL_WIDTH = float(os.getenv("STOP_INTERVAL_WIDTH", "30"))
+# ...but never before this many answers, and always after this many
+STOP_MIN_QUESTIONS = int(os.getenv("STOP_MIN_QUESTIONS", "3"))
+STOP_MAX_QUESTIONS = int(os.getenv("STOP_MAX_QUESTIONS", "20"))
+
+# -----------------------------
+# Session store
+# -----------------------------
+# "memory" (single worker) or "sqlite:///path/to/sessions.db" (shared by workers)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+# Sessions idle for longer than this are dropped
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "100000"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+
+# -----------------------------
+# Completed attempts
+# -----------------------------
+# "sqlite:///path/to/skillsync.db" or "off"; written in the background in
+# batches (backend/attempt_store.py)
+ATTEMPT_STORE = os.getenv("ATTEMPT_STORE", "off")
+# A batch is written once this many attempts wait, or the oldest has waited this long
+ATTEMPT_BATCH_SIZE = int(os.getenv("ATTEMPT_BATCH_SIZE", "500"))
+ATTEMPT_FLUSH_SECONDS = float(os.getenv("ATTEMPT_FLUSH_SECONDS", "1"))
+# /end_test waits while this many attempts are queued, and answers 503 after the timeout
+ATTEMPT_QUEUE_MAX = int(os.getenv("ATTEMPT_QUEUE_MAX", "10000"))
+ATTEMPT_SUBMIT_TIMEOUT = float(os.getenv("ATTEMPT_SUBMIT_TIMEOUT", "5"))
 
 # -----------------------------
-# Initialize Gemini LLM
+# Demand scoring model
 # -----------------------------
-llm = ChatGoogleGenerativeAI(
-    api_key=google_api_key,
-    model="gemini-2.0-flash",
-    temperature=0.7
+# Produced by skillsync-model/train_model.py; loaded once at startup
+SKILL_MODEL_DIR = os.getenv(
+    "SKILL_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "skillsync-model")
 )
+SKILL_MODEL_PATH = os.getenv("SKILL_MODEL_PATH", os.path.join(SKILL_MODEL_DIR, "skill_sync_model.joblib"))
+SKILL_MODEL_COLUMNS = os.getenv("SKILL_MODEL_COLUMNS", os.path.join(SKILL_MODEL_DIR, "model_columns.joblib"))
+# Memory-mapped export of the model (backend/flat_forest.py), shared by all
+# workers; preferred over the joblib file when it was exported from it
+SKILL_MODEL_FOREST = os.getenv("SKILL_MODEL_FOREST", os.path.join(SKILL_MODEL_DIR, "skill_sync_model.forest"))
+# Precomputed predictions (backend/score_table.py); used only if built from this model
+SKILL_SCORE_TABLE = os.getenv("SKILL_SCORE_TABLE", os.path.join(SKILL_MODEL_DIR, "score_table.npy"))
+# Largest batch accepted by /score_skills
+SCORE_MAX_ROWS = int(os.getenv("SCORE_MAX_ROWS", "10000"))
 
 # -----------------------------
 # Models for requests
@@ -49,10 +235,47 @@ class EndTestRequest(BaseModel):
     user_id: str
     skill: str
 
+class GenerateQuestionsRequest(BaseModel):
+    skill: str
+    min_bucket: int = 0  # 0-4, see question_prompt
+    max_bucket: int = 4
+    per_bucket: int = 5
+    add_to_bank: bool = True
+
+class SkillRow(BaseModel):
+    skill_name: str
+    years_required: int
+    context_keywords: str = "None"
+    is_required: bool = True
+    company_tier: str
+
+class ScoreSkillsRequest(BaseModel):
+    rows: list[SkillRow]
+
 # -----------------------------
 # Prompt Template
 # -----------------------------
-question_prompt = ChatPromptTemplate.from_template("""
+class LazyPrompt:
+    """
+    A ChatPromptTemplate built on first use; importing langchain_core
+    takes longer than everything else at startup.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self._prompt = None
+
+    def get(self):
+        if self._prompt is None:
+            from langchain_core.prompts import ChatPromptTemplate
+
+            self._prompt = ChatPromptTemplate.from_template(self.template)
+        return self._prompt
+
+    def format_messages(self, **kwargs):
+        return self.get().format_messages(**kwargs)
+
+question_prompt = LazyPrompt("""
 You are an expert technical test designer for adaptive skill assessments.
 
 The user is being tested for the skill: **{skill}**
@@ -92,6 +315,44 @@ Return only valid JSON (no markdown) in the structure:
 }}
 """)
 
+batch_question_prompt = LazyPrompt("""
+You are an expert technical test designer for adaptive skill assessments.
+
+Generate {count} multiple choice questions for the skill: **{skill}**
+
+Difficulty buckets:
+- 0 - 20: very basic and conceptual
+- 20 - 40: beginner
+- 40 - 60: intermediate
+- 60 - 80: advanced
+- 80 - 100: expert
+
+Difficulty of each question, in order: {levels}
+
+Instructions:
+- Generate exactly {count} questions, one per difficulty listed above, in that order.
+- Use the difficulty bucket of each question's listed difficulty.
+- Do not repeat each other or any of these existing questions: {history}
+- Each question must be relevant to real-world application of the skill.
+- Include 4 options, with only one correct answer.
+- Use neutral, professional wording.
+
+Return only a valid JSON array (no markdown) of {count} objects, each in the structure:
+
+{{
+"question_id": 0,
+"question_title": "string",
+"options": {{
+    "opt1": "string",
+    "opt2": "string",
+    "opt3": "string",
+    "opt4": "string"
+}},
+"correct_answer": "optX",
+"difficulty": <the listed difficulty>
+}}
+""")
+
 # -----------------------------
 # Helper function to clean LLM JSON
 # -----------------------------
@@ -101,134 +362,833 @@ def clean_llm_json(llm_text: str) -> str:
     return llm_text
 
 # -----------------------------
-# In-memory store (prototype)
+# Non-blocking LLM invocation
+# -----------------------------
+class ClientDisconnected(Exception):
+    pass
+
+async def wait_for_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+async def invoke_llm(prompt, request: Request = None) -> str:
+    """
+    Runs the LLM call without blocking the event loop.
+    Waits for a free slot, enforces the timeout, and cancels the call
+    if the client disconnects first. Returns the raw response text.
+    """
+    llm_calls.inc()
+    prompt_chars.observe(instrumentation.text_size(prompt))
+    with instrumentation.phase("llm_wait"):
+        await llm_semaphore.acquire()
+    try:
+        with instrumentation.phase("llm"):
+            content = await call_llm(prompt, request)
+    except asyncio.TimeoutError:
+        llm_timeouts.inc()
+        raise
+    except ClientDisconnected:
+        raise
+    except Exception:
+        llm_errors.inc()
+        raise
+    finally:
+        llm_semaphore.release()
+    response_chars.observe(len(content))
+    return content
+
+async def call_llm(prompt, request: Request = None) -> str:
+    llm_task = asyncio.ensure_future(
+        asyncio.wait_for(get_llm().ainvoke(prompt), LLM_TIMEOUT_SECONDS)
+    )
+    if request is None:
+        response = await llm_task
+        return response.content
+
+    watcher = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({llm_task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+    if not llm_task.done():
+        llm_task.cancel()
+        raise ClientDisconnected()
+    return llm_task.result().content
+
+async def generate_question(prompt, request: Request = None, expected: dict = None) -> dict:
+    """
+    Invokes the LLM and parses its reply into a question dict, repairing it
+    if needed. `expected` holds the question_id/difficulty the prompt asked for.
+    Timeouts and disconnects surface as HTTP errors, anything else as a 500.
+    """
+    try:
+        raw = await invoke_llm(prompt, request)
+        return await parse_question(raw, prompt, expected, request)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Question generation timed out.")
+    except ClientDisconnected:
+        raise HTTPException(status_code=499, detail="Client disconnected.")
+
+async def parse_question(raw: str, prompt, expected: dict = None, request: Request = None) -> dict:
+    """
+    Extracts the question from the reply and fixes what it can locally.
+    Fields that are still missing or invalid are asked for again, just
+    those; a reply with nothing usable is regenerated from `prompt`. At most
+    REPAIR_MAX_REPROMPTS extra calls; raises ValueError if still invalid.
+    """
+    question, found = None, {}
+    for attempt in range(REPAIR_MAX_REPROMPTS + 1):
+        with instrumentation.phase("parse"):
+            patch, text_fixes = question_schema.extract(clean_llm_json(raw))
+            if question is None:
+                question = patch
+            elif patch is not None:
+                question = question_schema.merge(question, patch, found)
+            if question is not None:
+                question, fixes = question_schema.repair(question, expected)
+                valid, found = question_schema.check(question)
+                if valid is not None:
+                    if (text_fixes or fixes) and not attempt:
+                        local_repairs.inc()
+                    return valid
+        if attempt == REPAIR_MAX_REPROMPTS:
+            break
+        if question is None:
+            regenerations.inc()
+            raw = await invoke_llm(prompt, request)
+        else:
+            reprompts.inc()
+            raw = await invoke_llm(question_schema.repair_prompt(question, found), request)
+
+    parse_failures.inc()
+    if question is None:
+        raise ValueError("LLM reply contains no question JSON")
+    raise ValueError("Invalid question: " + "; ".join(f"{field}: {message}" for field, message in found.items()))
+
+batch_calls = metrics.counter(
+    "batch_generation_calls_total", "LLM calls made for batch question generation.")
+batch_questions = metrics.counter(
+    "batch_generation_questions_total", "Valid questions produced by batch generation.")
+batch_dropped = metrics.counter(
+    "batch_generation_dropped_total", "Requested batch questions that were malformed or missing.")
+
+async def generate_question_batch(skill: str, levels: list, existing_titles: list) -> list:
+    """
+    Generates one question per entry of `levels` in a single LLM call.
+    Items that fail validation are dropped; the rest are returned.
+    """
+    with instrumentation.phase("prompt"):
+        prompt = batch_question_prompt.format_messages(
+            skill=skill,
+            count=len(levels),
+            levels=", ".join(str(level) for level in levels),
+            history=json.dumps(existing_titles)
+        )
+    batch_calls.inc()
+    raw = await invoke_llm(prompt)
+    with instrumentation.phase("parse"):
+        questions, _ = parse_question_batch(clean_llm_json(raw), question_schema.repaired)
+    batch_questions.inc(len(questions))
+    batch_dropped.inc(max(0, len(levels) - len(questions)))
+    return questions
+
+async def stream_llm_question(prompt, expected: dict = None):
+    """
+    Streams the LLM response, yielding ("title", ...) and ("option", ...)
+    events as they complete, then ("question", dict) once the whole
+    question has been parsed and validated. The timeout covers the full stream.
+    """
+    parser = QuestionStreamParser()
+    events = asyncio.Queue()
+    llm_calls.inc()
+    prompt_chars.observe(instrumentation.text_size(prompt))
+
+    async def read_stream():
+        # Holds the LLM slot only while the LLM streams, however slowly the
+        # client reads the events queued for it
+        loop = asyncio.get_running_loop()
+        async with llm_semaphore:
+            deadline = loop.time() + LLM_TIMEOUT_SECONDS
+            stream = get_llm().astream(prompt).__aiter__()
+            try:
+                with instrumentation.phase("llm"):
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(stream.__anext__(), deadline - loop.time())
+                        except StopAsyncIteration:
+                            break
+                        for event in parser.feed(chunk.content):
+                            events.put_nowait(event)
+            except asyncio.TimeoutError:
+                llm_timeouts.inc()
+                raise
+            finally:
+                await stream.aclose()
+
+    reader = asyncio.ensure_future(read_stream())
+    reader.add_done_callback(lambda _: events.put_nowait(None))
+    try:
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield event
+        # Raises what ended the stream early, e.g. the timeout
+        await reader
+    finally:
+        # The client went away before the stream ended
+        reader.cancel()
+    response_chars.observe(len(parser.text))
+    yield "question", await parse_question(parser.text, prompt, expected)
+
+# -----------------------------
+# Level estimation
+# -----------------------------
+estimator = level_estimator.create_estimator(
+    LEVEL_ESTIMATOR, STOP_INTERVAL_WIDTH, STOP_MIN_QUESTIONS, STOP_MAX_QUESTIONS
+)
+
+tests_stopped = metrics.counter(
+    "tests_stopped_total", "Tests ended by the level estimator once the level was known.")
+
+def estimate_of(session: Session) -> dict:
+    # Sessions stored before the estimator existed start from their current level
+    return session.estimate if session.estimate is not None else estimator.start(session.current_level)
+
+def next_estimate(session: Session, correct: bool, time_taken: float) -> dict:
+    """
+    The session's estimator state after an answer to its last question.
+    """
+    return estimator.update(estimate_of(session), session.last_question.difficulty, correct, time_taken)
+
+def test_complete(session: Session) -> dict:
+    tests_stopped.inc()
+    return {
+        "user_id": session.user_id,
+        "test_complete": True,
+        "estimate": estimator.estimate(estimate_of(session)).to_dict(),
+    }
+
+# -----------------------------
+# Question sourcing: bank first, then the LLM
+# -----------------------------
+bank_store = question_bank.create_store(
+    QUESTION_BANK, BANK_TTL_SECONDS, BANK_MAX_USES, BANK_MAX_BYTES, BANK_MAX_ROWS
+)
+bank = question_bank.QuestionBank(
+    bank_store, BANK_TARGET_DEPTH, BANK_WARM_SKILLS, BANK_DEMAND_TTL_SECONDS, BANK_MAX_WANTED
+) if bank_store is not None else None
+
+bank_hits = metrics.counter(
+    "question_bank_hits_total", "Questions served from the question bank.")
+bank_misses = metrics.counter(
+    "question_bank_misses_total", "Question bank lookups with no unseen question.")
+bank_refills = metrics.counter(
+    "question_bank_refilled_total", "Questions generated by the bank refill worker.")
+metrics.gauge(
+    "question_bank_size", "Questions currently banked.",
+    lambda: len(bank_store) if bank_store is not None else 0)
+
+def draw_from_bank(session: Session, level: int, qid: int):
+    if bank is None:
+        return None
+    question = bank.draw(session.skill, level, session.seen)
+    if question is None:
+        bank_misses.inc()
+        return None
+    bank_hits.inc()
+    question["question_id"] = qid
+    return question
+
+async def produce_question(session: Session, level: int, qid: int, request: Request = None) -> dict:
+    """
+    Returns question `qid` for the session at `level`, drawing an unseen
+    question from the bank when possible and generating one otherwise.
+    """
+    question = draw_from_bank(session, level, qid)
+    if question is not None:
+        return question
+    if COALESCE_ENABLED and not session.history:
+        return await generate_first_question(session, level, qid)
+    return await generate_question(
+        build_question_prompt(session, level, qid), request, {"question_id": qid, "difficulty": level}
+    )
+
+async def generate_prefetch(session: Session, level: int, qid: int) -> dict:
+    """
+    Generates a speculative branch question. Unlike `produce_question` it
+    never draws from the bank: the branch may be discarded. Prefetch starts
+    after the first question, so there is nothing to coalesce.
+    """
+    return await generate_question(
+        build_question_prompt(session, level, qid), expected={"question_id": qid, "difficulty": level}
+    )
+
+first_question_flights = SingleFlight(COALESCE_VARIANTS)
+
+coalesce_requests = metrics.counter(
+    "coalesce_requests_total", "First-question generations eligible for coalescing.")
+coalesce_saved = metrics.counter(
+    "coalesce_saved_calls_total", "LLM calls saved by joining an identical in-flight call.")
+metrics.gauge(
+    "coalesce_ratio", "Coalescable requests per LLM call actually made.",
+    lambda: round(coalesce_requests.value / max(1, coalesce_requests.value - coalesce_saved.value), 4))
+
+async def generate_first_question(session: Session, level: int, qid: int) -> dict:
+    """
+    A first question depends only on the skill and level, so concurrent
+    requests in the same (skill, bucket) share one generation. Each caller
+    gets its own copy with its own question_id.
+    """
+    key = (question_bank.skill_key(session.skill), bucket_of(level))
+    prompt = build_question_prompt(session, level, qid)
+    expected = {"question_id": qid, "difficulty": level}
+    shared, joined = await first_question_flights.do(key, lambda: generate_question(prompt, expected=expected))
+    coalesce_requests.inc()
+    if joined:
+        coalesce_saved.inc()
+    return dict(shared, options=dict(shared["options"]), question_id=qid)
+
+def build_question_prompt(session: Session, level: int, qid: int):
+    with instrumentation.phase("prompt"):
+        return question_prompt.format_messages(
+            skill=session.skill,
+            level=level,
+            qid=qid,
+            history=render_history(session)
+        )
+
+async def stream_question_events(session: Session, level: int, qid: int, commit, question: dict = None):
+    """
+    Server-Sent Events for one question: "title", then one "option" per
+    option as soon as each is complete, then the full "question" once it is
+    validated and `commit(question)` has stored it. Failures end the stream
+    with an "error" event and leave the session untouched.
+    """
+    try:
+        if question is None:
+            question = draw_from_bank(session, level, qid)
+        if question is None:
+            async for event, data in stream_llm_question(
+                build_question_prompt(session, level, qid), {"question_id": qid, "difficulty": level}
+            ):
+                if event == "question":
+                    question = data
+                else:
+                    yield sse(event, data)
+        else:
+            for event, data in question_events(question):
+                yield sse(event, data)
+        commit(question)
+        yield sse("question", question)
+    except asyncio.TimeoutError:
+        yield sse("error", {"detail": "Question generation timed out."})
+    except Exception as e:
+        yield sse("error", {"detail": f"Failed to generate question: {str(e)}"})
+
+async def complete_events(result: dict):
+    """
+    The stream of an answer that ended the test: a single "complete" event.
+    """
+    yield sse("complete", result)
+
+async def generate_bank_batch(skill: str, levels: list, existing_titles: list) -> list:
+    questions = await generate_question_batch(skill, levels, existing_titles)
+    bank_refills.inc(len(questions))
+    return questions
+
+async def sweep_sessions():
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+        sessions.evict_expired()
+        sweep_prefetch()
+
+def start_background_workers() -> list:
+    workers = [asyncio.ensure_future(sweep_sessions())]
+    if bank is not None:
+        workers.append(asyncio.ensure_future(bank.run_refill_worker(
+            generate_bank_batch, BANK_REFILL_INTERVAL, BANK_REFILL_BATCH, GENERATION_BATCH_SIZE
+        )))
+    return workers
+
+# -----------------------------
+# Demand scoring
+# -----------------------------
+skill_scorer = None
+skill_scorer_error = None
+skill_scorer_loaded = False
+skill_scorer_lock = threading.Lock()
+scored_rows = metrics.counter("skill_rows_scored_total", "Job-skill rows scored by /score_skills.")
+
+def load_skill_scorer():
+    """
+    Loads the demand model; if it is missing, /score_skills answers 503
+    and the rest of the API keeps working.
+    """
+    global skill_scorer, skill_scorer_error
+    from flat_forest import FlatForest
+    from score_table import ScoreTable, file_digest
+    from skill_scorer import SkillScorer
+
+    try:
+        model_digest = file_digest(SKILL_MODEL_PATH) if os.path.exists(SKILL_MODEL_PATH) else None
+        forest = None
+        if SKILL_MODEL_FOREST and os.path.isdir(SKILL_MODEL_FOREST):
+            forest = FlatForest.load(SKILL_MODEL_FOREST)
+            # An export of an older model would give stale scores
+            if model_digest not in (None, forest.meta.get("model_digest")):
+                forest = None
+        if forest is not None:
+            skill_scorer = SkillScorer(forest, forest.columns)
+            model_digest = forest.meta.get("model_digest")
+        else:
+            skill_scorer = SkillScorer.load(SKILL_MODEL_PATH, SKILL_MODEL_COLUMNS)
+    except (OSError, ImportError, ValueError) as e:
+        skill_scorer, skill_scorer_error = None, str(e)
+        return
+
+    if SKILL_SCORE_TABLE and os.path.exists(SKILL_SCORE_TABLE):
+        table = ScoreTable.load(SKILL_SCORE_TABLE)
+        # Same for a table compiled from an older model
+        if table.meta.get("model_digest") == model_digest:
+            skill_scorer.table = table
+
+def get_skill_scorer():
+    """
+    The demand model, loaded by the first caller (requests run in the
+    threadpool, hence the lock). None if it could not be loaded.
+    """
+    global skill_scorer_loaded
+    if not skill_scorer_loaded:
+        with skill_scorer_lock:
+            if not skill_scorer_loaded:
+                load_skill_scorer()
+                skill_scorer_loaded = True
+    return skill_scorer
+
+def prewarm():
+    """
+    Builds everything the first requests would otherwise wait for.
+    """
+    get_llm()
+    question_prompt.get()
+    batch_question_prompt.get()
+    get_skill_scorer()
+
+# -----------------------------
+# Session history
 # -----------------------------
-active_sessions = {}
+def render_history(session: Session) -> str:
+    """
+    Bounded-size description of the session so far, for the prompt.
+    """
+    return session.digest.render()
+
+def record_question(session: Session, question: dict):
+    """
+    Stores a served question in the session history and digest.
+    """
+    with instrumentation.phase("session"):
+        session.history.append(AskedQuestion.from_question(question))
+        session.digest.add_question(question["question_title"])
+        session.seen.add(fingerprint(question["question_title"]))
+        session.questions_asked += 1
+
+def apply_answer(session: Session, selected_option: str, correct: bool, estimate: dict):
+    """
+    Records the user's answer to the last question and moves their level.
+    """
+    with instrumentation.phase("session"):
+        last_question = session.last_question
+        last_question.user_answer = sys.intern(selected_option)
+        session.digest.record_answer(correct, last_question.difficulty)
+        if correct:
+            session.correct_answers += 1
+        session.estimate = estimate
+        session.current_level = estimator.estimate(estimate).level
+
+def load_answered_session(req) -> Session:
+    """
+    Fetches the session an answer belongs to, or raises the matching HTTP error.
+    """
+    with instrumentation.phase("session"):
+        session = sessions.get(req.user_id)
+    if not session or session.last_question is None:
+        raise HTTPException(status_code=404, detail="No active test session found.")
+    if session.last_question.question_id != req.question_id:
+        raise HTTPException(status_code=400, detail="Question ID mismatch.")
+    return session
+
+# -----------------------------
+# Session store
+# -----------------------------
+# Evicted sessions also drop any prefetch in flight for them
+sessions = session_store.create_store(
+    SESSION_STORE, SESSION_TTL_SECONDS, SESSION_MAX,
+    on_evict=lambda user_id: cancel_prefetch(user_id)
+)
+
+metrics.gauge("active_sessions", "Test sessions currently stored.", lambda: len(sessions))
+
+def save_session(session: Session):
+    with instrumentation.phase("session"):
+        sessions.put(session)
+
+attempt_writer = attempt_store.create_writer(
+    ATTEMPT_STORE, ATTEMPT_BATCH_SIZE, ATTEMPT_FLUSH_SECONDS, ATTEMPT_QUEUE_MAX, ATTEMPT_SUBMIT_TIMEOUT
+)
+if attempt_writer is not None:
+    metrics.gauge("attempts_queued", "Completed attempts waiting to be written.", lambda: len(attempt_writer))
+
+# Background prefetch tasks, keyed by user_id:
+# {"question_id": int, "started_at": monotonic time,
+#  "correct": (level, task), "wrong": (level, task)}
+# A branch after which the test would end is None.
+pending_prefetch = {}
+
+prefetch_hits = metrics.counter(
+    "prefetch_hits_total", "Next questions served from a prefetched branch.")
+prefetch_misses = metrics.counter(
+    "prefetch_misses_total", "Next questions generated on the request path.")
+prefetch_wasted = metrics.counter(
+    "prefetch_wasted_total", "Prefetched generations that were discarded.")
+metrics.gauge(
+    "prefetch_hit_rate", "Share of next questions served from prefetch.",
+    lambda: round(prefetch_hits.value / max(1, prefetch_hits.value + prefetch_misses.value), 4))
+
+def discard_prefetch_task(task: asyncio.Task):
+    # A task cancelled before its first step never reached the LLM
+    if inspect.getcoroutinestate(task.get_coro()) != inspect.CORO_CREATED:
+        prefetch_wasted.inc()
+    task.cancel()
+    # Retrieve the outcome so a failed generation is not logged as unhandled
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+def cancel_prefetch(user_id: str):
+    prefetch = pending_prefetch.pop(user_id, None)
+    if prefetch:
+        for branch in ("correct", "wrong"):
+            if prefetch[branch] is not None and prefetch[branch][1] is not None:
+                discard_prefetch_task(prefetch[branch][1])
+
+def sweep_prefetch():
+    """
+    Drops prefetches whose session is gone or older than the session TTL.
+    With a shared session store the test may have ended or expired on
+    another worker, which never reaches this worker's cancel_prefetch.
+    """
+    cutoff = time.monotonic() - SESSION_TTL_SECONDS
+    for user_id, prefetch in list(pending_prefetch.items()):
+        if prefetch["started_at"] < cutoff or user_id not in sessions:
+            cancel_prefetch(user_id)
+
+def start_prefetch(user_id: str, session: Session):
+    """
+    Starts generating both possible next questions for the session.
+    A branch the bank can serve is left to the bank, drawn only once the
+    answer confirms it, so the discarded branch never uses up a question.
+    """
+    cancel_prefetch(user_id)
+    if not PREFETCH_ENABLED:
+        return
+    qid = session.questions_asked + 1
+    prefetch = {"question_id": session.last_question.question_id, "started_at": time.monotonic()}
+    for branch, correct in (("correct", True), ("wrong", False)):
+        estimate = next_estimate(session, correct, PREFETCH_TIME_TAKEN)
+        if estimator.done(estimate):
+            prefetch[branch] = None
+            continue
+        level = estimator.estimate(estimate).level
+        if bank is not None and bank.has_unseen(session.skill, level, session.seen):
+            prefetch[branch] = (level, None)
+            continue
+        prefetch[branch] = (level, asyncio.ensure_future(generate_prefetch(session, level, qid)))
+    pending_prefetch[user_id] = prefetch
+
+async def take_prefetch(user_id: str, question_id: int, correct: bool, level: int):
+    """
+    Returns the prefetched question for the branch the user actually took,
+    or None if there is none or it was generated for a different bucket.
+    The other branch is discarded. A branch left to the bank also returns
+    None, without counting a miss: the caller draws it from the bank.
+    """
+    if not PREFETCH_ENABLED:
+        return None
+    prefetch = pending_prefetch.get(user_id)
+    if not prefetch or prefetch["question_id"] != question_id:
+        cancel_prefetch(user_id)
+        prefetch_misses.inc()
+        return None
+    del pending_prefetch[user_id]
+
+    taken, other = ("correct", "wrong") if correct else ("wrong", "correct")
+    if prefetch[other] is not None and prefetch[other][1] is not None:
+        discard_prefetch_task(prefetch[other][1])
+    if prefetch[taken] is None:
+        prefetch_misses.inc()
+        return None
+    predicted_level, task = prefetch[taken]
+    if task is None:
+        return None
+    if bucket_of(predicted_level) != bucket_of(level):
+        discard_prefetch_task(task)
+        prefetch_misses.inc()
+        return None
+    try:
+        question = await task
+    except Exception:
+        prefetch_misses.inc()
+        return None
+    prefetch_hits.inc()
+    return question
 
 # -----------------------------
 # API Endpoints
 # -----------------------------
-@app.post("/start_test")
-async def start_test(req: StartTestRequest):
+@router.post("/start_test")
+async def start_test(req: StartTestRequest, request: Request):
     """
     Start a new adaptive test session for a user & skill.
     Generates the first question.
     """
-    user_session = {
-        "user_id": req.user_id,
-        "skill": req.skill,
-        "current_level": req.self_rating,
-        "questions_asked": 0,
-        "correct_answers": 0,
-        "history": []  # stores question, options, correct_answer, user_answer
-    }
-
-    active_sessions[req.user_id] = user_session
+    user_session = Session(
+        user_id=req.user_id,
+        skill=req.skill,
+        current_level=req.self_rating,
+        digest=HistoryDigest(HISTORY_TOKEN_BUDGET),
+        estimate=estimator.start(req.self_rating)
+    )
 
     # Generate first question
     try:
-        history_json = json.dumps(user_session["history"])
-        prompt = question_prompt.format_messages(
-            skill=req.skill,
-            level=req.self_rating,
-            qid=1,
-            history=history_json
-        )
-        response = llm.invoke(prompt)
-        cleaned_response = clean_llm_json(response.content)
-        question = json.loads(cleaned_response)
+        question = await produce_question(user_session, req.self_rating, 1, request)
 
         # Store question in session history
-        user_session["history"].append({
-            "question_id": question["question_id"],
-            "question_title": question["question_title"],
-            "options": question["options"],
-            "correct_answer": question["correct_answer"],
-            "user_answer": None,
-            "difficulty": question["difficulty"]
-        })
-        user_session["last_question"] = question
-        user_session["questions_asked"] += 1
+        record_question(user_session, question)
+        start_prefetch(req.user_id, user_session)
         return question
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate question: {str(e)}")
+    finally:
+        save_session(user_session)
 
 
-@app.post("/next_question")
-async def next_question(req: AnswerRequest):
+@router.post("/next_question")
+async def next_question(req: AnswerRequest, request: Request):
     """
     Generate next question based on user response and history.
-    """
-    session = active_sessions.get(req.user_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="No active test session found.")
-
-    # Update user's answer in history
-    if session["last_question"]["question_id"] != req.question_id:
-        raise HTTPException(status_code=400, detail="Question ID mismatch.")
-    
-    for q in session["history"]:
-        if q["question_id"] == req.question_id:
-            q["user_answer"] = req.selected_option
-            break
-
-    # Adjust skill level based on correctness and time
-    level = session["current_level"]
-    time_factor = max(0.5, min(1.5, 30 / (req.time_taken + 1)))  # ideal 30s
 
-    if req.selected_option == req.correct_answer:
-        new_level = min(100, int(level + (5 * time_factor)))
-        session["correct_answers"] += 1
-    else:
-        new_level = max(0, int(level - (5 / time_factor)))
+    With LEVEL_ESTIMATOR=irt, once the level is known well enough the answer
+    is {"user_id", "test_complete": true, "estimate": {"level", "interval",
+    "answered"}} instead of a question; call /end_test next. time_taken
+    is then ignored. The default ("step") always returns a question.
+    """
+    session = load_answered_session(req)
 
-    session["current_level"] = new_level
+    # Update user's answer in history and adjust skill level based on correctness and time
+    correct = req.selected_option == req.correct_answer
+    estimate = next_estimate(session, correct, req.time_taken)
+    new_level = estimator.estimate(estimate).level
+    apply_answer(session, req.selected_option, correct, estimate)
+    if estimator.done(estimate):
+        cancel_prefetch(req.user_id)
+        save_session(session)
+        return test_complete(session)
 
-    # Generate next question
+    # Generate next question, preferring the speculatively prefetched one
     try:
-        history_json = json.dumps(session["history"])
-        prompt = question_prompt.format_messages(
-            skill=session["skill"],
-            level=new_level,
-            qid=session["questions_asked"] + 1,
-            history=history_json
-        )
-        response = llm.invoke(prompt)
-        cleaned_response = clean_llm_json(response.content)
-        question = json.loads(cleaned_response)
+        question = await take_prefetch(req.user_id, req.question_id, correct, new_level)
+        if question is None:
+            question = await produce_question(
+                session, new_level, session.questions_asked + 1, request
+            )
 
         # Store question in session history
-        session["history"].append({
-            "question_id": question["question_id"],
-            "question_title": question["question_title"],
-            "options": question["options"],
-            "correct_answer": question["correct_answer"],
-            "user_answer": None,
-            "difficulty": question["difficulty"]
-        })
-        session["last_question"] = question
-        session["questions_asked"] += 1
+        record_question(session, question)
+        start_prefetch(req.user_id, session)
         return question
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate next question: {str(e)}")
+    finally:
+        save_session(session)
 
 
-@app.post("/end_test")
+@router.post("/start_test/stream")
+async def start_test_stream(req: StartTestRequest):
+    """
+    Streaming variant of /start_test over Server-Sent Events.
+    The session is only stored once the first question is complete and valid.
+    """
+    user_session = Session(
+        user_id=req.user_id,
+        skill=req.skill,
+        current_level=req.self_rating,
+        digest=HistoryDigest(HISTORY_TOKEN_BUDGET),
+        estimate=estimator.start(req.self_rating)
+    )
+
+    def commit(question):
+        record_question(user_session, question)
+        save_session(user_session)
+        start_prefetch(req.user_id, user_session)
+
+    return StreamingResponse(
+        stream_question_events(user_session, req.self_rating, 1, commit),
+        media_type="text/event-stream"
+    )
+
+
+@router.post("/next_question/stream")
+async def next_question_stream(req: AnswerRequest):
+    """
+    Streaming variant of /next_question over Server-Sent Events.
+    The answer and the new question are applied to the session together,
+    only once the new question is complete and valid.
+    With LEVEL_ESTIMATOR=irt, an answer that ends the test is applied at
+    once and streamed back as a single "complete" event carrying the same
+    body as /next_question.
+    """
+    session = load_answered_session(req)
+    correct = req.selected_option == req.correct_answer
+    estimate = next_estimate(session, correct, req.time_taken)
+    if estimator.done(estimate):
+        cancel_prefetch(req.user_id)
+        apply_answer(session, req.selected_option, correct, estimate)
+        save_session(session)
+        return StreamingResponse(complete_events(test_complete(session)), media_type="text/event-stream")
+    new_level = estimator.estimate(estimate).level
+    question = await take_prefetch(req.user_id, req.question_id, correct, new_level)
+
+    def commit(question):
+        apply_answer(session, req.selected_option, correct, estimate)
+        record_question(session, question)
+        save_session(session)
+        start_prefetch(req.user_id, session)
+
+    return StreamingResponse(
+        stream_question_events(session, new_level, session.questions_asked + 1, commit, question),
+        media_type="text/event-stream"
+    )
+
+
+@router.post("/end_test")
 async def end_test(req: EndTestRequest):
     """
-    Ends the test and returns final score.
+    Ends the test and returns final score. With ATTEMPT_STORE set, the
+    attempt is queued to be saved, along with the user's new supply score.
     """
-    session = active_sessions.pop(req.user_id, None)
+    session = sessions.pop(req.user_id)
+    cancel_prefetch(req.user_id)
     if not session:
         raise HTTPException(status_code=404, detail="No active test found for user.")
 
     # Compute score
-    score = (session["correct_answers"] / max(1, session["questions_asked"])) * 100
+    score = (session.correct_answers / max(1, session.questions_asked)) * 100
+    estimate = estimator.estimate(estimate_of(session))
+
+    if attempt_writer is not None:
+        try:
+            await attempt_writer.submit(attempt_store.Attempt.from_session(session, score, estimate.level))
+        except asyncio.QueueFull:
+            # Keep the session, so the client can end the test again later
+            save_session(session)
+            raise HTTPException(status_code=503, detail="Too many results waiting to be saved; retry shortly.")
 
     return {
         "user_id": req.user_id,
         "skill": req.skill,
         "final_score": round(score, 2),
-        "questions_attempted": session["questions_asked"],
-        "history": session["history"]
+        "questions_attempted": session.questions_asked,
+        "estimate": estimate.to_dict(),
+        "history": [q.to_dict() for q in session.history]
+    }
+
+
+@router.post("/generate_questions")
+async def generate_questions(req: GenerateQuestionsRequest):
+    """
+    Bulk-generates questions for a skill across a range of difficulty buckets,
+    several per LLM call. Valid questions are added to the question bank.
+    """
+    if not 0 <= req.min_bucket <= req.max_bucket <= question_bank.NUM_BUCKETS - 1:
+        raise HTTPException(status_code=400, detail="Buckets must satisfy 0 <= min_bucket <= max_bucket <= 4.")
+    if not 1 <= req.per_bucket <= 50:
+        raise HTTPException(status_code=400, detail="per_bucket must be between 1 and 50.")
+
+    levels = [
+        question_bank.bucket_level(bucket)
+        for bucket in range(req.min_bucket, req.max_bucket + 1)
+        for _ in range(req.per_bucket)
+    ]
+    batches = [levels[i:i + GENERATION_BATCH_SIZE] for i in range(0, len(levels), GENERATION_BATCH_SIZE)]
+    results = await asyncio.gather(
+        *(generate_question_batch(req.skill, batch, []) for batch in batches),
+        return_exceptions=True
+    )
+    questions = [q for result in results if isinstance(result, list) for q in result]
+    if not questions:
+        raise HTTPException(status_code=500, detail="Failed to generate questions.")
+
+    banked = 0
+    if req.add_to_bank and bank_store is not None:
+        for question in questions:
+            banked += bank_store.add(req.skill, bucket_of(question["difficulty"]), question)
+
+    return {
+        "skill": req.skill,
+        "requested": len(levels),
+        "generated": len(questions),
+        "llm_calls": len(batches),
+        "banked": banked,
+        "questions": questions
     }
+
+
+@router.post("/score_skills")
+def score_skills(req: ScoreSkillsRequest):
+    """
+    Predicts the demand score of each job-skill row, in one model call.
+    A plain def, so the CPU-bound predict runs in the threadpool.
+    """
+    scorer = get_skill_scorer()
+    if scorer is None:
+        raise HTTPException(status_code=503, detail=f"Skill model is not loaded: {skill_scorer_error}")
+    if len(req.rows) > SCORE_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {SCORE_MAX_ROWS} rows per request.")
+
+    scores = scorer.score(req.rows)
+    scored_rows.inc(len(req.rows))
+    return {"scores": scores.tolist()}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Exposes service counters, gauges and latency histograms in Prometheus text format.
+    """
+    return metrics.render()
+
+
+# -----------------------------
+# App factory
+# -----------------------------
+def create_app() -> FastAPI:
+    """
+    Builds the app; cheap, see PREWARM. Serve with `uvicorn api:app`, or
+    `uvicorn --factory api:create_app`.
+    """
+    app = FastAPI(title="Adaptive Skill Evaluation API", lifespan=lifespan)
+    app.add_middleware(
+        instrumentation.RequestTimingMiddleware,
+        slow_seconds=SLOW_REQUEST_SECONDS,
+        profile_rate=PROFILE_SAMPLE_RATE,
+        profile_dir=PROFILE_DIR
+    )
+    app.include_router(router)
+    return app
+
+app = create_app()
@@ -0,0 +1,266 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+import metrics
+from session_store import Session
+
+# -----------------------------
+# Completed attempts
+# -----------------------------
+# Finished tests go to the user_assessment_attempts, user_answers and
+# user_skill_supply tables of schema.md without touching the database on
+# the request path: end_test only puts the attempt on a bounded queue, and
+# a background task writes whatever has queued up in one transaction, once
+# `batch_size` attempts are waiting or the oldest has waited `flush_seconds`.
+# A full queue makes end_test wait (backpressure), and after
+# `submit_timeout` seconds fail, rather than buffer without limit.
+# Shutdown drains the queue.
+#
+# Tests here are per skill with LLM-written questions, so rows refer to
+# skills by name, and answers keep the question text and option key
+# instead of ids into the assessments/questions/options tables.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_assessment_attempts (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    skill TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    final_grade_percentage REAL NOT NULL,
+    calculated_score INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_user ON user_assessment_attempts (user_id, skill);
+CREATE TABLE IF NOT EXISTS user_answers (
+    id INTEGER PRIMARY KEY,
+    attempt_id INTEGER NOT NULL REFERENCES user_assessment_attempts (id),
+    question_id INTEGER NOT NULL,
+    question_text TEXT NOT NULL,
+    selected_option TEXT NOT NULL,
+    is_correct INTEGER NOT NULL,
+    difficulty INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_attempt ON user_answers (attempt_id);
+CREATE TABLE IF NOT EXISTS user_skill_supply (
+    user_id TEXT NOT NULL,
+    skill TEXT NOT NULL,
+    supply_score INTEGER NOT NULL,
+    source_type TEXT NOT NULL,
+    last_updated REAL NOT NULL,
+    PRIMARY KEY (user_id, skill)
+);
+"""
+
+INSERT_ATTEMPT = (
+    "INSERT INTO user_assessment_attempts "
+    "(id, user_id, skill, completed_at, final_grade_percentage, calculated_score) VALUES (?, ?, ?, ?, ?, ?)"
+)
+INSERT_ANSWER = (
+    "INSERT INTO user_answers "
+    "(attempt_id, question_id, question_text, selected_option, is_correct, difficulty) VALUES (?, ?, ?, ?, ?, ?)"
+)
+# The newest attempt wins, even if batches from several workers land out of order
+UPSERT_SUPPLY = (
+    "INSERT INTO user_skill_supply (user_id, skill, supply_score, source_type, last_updated) "
+    "VALUES (?, ?, ?, 'mcq', ?) "
+    "ON CONFLICT (user_id, skill) DO UPDATE SET supply_score = excluded.supply_score, "
+    "source_type = excluded.source_type, last_updated = excluded.last_updated "
+    "WHERE excluded.last_updated >= user_skill_supply.last_updated"
+)
+
+attempts_saved = metrics.counter(
+    "attempts_saved_total", "Completed attempts written to the database.")
+attempts_rejected = metrics.counter(
+    "attempts_rejected_total", "Attempts refused because the write queue stayed full.")
+attempts_lost = metrics.counter(
+    "attempts_lost_total", "Attempts that could not be written before shutdown.")
+attempt_flush_seconds = metrics.histogram(
+    "attempt_flush_seconds", "Time to write one batch of attempts.")
+attempt_batch_size = metrics.histogram(
+    "attempt_batch_size", "Attempts written per transaction.", buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+
+
+@dataclass(slots=True)
+class Attempt:
+    user_id: str
+    skill: str
+    completed_at: float
+    final_grade_percentage: float
+    calculated_score: int  # 0-1000, also the new supply_score
+    answers: list  # (question_id, question_text, selected_option, is_correct, difficulty)
+
+    @classmethod
+    def from_session(cls, session: Session, grade: float, level: int) -> "Attempt":
+        """
+        The attempt of a finished session. The level (0-100) becomes a 0-1000
+        score; a last question that was never answered is left out.
+        """
+        answers = [
+            (q.question_id, q.question_title, q.user_answer, q.user_answer == q.correct_answer, q.difficulty)
+            for q in session.history if q.user_answer is not None
+        ]
+        return cls(session.user_id, session.skill, time.time(), grade, level * 10, answers)
+
+
+class AttemptDB:
+    """
+    SQLite in WAL mode, shareable by the workers on one host.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def write(self, attempts: list):
+        """
+        Writes the attempts, their answers and the resulting supply scores
+        in a single transaction.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Ids are assigned here, under the write lock, so answers can
+                # reference their attempt without a round trip per attempt
+                first = self._conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) + 1 FROM user_assessment_attempts").fetchone()[0]
+                self._conn.executemany(INSERT_ATTEMPT, [
+                    (first + i, a.user_id, a.skill, a.completed_at, a.final_grade_percentage, a.calculated_score)
+                    for i, a in enumerate(attempts)
+                ])
+                self._conn.executemany(INSERT_ANSWER, [
+                    (first + i, *answer) for i, a in enumerate(attempts) for answer in a.answers
+                ])
+                self._conn.executemany(UPSERT_SUPPLY, [
+                    (a.user_id, a.skill, a.calculated_score, a.completed_at) for a in attempts
+                ])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def supply(self, user_id: str) -> dict:
+        """
+        {skill: supply_score} for one user.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT skill, supply_score FROM user_skill_supply WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AttemptWriter:
+    """
+    Write-behind queue in front of an AttemptDB (see above). The writer task
+    starts with the first submitted attempt; close() drains and stops it.
+    """
+
+    def __init__(self, db: AttemptDB, batch_size: int = 500, flush_seconds: float = 1.0,
+                 max_queued: int = 10_000, submit_timeout: float = 5.0):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.submit_timeout = submit_timeout
+        self.queue = asyncio.Queue(max_queued)
+        self._task = None
+        self._closing = False
+
+    async def submit(self, attempt: Attempt):
+        """
+        Queues an attempt, waiting while the queue is full. Raises
+        asyncio.QueueFull if it is still full after `submit_timeout`.
+        """
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.run())
+        try:
+            self.queue.put_nowait(attempt)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self.queue.put(attempt), self.submit_timeout)
+            except asyncio.TimeoutError:
+                attempts_rejected.inc()
+                raise asyncio.QueueFull from None
+
+    async def next_batch(self) -> list:
+        """
+        Waits for an attempt, then for more until the batch is full or the
+        first one has waited `flush_seconds`. None entries (wake-ups from
+        close) are dropped.
+        """
+        first = await self.queue.get()
+        batch = [] if first is None else [first]
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.monotonic()
+                if self._closing or remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is not None:
+                batch.append(item)
+        return batch
+
+    async def run(self):
+        while not (self._closing and self.queue.empty()):
+            batch = await self.next_batch()
+            if batch:
+                await self.flush(batch)
+
+    async def flush(self, batch: list):
+        delay = 0.5
+        while True:
+            try:
+                with attempt_flush_seconds.time():
+                    await asyncio.to_thread(self.db.write, batch)
+                attempts_saved.inc(len(batch))
+                attempt_batch_size.observe(len(batch))
+                return
+            except Exception as e:
+                if self._closing:
+                    attempts_lost.inc(len(batch))
+                    print(f"Could not save {len(batch)} attempts at shutdown: {e}")
+                    return
+                print(f"Saving {len(batch)} attempts failed, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(30.0, delay * 2)
+
+    async def close(self):
+        """
+        Writes everything still queued, then stops the writer task.
+        """
+        self._closing = True
+        if self._task is not None:
+            if self.queue.empty():
+                self.queue.put_nowait(None)  # wakes the writer if it is idle
+            await self._task
+        self.db.close()
+
+    def __len__(self):
+        return self.queue.qsize()
+
+
+def create_writer(spec: str, batch_size: int, flush_seconds: float, max_queued: int,
+                  submit_timeout: float) -> AttemptWriter:
+    """
+    Builds the writer from a spec string: "sqlite:///path/to.db" or "off".
+    """
+    if spec == "off":
+        return None
+    if spec.startswith("sqlite:///"):
+        return AttemptWriter(AttemptDB(spec[len("sqlite:///"):]), batch_size, flush_seconds, max_queued,
+                             submit_timeout)
+    raise ValueError(f"Unknown ATTEMPT_STORE: {spec}")
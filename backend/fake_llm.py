@@ -0,0 +1,163 @@
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+
+# -----------------------------
+# Local stand-in for the Gemini chat model
+# -----------------------------
+# Answers `question_prompt` (and `batch_question_prompt`) with question JSON
+# after a simulated delay, so the API can be exercised (benchmarks, load
+# tests) without a real key.
+
+SKILL_RE = re.compile(r"skill: \*\*(.+?)\*\*")
+QID_RE = re.compile(r'"question_id": (\d+)')
+LEVEL_RE = re.compile(r'"difficulty": (\d+)')
+BATCH_LEVELS_RE = re.compile(r"Difficulty of each question, in order: ([\d, ]+)")
+
+
+def options_as_list(question):
+    question["options"] = list(question["options"].values())
+
+
+def answer_as_letter(question):
+    question["correct_answer"] = "ABCD"[int(question["correct_answer"][-1]) - 1]
+
+
+def answer_as_text(question):
+    question["correct_answer"] = question["options"][question["correct_answer"]]
+
+
+def title_alias(question):
+    question["question"] = question.pop("question_title")
+
+
+# Slips question_schema.repair() fixes without another LLM call
+FIXABLE_QUIRKS = (options_as_list, answer_as_letter, answer_as_text, title_alias)
+
+
+class FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+def prompt_text(prompt) -> str:
+    """
+    Flattens a formatted prompt (list of chat messages or a plain string) to text.
+    """
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(getattr(m, "content", str(m)) for m in prompt)
+
+
+class FakeLLM:
+    """
+    Drop-in replacement for ChatGoogleGenerativeAI.
+
+    Each call takes `latency` seconds plus `per_token_latency` per prompt
+    token (prefill) and `output_token_latency` per generated token, at
+    ~4 chars per token, plus up to `jitter` random extra seconds. A
+    `malformed_rate` share of questions come back without a
+    `correct_answer`, a `fixable_rate` share with one of FIXABLE_QUIRKS,
+    and an `invalid_json_rate` share of replies are cut off halfway.
+    """
+
+    def __init__(self, latency: float = 0.0, per_token_latency: float = 0.0,
+                 output_token_latency: float = 0.0, malformed_rate: float = 0.0, seed: int = 0,
+                 jitter: float = 0.0, invalid_json_rate: float = 0.0, fixable_rate: float = 0.0):
+        self.latency = latency
+        self.per_token_latency = per_token_latency
+        self.output_token_latency = output_token_latency
+        self.malformed_rate = malformed_rate
+        self.jitter = jitter
+        self.invalid_json_rate = invalid_json_rate
+        self.fixable_rate = fixable_rate
+        self.calls = 0
+        self.prompt_chars = 0
+        self.completion_chars = 0
+        self.last_prompt_chars = 0
+        self._counter = itertools.count(1)
+        self._random = random.Random(seed)
+
+    def respond(self, prompt):
+        """
+        Renders the reply and accounts for the call. Returns (text, delay).
+        """
+        text = prompt_text(prompt)
+        reply = self.render(prompt)
+        if self.invalid_json_rate and self._random.random() < self.invalid_json_rate:
+            reply = reply[:len(reply) // 2]
+        self.calls += 1
+        self.prompt_chars += len(text)
+        self.completion_chars += len(reply)
+        self.last_prompt_chars = len(text)
+        delay = (self.latency
+                 + self.per_token_latency * len(text) / 4
+                 + self.output_token_latency * len(reply) / 4)
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        return reply, delay
+
+    def make_question(self, skill: str, qid: int, level: int) -> dict:
+        n = next(self._counter)
+        question = {
+            "question_id": qid,
+            "question_title": f"{skill} question #{n}",
+            "options": {
+                "opt1": f"Option A for #{n}",
+                "opt2": f"Option B for #{n}",
+                "opt3": f"Option C for #{n}",
+                "opt4": f"Option D for #{n}",
+            },
+            "correct_answer": "opt1",
+            "difficulty": level,
+        }
+        if self.malformed_rate and self._random.random() < self.malformed_rate:
+            del question["correct_answer"]
+        elif self.fixable_rate and self._random.random() < self.fixable_rate:
+            self._random.choice(FIXABLE_QUIRKS)(question)
+        return question
+
+    def render(self, prompt) -> str:
+        text = prompt_text(prompt)
+        match = SKILL_RE.search(text)
+        skill = match.group(1) if match else "Skill"
+
+        batch = BATCH_LEVELS_RE.search(text)
+        if batch:
+            levels = [int(v) for v in batch.group(1).replace(" ", "").split(",") if v]
+            questions = [self.make_question(skill, 0, level) for level in levels]
+            return "```json\n" + json.dumps(questions, indent=2) + "\n```"
+
+        # The answer template comes last; earlier matches belong to the history
+        qid = QID_RE.findall(text)
+        level = LEVEL_RE.findall(text)
+        question = self.make_question(
+            skill, int(qid[-1]) if qid else 1, int(level[-1]) if level else 50
+        )
+        return "```json\n" + json.dumps(question, indent=2) + "\n```"
+
+    def invoke(self, prompt):
+        reply, delay = self.respond(prompt)
+        if delay:
+            time.sleep(delay)
+        return FakeMessage(reply)
+
+    async def ainvoke(self, prompt):
+        reply, delay = self.respond(prompt)
+        if delay:
+            await asyncio.sleep(delay)
+        return FakeMessage(reply)
+
+    async def astream(self, prompt, chunk_chars: int = 16):
+        """
+        Streams the response in small chunks, spreading the delay across them.
+        """
+        reply, delay = self.respond(prompt)
+        chunks = [reply[i:i + chunk_chars] for i in range(0, len(reply), chunk_chars)]
+        for chunk in chunks:
+            if delay:
+                await asyncio.sleep(delay / len(chunks))
+            yield FakeMessage(chunk)
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+# -----------------------------
+# Flattened random forest
+# -----------------------------
+# The trained RandomForestRegressor exported as a handful of contiguous
+# arrays (one entry per node, all trees back to back), saved as plain .npy
+# files. Loading memory-maps them, so every uvicorn worker shares the same
+# pages, starts in milliseconds and never has to import scikit-learn.
+#
+# All trees are walked for a whole batch in lockstep, one level per step.
+# Leaves point to themselves (threshold +inf, so every row "goes left"), so
+# a (tree, row) pair that reached one can stay in the walk; once most pairs
+# have, the rest are compacted and walked on alone. Node indices are
+# int64 so numpy gathers with them as they are.
+
+ARRAYS = ("feature", "threshold", "children", "value", "roots")
+# Rows walked at once; keeps the (trees x rows) working set in cache
+BLOCK_ROWS = 256
+# Compact the walk once fewer than this share of its pairs are still moving
+COMPACT_BELOW = 0.5
+
+
+class FlatForest:
+    def __init__(self, arrays: dict, meta: dict):
+        self.feature = arrays["feature"]      # int64, split feature per node
+        self.threshold = arrays["threshold"]  # float64, go right if x > threshold
+        self.children = arrays["children"]    # int64, (left, right) per node, interleaved
+        self.value = arrays["value"]          # float64, prediction per node
+        self.roots = arrays["roots"]          # int64, root node of each tree
+        self.meta = meta
+        self.columns = meta.get("columns")
+        self.max_depth = meta["max_depth"]
+
+    @classmethod
+    def from_sklearn(cls, model, columns=None, meta=None):
+        # A lone DecisionTreeRegressor is a forest of one
+        estimators = model.estimators_ if hasattr(model, "estimators_") else [model]
+        if not all(hasattr(estimator, "tree_") for estimator in estimators):
+            raise ValueError(f"{type(model).__name__} is not a tree ensemble")
+        trees = [estimator.tree_ for estimator in estimators]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        feature, threshold, children, value = [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(np.where(leaf, np.inf, tree.threshold))
+            left = np.where(leaf, nodes, tree.children_left) + offset
+            right = np.where(leaf, nodes, tree.children_right) + offset
+            children.append(np.stack([left, right], axis=1).ravel())
+            value.append(tree.value[:, 0, 0])
+        arrays = {
+            "feature": np.concatenate(feature).astype(np.int64),
+            "threshold": np.concatenate(threshold).astype(np.float64),
+            "children": np.concatenate(children).astype(np.int64),
+            "value": np.concatenate(value).astype(np.float64),
+            "roots": offsets[:-1].astype(np.int64),
+        }
+        meta = dict(
+            meta or {},
+            n_features=int(model.n_features_in_),
+            max_depth=max(int(tree.max_depth) for tree in trees),
+            columns=list(columns) if columns is not None else None,
+        )
+        return cls(arrays, meta)
+
+    def save(self, path: str):
+        """
+        Writes one uncompressed .npy per array, plus meta.json, into `path`.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(path, name + ".npy"), getattr(self, name))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None)
+            for name in ARRAYS
+        }
+        return cls(arrays, meta)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Same result as RandomForestRegressor.predict, bit for bit.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return np.concatenate(
+            [self._predict_block(X[i:i + BLOCK_ROWS]) for i in range(0, len(X), BLOCK_ROWS)]
+        ) if len(X) else np.zeros(0)
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        n, num_features = X.shape
+        num_trees = len(self.roots)
+        # One (tree, row) pair per element, tree-major. float32 -> float64 is
+        # exact, and spares a conversion in every comparison.
+        node = np.repeat(self.roots, n)
+        row_start = np.tile(np.arange(0, n * num_features, num_features, dtype=np.int64), num_trees)
+        X = X.astype(np.float64).ravel()
+        # Final node of every pair; `moving` holds the positions of those still walked
+        leaf = node
+        moving = None
+        for _ in range(self.max_depth):
+            threshold = self.threshold[node]
+            walking = threshold != np.inf
+            count = np.count_nonzero(walking)
+            if count == 0:
+                break
+            if count < COMPACT_BELOW * len(node):
+                if moving is None:
+                    leaf, moving = node.copy(), np.flatnonzero(walking)
+                else:
+                    leaf[moving] = node
+                    moving = moving[walking]
+                node, row_start, threshold = node[walking], row_start[walking], threshold[walking]
+            go_right = X[row_start + self.feature[node]] > threshold
+            node = self.children[2 * node + go_right]
+        if moving is None:
+            leaf = node
+        else:
+            leaf[moving] = node
+
+        # Summed tree by tree, in the same order as scikit-learn
+        leaf_values = self.value[leaf].reshape(num_trees, n)
+        total = np.zeros(n)
+        for tree_values in leaf_values:
+            total += tree_values
+        return total / num_trees
+
+
+if __name__ == "__main__":
+    import joblib
+
+    from score_table import file_digest
+
+    model_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "skillsync-model"))
+    parser = argparse.ArgumentParser(description="Export the trained forest as memory-mappable arrays.")
+    parser.add_argument("--model", default=os.path.join(model_dir, "skill_sync_model.joblib"))
+    parser.add_argument("--columns", default=os.path.join(model_dir, "model_columns.joblib"))
+    parser.add_argument("--output", default=os.path.join(model_dir, "skill_sync_model.forest"))
+    args = parser.parse_args()
+
+    forest = FlatForest.from_sklearn(
+        joblib.load(args.model), joblib.load(args.columns), meta={"model_digest": file_digest(args.model)}
+    )
+    forest.save(args.output)
+    size = sum(getattr(forest, name).nbytes for name in ARRAYS)
+    print(f"Saved {len(forest.roots)} trees, {len(forest.value):,} nodes ({size / 1024:.0f} KiB) to {args.output}")
@@ -0,0 +1,110 @@
+from collections import deque
+
+# -----------------------------
+# Compact history for prompts
+# -----------------------------
+# Instead of re-serializing every past question (with options and answers)
+# into each prompt, a session keeps a digest that is updated in O(1) per
+# question/answer and always renders within a fixed token budget.
+
+# Rough chars-per-token ratio for English prompt text
+CHARS_PER_TOKEN = 4
+# Long titles are cut to this many characters
+TITLE_CHARS = 80
+# Number of most recent answers shown as a streak
+RECENT_ANSWERS = 10
+# Characters kept aside for the performance summary line
+SUMMARY_CHARS = 200
+
+BUCKET_LABELS = ["0-20", "20-40", "40-60", "60-80", "80-100"]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def shorten(title: str) -> str:
+    title = " ".join(title.split())
+    if len(title) <= TITLE_CHARS:
+        return title
+    return title[:TITLE_CHARS - 3] + "..."
+
+
+class HistoryDigest:
+    """
+    Rolling summary of a test session: recent question titles plus answer
+    performance overall, recently and per difficulty bucket.
+    """
+
+    __slots__ = ("titles", "recent_bits", "answered", "correct", "bucket_answered", "bucket_correct")
+
+    def __init__(self, token_budget: int):
+        # Each title costs its length plus separators; the summary is reserved
+        title_budget = max(0, token_budget * CHARS_PER_TOKEN - SUMMARY_CHARS)
+        self.titles = deque(maxlen=max(1, title_budget // (TITLE_CHARS + 4)))
+        # Last RECENT_ANSWERS results as bits, newest in the lowest bit
+        self.recent_bits = 0
+        self.answered = 0
+        self.correct = 0
+        self.bucket_answered = [0] * len(BUCKET_LABELS)
+        self.bucket_correct = [0] * len(BUCKET_LABELS)
+
+    def add_question(self, question_title: str):
+        self.titles.append(shorten(question_title))
+
+    def record_answer(self, correct: bool, difficulty: int):
+        bucket = min(len(BUCKET_LABELS) - 1, max(0, int(difficulty)) // 20)
+        self.answered += 1
+        self.bucket_answered[bucket] += 1
+        if correct:
+            self.correct += 1
+            self.bucket_correct[bucket] += 1
+        self.recent_bits = ((self.recent_bits << 1) | int(correct)) & ((1 << RECENT_ANSWERS) - 1)
+
+    def recent(self) -> list:
+        """
+        Results of the most recent answers, oldest first.
+        """
+        count = min(self.answered, RECENT_ANSWERS)
+        return [bool(self.recent_bits >> i & 1) for i in range(count - 1, -1, -1)]
+
+    def to_dict(self) -> dict:
+        return {
+            "max_titles": self.titles.maxlen,
+            "titles": list(self.titles),
+            "recent_bits": self.recent_bits,
+            "answered": self.answered,
+            "correct": self.correct,
+            "bucket_answered": self.bucket_answered,
+            "bucket_correct": self.bucket_correct,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HistoryDigest":
+        digest = cls.__new__(cls)
+        digest.titles = deque(data["titles"], maxlen=data["max_titles"])
+        digest.recent_bits = data["recent_bits"]
+        digest.answered = data["answered"]
+        digest.correct = data["correct"]
+        digest.bucket_answered = list(data["bucket_answered"])
+        digest.bucket_correct = list(data["bucket_correct"])
+        return digest
+
+    def render(self) -> str:
+        if not self.titles:
+            return "None yet (this is the first question)."
+        lines = []
+        if self.answered:
+            by_bucket = ", ".join(
+                f"{label}: {self.bucket_correct[b]}/{self.bucket_answered[b]}"
+                for b, label in enumerate(BUCKET_LABELS) if self.bucket_answered[b]
+            )
+            recent = self.recent()
+            streak = "".join("R" if c else "W" for c in recent)
+            lines.append(
+                f"Answered {self.answered}, correct {self.correct}. "
+                f"Last {len(recent)} (oldest first, R=right, W=wrong): {streak}. "
+                f"Correct by difficulty: {by_bucket}."
+            )
+        lines.append("Recent questions (do not repeat): " + " | ".join(self.titles))
+        return "\n".join(lines)
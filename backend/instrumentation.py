@@ -0,0 +1,127 @@
+import contextvars
+import cProfile
+import os
+import random
+import time
+from contextlib import contextmanager
+
+import metrics
+
+# -----------------------------
+# Request instrumentation
+# -----------------------------
+# phase() times one step of serving a question (prompt formatting, LLM
+# call, JSON parsing, session update) into request_phase_seconds, and adds
+# it to the breakdown of the request it runs in. RequestTimingMiddleware
+# times whole requests per endpoint, prints the breakdown of slow ones and,
+# for a sampled share of requests, runs cProfile and keeps the profile if
+# the request turned out slow.
+#
+# A phase costs two perf_counter() calls and a short lock, cheap enough to
+# leave on in production (see benchmarks/bench_instrumentation.py).
+# INSTRUMENTATION=0 turns it all off.
+
+ENABLED = os.getenv("INSTRUMENTATION", "1") == "1"
+
+phase_seconds = metrics.histogram(
+    "request_phase_seconds", "Time spent per phase of serving a question.", label="phase")
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Request latency per endpoint.", label="path")
+slow_requests = metrics.counter(
+    "slow_requests_total", "Requests slower than SLOW_REQUEST_SECONDS.")
+profiles_saved = metrics.counter(
+    "slow_request_profiles_total", "cProfile dumps written for sampled slow requests.")
+
+# Per-request {phase: seconds}; None outside a timed request
+current_breakdown = contextvars.ContextVar("current_breakdown", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        phase_seconds.observe(elapsed, name)
+        breakdown = current_breakdown.get()
+        if breakdown is not None:
+            breakdown[name] = breakdown.get(name, 0.0) + elapsed
+
+
+def text_size(prompt) -> int:
+    """
+    Characters in a prompt (list of chat messages or a plain string).
+    """
+    if isinstance(prompt, str):
+        return len(prompt)
+    return sum(len(getattr(m, "content", "")) for m in prompt)
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware: per-endpoint latency, slow-request breakdowns and
+    sampled profiling. Streaming responses are timed until their last chunk.
+
+    cProfile sees the whole event loop, so a profile also contains whatever
+    other requests ran meanwhile, and only one request is profiled at a time.
+    """
+
+    def __init__(self, app, slow_seconds: float = 1.0, profile_rate: float = 0.0,
+                 profile_dir: str = "profiles"):
+        self.app = app
+        self.slow_seconds = slow_seconds
+        self.profile_rate = profile_rate
+        self.profile_dir = profile_dir
+        self.paths = None
+        self.profiling = False
+
+    def path_label(self, scope) -> str:
+        # Only known routes become label values, so unknown URLs can't blow up the series count.
+        # Starlette records the matched route; older versions don't, so fall back to the app's routes
+        route = scope.get("route")
+        if hasattr(route, "path"):
+            return route.path
+        if self.paths is None:
+            self.paths = {getattr(route, "path", None) for route in scope["app"].routes}
+        return scope["path"] if scope["path"] in self.paths else "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        breakdown = {}
+        token = current_breakdown.set(breakdown)
+        profiler = None
+        if self.profile_rate and not self.profiling and random.random() < self.profile_rate:
+            self.profiling = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self.profiling = False
+            current_breakdown.reset(token)
+            path = self.path_label(scope)
+            request_seconds.observe(elapsed, path)
+            if elapsed >= self.slow_seconds:
+                self.report_slow(scope, path, elapsed, breakdown, profiler)
+
+    def report_slow(self, scope, path, elapsed, breakdown, profiler):
+        slow_requests.inc()
+        phases = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in breakdown.items())
+        print(f"Slow request: {scope['method']} {path} took {elapsed * 1000:.0f} ms ({phases or 'no phases'})")
+        if profiler is not None:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            name = (f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{int(profiles_saved.value)}-"
+                    f"{path.strip('/').replace('/', '_') or 'root'}.prof")
+            profiler.dump_stats(os.path.join(self.profile_dir, name))
+            profiles_saved.inc()
@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+
+# -----------------------------
+# Level estimation
+# -----------------------------
+# An estimator turns the answers so far into the candidate's level (0-100),
+# which is also the difficulty of the next question, and decides when the
+# level is known well enough to stop asking. Its per-session state is a
+# small JSON-friendly dict kept on the Session, and update() returns a new
+# state rather than changing it, so both branches of a prefetch can be
+# predicted from the same session.
+#
+# "step" is the original rule: ±5 points per answer, scaled by answer time,
+# with no notion of uncertainty, so it never stops on its own.
+#
+# "irt" is a one-parameter IRT (Rasch) model with a guessing floor for
+# four-option questions:
+#   P(correct | level θ, difficulty b) = g + (1 - g) / (1 + exp(-(θ - b) / s))
+# The posterior over θ is kept on a grid of the 101 integer levels,
+# starting from a normal prior around the self-rating. The level is the
+# posterior mean, the interval is the central credible interval, and the
+# test can stop once that interval is narrow enough. NumPy is only
+# imported by the IRT estimator, so the default "step" keeps it out of
+# the API's startup.
+
+# Points of level per logit: 12 points above a question's difficulty,
+# a candidate answers it right ~84% of the time (before guessing)
+IRT_SCALE = 12.0
+# Chance of guessing one of four options right
+IRT_GUESS = 0.25
+# Self-ratings are rough; a wide prior lets the answers take over quickly
+IRT_PRIOR_SD = 25.0
+CREDIBLE_MASS = 0.9
+
+
+@dataclass(slots=True)
+class Estimate:
+    level: int
+    low: int = None  # credible interval, if the estimator has one
+    high: int = None
+    answered: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "level": self.level,
+            "interval": [self.low, self.high] if self.low is not None else None,
+            "answered": self.answered,
+        }
+
+
+class LevelEstimator:
+    """
+    Strategy interface. States are plain dicts and are never modified in place.
+    """
+
+    def start(self, self_rating: int) -> dict:
+        raise NotImplementedError
+
+    def update(self, state: dict, difficulty: int, correct: bool, time_taken: float) -> dict:
+        raise NotImplementedError
+
+    def estimate(self, state: dict) -> Estimate:
+        raise NotImplementedError
+
+    def done(self, state: dict) -> bool:
+        """True once the test can end."""
+        return False
+
+
+def compute_next_level(level: int, correct: bool, time_taken: float) -> int:
+    """
+    Moves the level up after a correct answer and down after a wrong one,
+    scaled by how quickly the user answered (ideal 30s).
+    """
+    time_factor = max(0.5, min(1.5, 30 / (time_taken + 1)))  # ideal 30s
+    if correct:
+        return min(100, int(level + (5 * time_factor)))
+    return max(0, int(level - (5 / time_factor)))
+
+
+class StepEstimator(LevelEstimator):
+    def start(self, self_rating: int) -> dict:
+        return {"level": self_rating, "answered": 0}
+
+    def update(self, state, difficulty, correct, time_taken):
+        return {"level": compute_next_level(state["level"], correct, time_taken), "answered": state["answered"] + 1}
+
+    def estimate(self, state):
+        return Estimate(state["level"], answered=state["answered"])
+
+
+class IRTEstimator(LevelEstimator):
+    """
+    Rasch model with a guessing floor, posterior on a grid (see above).
+    Answer time is not used. Stops once the credible interval is at most
+    `stop_width` points wide (after `min_questions`), or at `max_questions`.
+    """
+
+    def __init__(self, stop_width: float = 30, min_questions: int = 3, max_questions: int = 20):
+        import numpy as np
+
+        self.levels = np.arange(101, dtype=np.float64)
+        self.stop_width = stop_width
+        self.min_questions = min_questions
+        self.max_questions = max_questions
+
+    def start(self, self_rating: int) -> dict:
+        return self.summarize({"prior": self_rating, "answers": []})
+
+    def update(self, state, difficulty, correct, time_taken):
+        return self.summarize(dict(state, answers=state["answers"] + [[int(difficulty), int(correct)]]))
+
+    def posterior(self, state: dict):
+        """
+        The posterior over the 101 levels, as a NumPy array summing to 1.
+        """
+        import numpy as np
+
+        log_post = -0.5 * ((self.levels - state["prior"]) / IRT_PRIOR_SD) ** 2
+        if state["answers"]:
+            difficulty, correct = np.asarray(state["answers"], dtype=np.float64).T
+            p = IRT_GUESS + (1 - IRT_GUESS) / (1 + np.exp((difficulty[:, None] - self.levels) / IRT_SCALE))
+            log_post += (correct[:, None] * np.log(p) + (1 - correct[:, None]) * np.log1p(-p)).sum(axis=0)
+        post = np.exp(log_post - log_post.max())
+        return post / post.sum()
+
+    def summarize(self, state: dict) -> dict:
+        """
+        The state with its level and interval filled in, computed once per answer.
+        """
+        import numpy as np
+
+        post = self.posterior(state)
+        cdf = np.cumsum(post)
+        tail = (1 - CREDIBLE_MASS) / 2
+        return dict(
+            state,
+            level=int(round(float(self.levels @ post))),
+            low=int(np.searchsorted(cdf, tail)),
+            high=int(np.searchsorted(cdf, 1 - tail)),
+        )
+
+    def estimate(self, state):
+        return Estimate(state["level"], state["low"], state["high"], len(state["answers"]))
+
+    def done(self, state):
+        answered = len(state["answers"])
+        if answered >= self.max_questions:
+            return True
+        return answered >= self.min_questions and state["high"] - state["low"] <= self.stop_width
+
+
+def create_estimator(spec: str, stop_width: float = 30, min_questions: int = 3,
+                     max_questions: int = 20) -> LevelEstimator:
+    """
+    Builds an estimator from a spec string: "irt" or "step".
+    """
+    if spec == "irt":
+        return IRTEstimator(stop_width, min_questions, max_questions)
+    if spec == "step":
+        return StepEstimator()
+    raise ValueError(f"Unknown LEVEL_ESTIMATOR: {spec}")
@@ -0,0 +1,56 @@
+import os
+
+# -----------------------------
+# LLM providers
+# -----------------------------
+# The API only needs a chat model with `ainvoke(prompt)` and
+# `astream(prompt)` whose results carry a `.content` string (the LangChain
+# chat model interface). LLM_PROVIDER picks which one:
+#   gemini - ChatGoogleGenerativeAI, needs GOOGLE_API_KEY
+#   fake   - the local FakeLLM, for load tests and development without a key
+#
+# The fake one is tuned with FAKE_LLM_LATENCY and FAKE_LLM_JITTER (seconds
+# per call, plus up to `jitter` extra), FAKE_LLM_MALFORMED_RATE (questions
+# missing their answer), FAKE_LLM_FIXABLE_RATE (questions with a slip that
+# is repaired locally, e.g. options as a list), FAKE_LLM_INVALID_JSON_RATE
+# (replies cut off mid-JSON) and FAKE_LLM_SEED.
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+
+def create_gemini():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    google_api_key = os.getenv("GOOGLE_API_KEY")
+    if not google_api_key:
+        raise ValueError("Set GOOGLE_API_KEY in .env")
+    return ChatGoogleGenerativeAI(
+        api_key=google_api_key,
+        model=GEMINI_MODEL,
+        temperature=0.7
+    )
+
+
+def create_fake():
+    from fake_llm import FakeLLM
+
+    return FakeLLM(
+        latency=float(os.getenv("FAKE_LLM_LATENCY", "0.5")),
+        jitter=float(os.getenv("FAKE_LLM_JITTER", "0")),
+        malformed_rate=float(os.getenv("FAKE_LLM_MALFORMED_RATE", "0")),
+        invalid_json_rate=float(os.getenv("FAKE_LLM_INVALID_JSON_RATE", "0")),
+        fixable_rate=float(os.getenv("FAKE_LLM_FIXABLE_RATE", "0")),
+        seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+    )
+
+
+PROVIDERS = {"gemini": create_gemini, "fake": create_fake}
+
+
+def create_llm(spec: str):
+    """
+    Builds the chat model named by `spec` ("gemini" or "fake").
+    """
+    if spec not in PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER: {spec}")
+    return PROVIDERS[spec]()
@@ -0,0 +1,128 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# -----------------------------
+# Minimal in-process metrics registry
+# -----------------------------
+# Counters, gauges and histograms rendered in the Prometheus text
+# exposition format.
+
+REGISTRY = []
+
+# Upper bounds, in seconds, from sub-millisecond local work to slow LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Upper bounds, in characters, for prompt and response sizes
+SIZE_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        yield f"{self.name} {self.value}"
+
+
+class Gauge:
+    """
+    A gauge whose value is read from a callback at scrape time.
+    """
+
+    def __init__(self, name: str, help: str, fn):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {self.fn()}"
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram. With `label`, keeps one series per label
+    value (e.g. phase="llm"); keep the set of values small and fixed.
+    """
+
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS, label: str = None):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.label = label
+        # label value -> [count per bucket (last one is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_value: str = None):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, label_value: str = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, label_value)
+
+    def count(self, label_value: str = None) -> int:
+        series = self._series.get(label_value)
+        return sum(series[0]) if series else 0
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for label_value, (counts, total) in sorted(snapshot.items(), key=lambda item: str(item[0])):
+            labels = f'{self.label}="{label_value}"' if self.label else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{{{labels + ',' if labels else ''}{le}}} {cumulative}"
+            suffix = f"{{{labels}}}" if labels else ""
+            yield f"{self.name}_sum{suffix} {total}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+def counter(name: str, help: str) -> Counter:
+    metric = Counter(name, help)
+    REGISTRY.append(metric)
+    return metric
+
+
+def gauge(name: str, help: str, fn) -> Gauge:
+    metric = Gauge(name, help, fn)
+    REGISTRY.append(metric)
+    return metric
+
+
+def histogram(name: str, help: str, buckets=LATENCY_BUCKETS, label: str = None) -> Histogram:
+    metric = Histogram(name, help, buckets, label)
+    REGISTRY.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,399 @@
+import asyncio
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# -----------------------------
+# Pre-generated question bank
+# -----------------------------
+# Questions are keyed by (skill, difficulty bucket) and reused across sessions.
+# A session only ever draws questions it has not seen. Each question is
+# retired after `max_uses` draws or `ttl_seconds`, and a background worker
+# tops every demanded bucket back up to `target_depth`.
+#
+# Skill names come straight from users, so demand is not kept forever: a
+# bucket nobody asked for in `demand_ttl_seconds` stops being refilled, and
+# at most `max_wanted` buckets are tracked (least recently asked for goes
+# first). Warm skills are always refilled.
+
+NUM_BUCKETS = 5
+
+
+def bucket_of(level: int) -> int:
+    """
+    Index (0-4) of the 20-point difficulty bucket a level falls into.
+    """
+    return min(NUM_BUCKETS - 1, max(0, int(level)) // 20)
+
+
+def bucket_level(bucket: int) -> int:
+    """
+    Representative level (the midpoint) used to generate questions for a bucket.
+    """
+    return bucket * 20 + 10
+
+
+def skill_key(skill: str) -> str:
+    return skill.strip().lower()
+
+
+def fingerprint(question_title: str) -> str:
+    """
+    Short stable id for a question, insensitive to case and whitespace.
+    """
+    normalized = " ".join(question_title.lower().split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class QuestionStore:
+    """
+    Storage interface for banked questions.
+    """
+
+    def add(self, skill: str, bucket: int, question: dict) -> bool:
+        """Stores a question. Returns False if it is already banked."""
+        raise NotImplementedError
+
+    def draw(self, skill: str, bucket: int, exclude: set) -> dict:
+        """Returns a random question whose fingerprint is not in `exclude`, or None."""
+        raise NotImplementedError
+
+    def has_unseen(self, skill: str, bucket: int, exclude: set) -> bool:
+        """Whether `draw` would find a question, without using one up."""
+        raise NotImplementedError
+
+    def depth(self, skill: str, bucket: int) -> int:
+        raise NotImplementedError
+
+    def titles(self, skill: str, bucket: int) -> list:
+        raise NotImplementedError
+
+    def evict(self):
+        """Drops expired questions and enforces the size budget."""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class MemoryQuestionStore(QuestionStore):
+    """
+    In-process store with TTL expiry, a use limit, and LRU eviction once the
+    approximate payload size exceeds `max_bytes`.
+    """
+
+    def __init__(self, ttl_seconds: float, max_uses: int, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_uses = max_uses
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        # fingerprint -> entry, least recently used first
+        self._lru = OrderedDict()
+        # (skill, bucket) -> {fingerprint: entry}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _remove(self, fp):
+        entry = self._lru.pop(fp)
+        del self._buckets[entry["key"]][fp]
+        self.nbytes -= entry["size"]
+
+    def add(self, skill, bucket, question):
+        fp = fingerprint(question["question_title"])
+        payload = json.dumps(question)
+        key = (skill_key(skill), bucket)
+        with self._lock:
+            if fp in self._lru:
+                return False
+            entry = {
+                "key": key,
+                "payload": payload,
+                "size": len(payload),
+                "created_at": time.time(),
+                "uses": 0,
+            }
+            self._lru[fp] = entry
+            self._buckets.setdefault(key, {})[fp] = entry
+            self.nbytes += entry["size"]
+            while self.nbytes > self.max_bytes and self._lru:
+                self._remove(next(iter(self._lru)))
+        return True
+
+    def draw(self, skill, bucket, exclude):
+        expires_before = time.time() - self.ttl_seconds
+        with self._lock:
+            entries = self._buckets.get((skill_key(skill), bucket))
+            if not entries:
+                return None
+            expired = [fp for fp, e in entries.items() if e["created_at"] < expires_before]
+            for fp in expired:
+                self._remove(fp)
+            candidates = [fp for fp in entries if fp not in exclude]
+            if not candidates:
+                return None
+            fp = random.choice(candidates)
+            entry = entries[fp]
+            entry["uses"] += 1
+            question = json.loads(entry["payload"])
+            if entry["uses"] >= self.max_uses:
+                self._remove(fp)
+            else:
+                self._lru.move_to_end(fp)
+            return question
+
+    def has_unseen(self, skill, bucket, exclude):
+        expires_before = time.time() - self.ttl_seconds
+        with self._lock:
+            entries = self._buckets.get((skill_key(skill), bucket), {})
+            return any(fp not in exclude and e["created_at"] >= expires_before for fp, e in entries.items())
+
+    def depth(self, skill, bucket):
+        return len(self._buckets.get((skill_key(skill), bucket), ()))
+
+    def titles(self, skill, bucket):
+        with self._lock:
+            entries = self._buckets.get((skill_key(skill), bucket), {})
+            return [json.loads(e["payload"])["question_title"] for e in entries.values()]
+
+    def evict(self):
+        expires_before = time.time() - self.ttl_seconds
+        with self._lock:
+            for fp in [fp for fp, e in self._lru.items() if e["created_at"] < expires_before]:
+                self._remove(fp)
+
+    def __len__(self):
+        return len(self._lru)
+
+
+class SQLiteQuestionStore(QuestionStore):
+    """
+    SQLite-backed store, shareable between workers on the same host.
+    The size budget is a row count; eviction removes least recently used rows.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_uses: int, max_rows: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_uses = max_uses
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS bank_questions (
+                fingerprint TEXT PRIMARY KEY,
+                skill TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                uses INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS bank_questions_key ON bank_questions (skill, bucket)"
+        )
+
+    def add(self, skill, bucket, question):
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO bank_questions "
+                "(fingerprint, skill, bucket, payload, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint(question["question_title"]), skill_key(skill), bucket,
+                 json.dumps(question), now, now),
+            )
+            added = cur.rowcount == 1
+        if added:
+            self._enforce_budget()
+        return added
+
+    def draw(self, skill, bucket, exclude):
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fingerprint, payload, uses FROM bank_questions "
+                "WHERE skill = ? AND bucket = ? AND created_at >= ?",
+                (skill_key(skill), bucket, now - self.ttl_seconds),
+            ).fetchall()
+            candidates = [row for row in rows if row[0] not in exclude]
+            if not candidates:
+                return None
+            fp, payload, uses = random.choice(candidates)
+            if uses + 1 >= self.max_uses:
+                self._conn.execute("DELETE FROM bank_questions WHERE fingerprint = ?", (fp,))
+            else:
+                self._conn.execute(
+                    "UPDATE bank_questions SET uses = uses + 1, last_used = ? WHERE fingerprint = ?",
+                    (now, fp),
+                )
+            return json.loads(payload)
+
+    def has_unseen(self, skill, bucket, exclude):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fingerprint FROM bank_questions "
+                "WHERE skill = ? AND bucket = ? AND created_at >= ?",
+                (skill_key(skill), bucket, time.time() - self.ttl_seconds),
+            ).fetchall()
+        return any(row[0] not in exclude for row in rows)
+
+    def depth(self, skill, bucket):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM bank_questions WHERE skill = ? AND bucket = ?",
+                (skill_key(skill), bucket),
+            ).fetchone()[0]
+
+    def titles(self, skill, bucket):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM bank_questions WHERE skill = ? AND bucket = ?",
+                (skill_key(skill), bucket),
+            ).fetchall()
+        return [json.loads(row[0])["question_title"] for row in rows]
+
+    def _enforce_budget(self):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM bank_questions WHERE fingerprint IN ("
+                "SELECT fingerprint FROM bank_questions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            )
+
+    def evict(self):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM bank_questions WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+        self._enforce_budget()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM bank_questions").fetchone()[0]
+
+
+class QuestionBank:
+    """
+    Front of the question store: records which (skill, bucket) pairs are in
+    demand and keeps them topped up from the LLM in the background.
+    """
+
+    def __init__(self, store: QuestionStore, target_depth: int, warm_skills=(),
+                 demand_ttl_seconds: float = 3600, max_wanted: int = 1000):
+        self.store = store
+        self.target_depth = target_depth
+        self.demand_ttl_seconds = demand_ttl_seconds
+        self.max_wanted = max_wanted
+        # skill_key -> display name for every skill that should be kept warm
+        self.skills = {}
+        self.warm = set()
+        # (skill_key, bucket) -> last time it was asked for, oldest first
+        self.wanted = OrderedDict()
+        for skill in warm_skills:
+            key = skill_key(skill)
+            self.skills[key] = skill.strip()
+            self.warm.update((key, bucket) for bucket in range(NUM_BUCKETS))
+
+    def want(self, skill: str, bucket: int):
+        key = skill_key(skill)
+        if (key, bucket) in self.warm:
+            return
+        self.skills.setdefault(key, skill.strip())
+        self.wanted[(key, bucket)] = time.monotonic()
+        self.wanted.move_to_end((key, bucket))
+        if len(self.wanted) > self.max_wanted:
+            self.forget(*self.wanted.popitem(last=False)[0])
+
+    def forget(self, key: str, bucket: int):
+        self.wanted.pop((key, bucket), None)
+        if not any((key, b) in self.wanted or (key, b) in self.warm for b in range(NUM_BUCKETS)):
+            self.skills.pop(key, None)
+
+    def expire_demand(self):
+        """
+        Stops refilling buckets nobody asked for within `demand_ttl_seconds`.
+        """
+        cutoff = time.monotonic() - self.demand_ttl_seconds
+        while self.wanted:
+            key, asked = next(iter(self.wanted.items()))
+            if asked >= cutoff:
+                break
+            self.forget(*key)
+
+    def refill_keys(self) -> list:
+        self.expire_demand()
+        return list(self.warm) + list(self.wanted)
+
+    def draw(self, skill: str, level: int, seen: set):
+        """
+        Returns an unseen banked question near `level`, or None.
+        """
+        bucket = bucket_of(level)
+        self.want(skill, bucket)
+        return self.store.draw(skill, bucket, seen)
+
+    def has_unseen(self, skill: str, level: int, seen: set) -> bool:
+        """
+        Whether `draw` would find a question near `level`, without using one up.
+        """
+        return self.store.has_unseen(skill, bucket_of(level), seen)
+
+    async def refill_once(self, generate_batch, per_bucket: int, batch_size: int):
+        """
+        Generates up to `per_bucket` questions for every under-filled bucket,
+        packing each skill's missing questions into LLM calls of `batch_size`.
+        `generate_batch(skill, levels, existing_titles)` must return a list of
+        question dicts. Returns the number of questions added.
+        """
+        self.store.evict()
+        plans = {}
+        for key, bucket in self.refill_keys():
+            skill = self.skills[key]
+            missing = min(per_bucket, self.target_depth - self.store.depth(skill, bucket))
+            if missing > 0:
+                plans.setdefault(skill, []).extend([bucket_level(bucket)] * missing)
+
+        calls = []
+        for skill, levels in plans.items():
+            existing = [
+                title for bucket in {bucket_of(level) for level in levels}
+                for title in self.store.titles(skill, bucket)
+            ]
+            for i in range(0, len(levels), batch_size):
+                calls.append((skill, generate_batch(skill, levels[i:i + batch_size], existing)))
+
+        results = await asyncio.gather(*(call for _, call in calls), return_exceptions=True)
+        added = 0
+        for (skill, _), questions in zip(calls, results):
+            if isinstance(questions, BaseException):
+                continue
+            for question in questions:
+                if self.store.add(skill, bucket_of(question["difficulty"]), question):
+                    added += 1
+        return added
+
+    async def run_refill_worker(self, generate_batch, interval: float, per_bucket: int, batch_size: int):
+        while True:
+            try:
+                await self.refill_once(generate_batch, per_bucket, batch_size)
+            except Exception as e:
+                print(f"Question bank refill failed: {e}")
+            await asyncio.sleep(interval)
+
+
+def create_store(spec: str, ttl_seconds: float, max_uses: int, max_bytes: int, max_rows: int):
+    """
+    Builds a store from a spec string: "memory", "sqlite:///path/to.db" or "off".
+    """
+    if spec == "off":
+        return None
+    if spec == "memory":
+        return MemoryQuestionStore(ttl_seconds, max_uses, max_bytes)
+    if spec.startswith("sqlite:///"):
+        return SQLiteQuestionStore(spec[len("sqlite:///"):], ttl_seconds, max_uses, max_rows)
+    raise ValueError(f"Unknown QUESTION_BANK store: {spec}")
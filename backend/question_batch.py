@@ -0,0 +1,52 @@
+import json
+
+# -----------------------------
+# Parsing a batch of generated questions
+# -----------------------------
+# A batch reply is a JSON array of question objects. Rather than parsing the
+# array as a whole (one bad item or a truncated tail would lose everything),
+# each top-level object is cut out and validated on its own.
+
+
+def iter_json_objects(text: str):
+    """
+    Yields the source text of every balanced top-level {...} object in `text`,
+    ignoring braces inside strings. An unterminated trailing object is skipped.
+    """
+    depth = 0
+    start = None
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                yield text[start:i + 1]
+
+
+def parse_question_batch(text: str, validate) -> tuple:
+    """
+    Returns (questions, dropped): every object in the reply that parses and
+    passes `validate`, and the number of objects that did not.
+    """
+    questions = []
+    dropped = 0
+    for raw in iter_json_objects(text):
+        try:
+            questions.append(validate(json.loads(raw)))
+        except (ValueError, TypeError, KeyError):
+            dropped += 1
+    return questions, dropped
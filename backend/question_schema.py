@@ -0,0 +1,261 @@
+import json
+import re
+from typing import Annotated
+
+from pydantic import BaseModel, Field, StringConstraints, ValidationError, ValidationInfo, field_validator
+
+from question_batch import iter_json_objects
+
+# -----------------------------
+# Question schema and local repair
+# -----------------------------
+# The shape every served question must have, and the cheap fixes that turn
+# a slightly-off LLM reply into one without another round trip: prose or
+# code fences around the JSON, trailing commas, a reply cut off mid-object,
+# renamed fields, options as a list or under other keys, and a
+# correct_answer given as a letter, number or the option's text. Whatever
+# is still missing afterwards is reported per field by `check`, so the
+# caller can ask the LLM for just those fields (see `repair_prompt`).
+
+OPTION_KEYS = ("opt1", "opt2", "opt3", "opt4")
+# Names LLMs tend to use instead of ours
+FIELD_ALIASES = {
+    "question": "question_title",
+    "title": "question_title",
+    "question_text": "question_title",
+    "choices": "options",
+    "answer": "correct_answer",
+    "correct_option": "correct_answer",
+}
+
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+# "B", "2", "opt 2", "Option B", "(b)", "b)" ...
+ANSWER_RE = re.compile(r"^\(?(?:opt(?:ion)?\s*)?([1-4a-d])\s*[.):]?$", re.IGNORECASE)
+
+NonEmptyStr = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+
+
+class Question(BaseModel):
+    question_id: int
+    question_title: NonEmptyStr
+    options: dict[str, NonEmptyStr]
+    correct_answer: str
+    difficulty: int = Field(ge=0, le=100)
+
+    @field_validator("options")
+    @classmethod
+    def four_options(cls, options):
+        if sorted(options) != list(OPTION_KEYS):
+            raise ValueError(f"options must have exactly the keys {', '.join(OPTION_KEYS)}")
+        return {key: options[key] for key in OPTION_KEYS}
+
+    @field_validator("correct_answer")
+    @classmethod
+    def answer_is_an_option(cls, answer, info: ValidationInfo):
+        if answer not in info.data.get("options", OPTION_KEYS):
+            raise ValueError("correct_answer does not match an option")
+        return answer
+
+
+def validate_question(question: dict) -> dict:
+    """
+    The question as a plain dict, if it matches the schema. Raises ValueError otherwise.
+    """
+    if not isinstance(question, dict):
+        raise ValueError("Question is not a JSON object")
+    return Question.model_validate(question).model_dump()
+
+
+def check(question: dict) -> tuple:
+    """
+    (validated question, {}) if it matches the schema, otherwise
+    (None, {field: what is wrong}) for every field that fails.
+    """
+    try:
+        return Question.model_validate(question).model_dump(), {}
+    except ValidationError as e:
+        found = {}
+        for error in e.errors():
+            field = error["loc"][0] if error["loc"] else "question"
+            found.setdefault(field, error["msg"])
+    # New options can change which key is right, so ask for the answer again too
+    if "options" in found:
+        found.setdefault("correct_answer", "must be the key of the correct new option")
+    return None, found
+
+
+# --- Tolerant extraction ---
+
+def close_truncated(text: str):
+    """
+    Turns a reply cut off inside its first object into valid JSON, by cutting
+    back to the last complete value and closing the open brackets. None if
+    there is no object or it is not actually truncated.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    stack = []
+    safe = None  # (end index, open brackets) after the last complete value
+    in_string = is_key = escaped = False
+    last = ""  # last structural character outside strings
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                if not is_key:
+                    safe = (i + 1, list(stack))
+            continue
+        if ch == '"':
+            in_string = True
+            is_key = stack[-1] == "{" and last in ("{", ",")
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            stack.pop()
+            if not stack:
+                return None
+            safe = (i + 1, list(stack))
+        elif ch == "," and last not in ("{", "[", ",", ":"):
+            safe = (i, list(stack))
+        if not ch.isspace():
+            last = ch
+    if safe is None:
+        return None
+    end, brackets = safe
+    return text[start:end] + "".join("}" if b == "{" else "]" for b in reversed(brackets))
+
+
+def loads_object(raw: str) -> tuple:
+    """
+    (object, names of the fixes it needed), or (None, []).
+    """
+    for candidate, fixes in ((raw, []), (TRAILING_COMMA_RE.sub(r"\1", raw), ["trailing_comma"])):
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value, fixes
+    return None, []
+
+
+def extract(text: str) -> tuple:
+    """
+    The first JSON object in an LLM reply, tolerating text around it,
+    trailing commas and a truncated tail, and the names of the fixes it
+    needed. (None, []) if nothing usable is there.
+    """
+    try:
+        # Fast path: the reply is exactly one object
+        value = json.loads(text)
+        if isinstance(value, dict):
+            return value, []
+    except ValueError:
+        pass
+    for raw in iter_json_objects(text):
+        value, fixes = loads_object(raw)
+        if value is not None:
+            return value, fixes
+    closed = close_truncated(text)
+    if not closed:
+        return None, []
+    value, fixes = loads_object(closed)
+    return value, (fixes + ["truncated"] if value is not None else [])
+
+
+# --- Local repairs ---
+
+def match_answer(answer, options: dict, renamed: dict):
+    answer = str(answer).strip()
+    if answer in renamed:
+        return renamed[answer]
+    for key, text in options.items():
+        if answer.lower() in (key.lower(), str(text).strip().lower()):
+            return key
+    match = ANSWER_RE.match(answer)
+    if match:
+        index = "1234abcd".index(match.group(1).lower()) % 4
+        return OPTION_KEYS[index]
+    return None
+
+
+def repair(question: dict, expected: dict = None) -> tuple:
+    """
+    Applies the local fixes. `expected` holds values the prompt dictated
+    (question_id, difficulty), which win over whatever the LLM wrote; that
+    is routine, not a fix. Returns (repaired copy, names of the fixes applied).
+    """
+    question = dict(question)
+    repairs = []
+    for alias, field in FIELD_ALIASES.items():
+        if field not in question and alias in question:
+            question[field] = question.pop(alias)
+            repairs.append("field_name")
+    question.update(expected or {})
+
+    options = question.get("options")
+    renamed = {}
+    if isinstance(options, list) and len(options) == len(OPTION_KEYS):
+        options = dict(zip(OPTION_KEYS, options))
+        repairs.append("options")
+    elif isinstance(options, dict) and len(options) == len(OPTION_KEYS) and sorted(options) != list(OPTION_KEYS):
+        renamed = dict(zip(options, OPTION_KEYS))
+        options = {renamed[key]: text for key, text in options.items()}
+        repairs.append("options")
+    if isinstance(options, dict):
+        question["options"] = {key: str(text) if isinstance(text, (int, float)) else text
+                               for key, text in options.items()}
+
+    answer = question.get("correct_answer")
+    if isinstance(options, dict) and answer is not None and answer not in options:
+        fixed = match_answer(answer, options, renamed)
+        if fixed is not None:
+            question["correct_answer"] = fixed
+            repairs.append("correct_answer")
+    return question, repairs
+
+
+def repaired(question: dict, expected: dict = None) -> dict:
+    """
+    Local repairs, then validation. Raises ValueError if still invalid.
+    """
+    if not isinstance(question, dict):
+        raise ValueError("Question is not a JSON object")
+    return validate_question(repair(question, expected)[0])
+
+
+# --- Targeted re-prompt ---
+
+REPAIR_PROMPT = """You are fixing a multiple choice question for an adaptive skill assessment.
+
+This question JSON is incomplete or invalid:
+{question}
+
+Problems:
+{problems}
+
+Return only valid JSON (no markdown): one object with just these fields, corrected: {fields}.
+"options" must have the keys "opt1" to "opt4", and "correct_answer" must be the key of the right option.
+"""
+
+
+def repair_prompt(question: dict, found: dict) -> str:
+    return REPAIR_PROMPT.format(
+        question=json.dumps(question, indent=2, ensure_ascii=False, default=str),
+        problems="\n".join(f"- {field}: {message}" for field, message in found.items()),
+        fields=", ".join(f'"{field}"' for field in found),
+    )
+
+
+def merge(question: dict, patch: dict, fields) -> dict:
+    """
+    `question` with `fields` taken from the re-prompt reply, where present.
+    """
+    patch = {FIELD_ALIASES.get(key, key): value for key, value in patch.items()}
+    return dict(question, **{field: patch[field] for field in fields if field in patch})
@@ -0,0 +1,81 @@
+import json
+import re
+
+# -----------------------------
+# Incremental parsing of a streamed question
+# -----------------------------
+# The LLM streams the question JSON in arbitrary chunks. The parser picks out
+# the title and each option as soon as their string values are complete, so
+# they can be pushed to the client before the whole object has arrived.
+
+JSON_STRING = r'"((?:[^"\\]|\\.)*)"'
+TITLE_RE = re.compile(r'"question_title"\s*:\s*' + JSON_STRING)
+OPTIONS_START_RE = re.compile(r'"options"\s*:\s*\{')
+OPTION_RE = re.compile(r'\s*,?\s*"((?:[^"\\]|\\.)+)"\s*:\s*' + JSON_STRING)
+
+
+def decode_json_string(raw: str) -> str:
+    return json.loads('"' + raw + '"')
+
+
+class QuestionStreamParser:
+    """
+    Feed it text chunks; each call to `feed` returns the newly completed
+    fields as ("title", text) and ("option", {"key": ..., "text": ...}) events.
+    The full text is available as `text` once the stream ends.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.title = None
+        self.options = {}
+        # Position just after the last complete option, once "options" is seen
+        self._options_pos = None
+        self._options_done = False
+
+    def feed(self, chunk: str) -> list:
+        self.text += chunk
+        events = []
+
+        if self.title is None:
+            match = TITLE_RE.search(self.text)
+            if match:
+                self.title = decode_json_string(match.group(1))
+                events.append(("title", self.title))
+
+        if self._options_pos is None:
+            match = OPTIONS_START_RE.search(self.text)
+            if match:
+                self._options_pos = match.end()
+
+        while self._options_pos is not None and not self._options_done:
+            match = OPTION_RE.match(self.text, self._options_pos)
+            if not match:
+                rest = self.text[self._options_pos:].lstrip()
+                if rest.startswith("}"):
+                    self._options_done = True
+                break
+            key = decode_json_string(match.group(1))
+            text = decode_json_string(match.group(2))
+            self.options[key] = text
+            self._options_pos = match.end()
+            events.append(("option", {"key": key, "text": text}))
+
+        return events
+
+
+def question_events(question: dict) -> list:
+    """
+    The events a parser would have produced for an already complete question.
+    """
+    events = [("title", question["question_title"])]
+    for key, text in question["options"].items():
+        events.append(("option", {"key": key, "text": text}))
+    return events
+
+
+def sse(event: str, data) -> str:
+    """
+    Formats one Server-Sent Event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
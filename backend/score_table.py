@@ -0,0 +1,164 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+# -----------------------------
+# Precomputed demand scores
+# -----------------------------
+# Every input of the demand model comes from a small finite domain, so the
+# score of every possible row can be computed once and stored in a dense
+# array indexed by (skill, years, context, is_required, tier). Scoring a row
+# is then one array lookup instead of walking every tree of the forest.
+#
+# Each categorical axis ends in an "other" slot, which stands for any value
+# not listed: the model encodes such values as all zeros, and the heuristic
+# gives them no special treatment, so they all score alike. Only years
+# outside 0..max_years are not covered and must be scored live.
+
+CATEGORICAL_AXES = ("skill_name", "context_keywords", "company_tier")
+# Stands for "any value not on this axis" while compiling
+OTHER = "\x00other"
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+class ScoreTable:
+    def __init__(self, values: np.ndarray, axes: dict, meta: dict = None):
+        # Shape: (skills + 1, max_years + 1, contexts + 1, 2, tiers + 1)
+        self.values = values
+        self.axes = axes
+        self.meta = meta or {}
+        self.max_years = values.shape[1] - 1
+        self._index = {field: {v: i for i, v in enumerate(axes[field])} for field in CATEGORICAL_AXES}
+        self._flat = values.reshape(-1)
+
+    @classmethod
+    def compile(cls, score_rows, axes: dict, max_years: int, meta: dict = None):
+        """
+        Scores every point of the grid with `score_rows(rows)` (a list of row
+        dicts in, an array of scores out) in a single call.
+        """
+        skills = list(axes["skill_name"]) + [OTHER]
+        contexts = list(axes["context_keywords"]) + [OTHER]
+        tiers = list(axes["company_tier"]) + [OTHER]
+        shape = (len(skills), max_years + 1, len(contexts), 2, len(tiers))
+        rows = [
+            {
+                "skill_name": skill,
+                "years_required": years,
+                "context_keywords": context,
+                "is_required": bool(required),
+                "company_tier": tier,
+            }
+            for skill in skills for years in range(max_years + 1) for context in contexts
+            for required in (0, 1) for tier in tiers
+        ]
+        values = np.asarray(score_rows(rows)).reshape(shape)
+        axes = {field: list(axes[field]) for field in CATEGORICAL_AXES}
+        return cls(values, axes, meta)
+
+    def save(self, path: str):
+        """
+        Writes the scores as a plain .npy (so it can be memory-mapped) and the
+        axes next to it as JSON.
+        """
+        np.save(path, self.values)
+        with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump(dict(self.meta, axes=self.axes), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        with open(os.path.splitext(path)[0] + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        values = np.load(path, mmap_mode="r" if mmap else None)
+        return cls(values, meta.pop("axes"), meta)
+
+    def lookup(self, rows):
+        """
+        Returns (scores, covered): the table score of each row (dicts or
+        objects with the training fields), and which rows the table covers.
+        Scores of uncovered rows are meaningless and must be replaced.
+        """
+        n = len(rows)
+        get = dict.get if n and isinstance(rows[0], dict) else getattr
+        years = np.fromiter((get(row, "years_required") for row in rows), dtype=np.int64, count=n)
+        covered = (years >= 0) & (years <= self.max_years)
+
+        def codes(field):
+            index = self._index[field]
+            other = len(index)
+            return np.fromiter((index.get(get(row, field), other) for row in rows), dtype=np.int64, count=n)
+
+        _, num_years, num_contexts, _, num_tiers = self.values.shape
+        flat = codes("skill_name") * num_years + np.where(covered, years, 0)
+        flat = flat * num_contexts + codes("context_keywords")
+        flat = flat * 2 + np.fromiter((bool(get(row, "is_required")) for row in rows), dtype=np.int64, count=n)
+        flat = flat * num_tiers + codes("company_tier")
+        return self._flat[flat], covered
+
+
+# -----------------------------
+# Compiling a table
+# -----------------------------
+def compile_model_table(model_path: str, columns_path: str, max_years: int) -> ScoreTable:
+    """
+    Table of the trained model's predictions. Records the model file's digest
+    so a table left over from an older model is not used by mistake.
+    """
+    from skill_scorer import SkillScorer
+
+    scorer = SkillScorer.load(model_path, columns_path)
+    axes = {field: list(scorer.one_hot[field]) for field in CATEGORICAL_AXES}
+    return ScoreTable.compile(
+        lambda rows: scorer.model.predict(scorer.encode(rows)), axes, max_years,
+        meta={"source": "model", "model_digest": file_digest(model_path)},
+    )
+
+
+def compile_heuristic_table(model_dir: str, max_years: int) -> ScoreTable:
+    """
+    Table of get_heuristic_score. Only soft skills, the listed context
+    keywords and tiers are scored specially; everything else is "other".
+    """
+    sys.path.insert(0, model_dir)
+    from apply_heuristic import CONTEXT_CODES, SOFT_SKILL_SCORES, TIER_ADJUSTMENTS, get_heuristic_scores
+
+    def score_rows(rows):
+        return get_heuristic_scores(*(
+            [row[field] for row in rows]
+            for field in ("skill_name", "years_required", "context_keywords", "is_required", "company_tier")
+        ))
+
+    axes = {
+        "skill_name": sorted(SOFT_SKILL_SCORES),
+        "context_keywords": sorted(CONTEXT_CODES),
+        "company_tier": sorted(TIER_ADJUSTMENTS),
+    }
+    return ScoreTable.compile(score_rows, axes, max_years, meta={"source": "heuristic"})
+
+
+if __name__ == "__main__":
+    model_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "skillsync-model"))
+    parser = argparse.ArgumentParser(description="Precompute demand scores for every possible job-skill row.")
+    parser.add_argument("--source", choices=["model", "heuristic"], default="model")
+    parser.add_argument("--max-years", type=int, default=20)
+    parser.add_argument("--model", default=os.path.join(model_dir, "skill_sync_model.joblib"))
+    parser.add_argument("--columns", default=os.path.join(model_dir, "model_columns.joblib"))
+    parser.add_argument("--output", default=None,
+                        help="default: score_table.npy (model) or heuristic_table.npy, next to the model")
+    args = parser.parse_args()
+
+    if args.source == "model":
+        table = compile_model_table(args.model, args.columns, args.max_years)
+    else:
+        table = compile_heuristic_table(model_dir, args.max_years)
+    output = args.output or os.path.join(model_dir, f"{'score' if args.source == 'model' else 'heuristic'}_table.npy")
+    table.save(output)
+    print(f"Saved {table.values.size:,} scores ({table.values.nbytes / 1024:.0f} KiB) to {output}")
@@ -0,0 +1,292 @@
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from history_digest import HistoryDigest
+
+# -----------------------------
+# Test sessions
+# -----------------------------
+
+# Option keys are kept as one shared tuple when the LLM uses the standard ones
+STANDARD_OPTION_KEYS = ("opt1", "opt2", "opt3", "opt4")
+
+
+@dataclass(slots=True)
+class AskedQuestion:
+    question_id: int
+    question_title: str
+    option_keys: tuple
+    option_texts: tuple
+    correct_answer: str
+    difficulty: int
+    user_answer: str = None
+
+    @classmethod
+    def from_question(cls, question: dict, user_answer: str = None) -> "AskedQuestion":
+        keys = tuple(sys.intern(k) for k in question["options"])
+        return cls(
+            question_id=question["question_id"],
+            question_title=question["question_title"],
+            option_keys=STANDARD_OPTION_KEYS if keys == STANDARD_OPTION_KEYS else keys,
+            option_texts=tuple(question["options"].values()),
+            correct_answer=sys.intern(question["correct_answer"]),
+            difficulty=question["difficulty"],
+            user_answer=sys.intern(user_answer) if user_answer else None,
+        )
+
+    @property
+    def options(self) -> dict:
+        return dict(zip(self.option_keys, self.option_texts))
+
+    def to_dict(self) -> dict:
+        return {
+            "question_id": self.question_id,
+            "question_title": self.question_title,
+            "options": self.options,
+            "correct_answer": self.correct_answer,
+            "user_answer": self.user_answer,
+            "difficulty": self.difficulty,
+        }
+
+
+@dataclass(slots=True)
+class Session:
+    user_id: str
+    skill: str
+    current_level: int
+    digest: HistoryDigest  # compact history for prompts
+    questions_asked: int = 0
+    correct_answers: int = 0
+    history: list = field(default_factory=list)  # AskedQuestion, oldest first
+    seen: set = field(default_factory=set)  # fingerprints of questions already asked
+    estimate: dict = None  # level estimator state
+
+    @property
+    def last_question(self) -> AskedQuestion:
+        return self.history[-1] if self.history else None
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "user_id": self.user_id,
+            "skill": self.skill,
+            "current_level": self.current_level,
+            "digest": self.digest.to_dict(),
+            "questions_asked": self.questions_asked,
+            "correct_answers": self.correct_answers,
+            "history": [q.to_dict() for q in self.history],
+            "seen": list(self.seen),
+            "estimate": self.estimate,
+        }, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, payload: str) -> "Session":
+        data = json.loads(payload)
+        return cls(
+            user_id=data["user_id"],
+            skill=data["skill"],
+            current_level=data["current_level"],
+            digest=HistoryDigest.from_dict(data["digest"]),
+            questions_asked=data["questions_asked"],
+            correct_answers=data["correct_answers"],
+            history=[AskedQuestion.from_question(q, q["user_answer"]) for q in data["history"]],
+            seen=set(data["seen"]),
+            estimate=data.get("estimate"),
+        )
+
+
+# -----------------------------
+# Session stores
+# -----------------------------
+
+class SessionStore:
+    """
+    Storage interface for active sessions. Sessions idle for longer than the
+    TTL expire; callers must `put` a session back after changing it.
+    """
+
+    def get(self, user_id: str) -> Session:
+        raise NotImplementedError
+
+    def put(self, session: Session):
+        raise NotImplementedError
+
+    def pop(self, user_id: str) -> Session:
+        raise NotImplementedError
+
+    def __contains__(self, user_id: str) -> bool:
+        """Whether an unexpired session is stored, without touching it."""
+        raise NotImplementedError
+
+    def evict_expired(self) -> int:
+        """Removes expired sessions. Returns how many were removed."""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Process-local store with idle TTL and a cap on the number of sessions
+    (least recently used is evicted first). `on_evict(user_id)` is called
+    for sessions dropped by expiry or the size cap.
+    """
+
+    def __init__(self, ttl_seconds: float, max_sessions: int, on_evict=None):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.on_evict = on_evict
+        # user_id -> (session, expires_at), least recently used first
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evicted(self, user_id):
+        if self.on_evict:
+            self.on_evict(user_id)
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._sessions.get(user_id)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._sessions[user_id]
+                expired = True
+            else:
+                self._sessions.move_to_end(user_id)
+                return entry[0]
+        if expired:
+            self._evicted(user_id)
+        return None
+
+    def put(self, session):
+        evicted = []
+        with self._lock:
+            self._sessions[session.user_id] = (session, time.monotonic() + self.ttl_seconds)
+            self._sessions.move_to_end(session.user_id)
+            while len(self._sessions) > self.max_sessions:
+                evicted.append(self._sessions.popitem(last=False)[0])
+        for user_id in evicted:
+            self._evicted(user_id)
+
+    def pop(self, user_id):
+        with self._lock:
+            entry = self._sessions.pop(user_id, None)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def __contains__(self, user_id):
+        with self._lock:
+            entry = self._sessions.get(user_id)
+        return entry is not None and entry[1] >= time.monotonic()
+
+    def evict_expired(self):
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            # Entries are ordered by last use, so expired ones are at the front
+            while self._sessions:
+                user_id, (_, expires_at) = next(iter(self._sessions.items()))
+                if expires_at >= now:
+                    break
+                del self._sessions[user_id]
+                expired.append(user_id)
+        for user_id in expired:
+            self._evicted(user_id)
+        return len(expired)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite store in WAL mode, so several uvicorn workers on one host can
+    serve the same test. The size cap drops the least recently used sessions.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_sessions: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                user_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expires_at)")
+
+    def get(self, user_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM sessions WHERE user_id = ? AND expires_at >= ?",
+                (user_id, time.time()),
+            ).fetchone()
+        return Session.from_json(row[0]) if row else None
+
+    def put(self, session):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (user_id, payload, expires_at) VALUES (?, ?, ?)",
+                (session.user_id, session.to_json(), time.time() + self.ttl_seconds),
+            )
+
+    def pop(self, user_id):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT payload FROM sessions WHERE user_id = ? AND expires_at >= ?",
+                    (user_id, time.time()),
+                ).fetchone()
+                self._conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Session.from_json(row[0]) if row else None
+
+    def __contains__(self, user_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM sessions WHERE user_id = ? AND expires_at >= ?",
+                (user_id, time.time()),
+            ).fetchone() is not None
+
+    def evict_expired(self):
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM sessions WHERE expires_at < ?", (time.time(),)
+            ).rowcount
+            removed += self._conn.execute(
+                "DELETE FROM sessions WHERE user_id IN ("
+                "SELECT user_id FROM sessions ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            ).rowcount
+        return removed
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_store(spec: str, ttl_seconds: float, max_sessions: int, on_evict=None) -> SessionStore:
+    """
+    Builds a store from a spec string: "memory" or "sqlite:///path/to.db".
+    """
+    if spec == "memory":
+        return MemorySessionStore(ttl_seconds, max_sessions, on_evict)
+    if spec.startswith("sqlite:///"):
+        return SQLiteSessionStore(spec[len("sqlite:///"):], ttl_seconds, max_sessions)
+    raise ValueError(f"Unknown SESSION_STORE: {spec}")
@@ -0,0 +1,44 @@
+import asyncio
+import itertools
+
+# -----------------------------
+# Request coalescing ("singleflight")
+# -----------------------------
+# Concurrent callers asking for the same key share in-flight work instead of
+# each starting their own. Up to `variants` calls run per key; once that many
+# are in flight, further callers join them round-robin.
+
+
+class SingleFlight:
+    def __init__(self, variants: int = 1):
+        self.variants = max(1, variants)
+        # key -> list of in-flight tasks
+        self._flights = {}
+        self._turn = itertools.count()
+
+    async def do(self, key, fn):
+        """
+        Returns (result, joined): the result of `fn()`, or of an identical
+        call already in flight for `key`, and whether the caller joined an
+        existing call. A caller that is cancelled does not cancel the shared
+        call for the others.
+        """
+        flights = self._flights.setdefault(key, [])
+        joined = len(flights) >= self.variants
+        if joined:
+            task = flights[next(self._turn) % len(flights)]
+        else:
+            task = asyncio.ensure_future(fn())
+            flights.append(task)
+            task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task), joined
+
+    def _finished(self, key, task):
+        flights = self._flights.get(key)
+        if flights is not None:
+            flights.remove(task)
+            if not flights:
+                del self._flights[key]
+        # Retrieve the outcome so a failure nobody awaited is not logged as unhandled
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,204 @@
+import numpy as np
+from scipy import sparse
+
+# -----------------------------
+# Skill-gap matching
+# -----------------------------
+# Job demand and user supply live on the same 0-1000 scale
+# (job_skill_demand.demand_score and user_skill_supply.supply_score in
+# schema.md). Both are kept as sparse matrices over one skill vocabulary:
+# jobs x skills and users x skills.
+#
+# For a user with supply vector s and a job with demand row d:
+#   gap_k = max(0, d_k - s_k)      for every skill k the job asks for
+#   fit   = 1 - sum(gap) / sum(d)  (1.0 = every demanded skill covered)
+# Scoring one user against every job is a single pass over the demand
+# matrix's nonzeros (gather s, subtract, clip, sum per row): about 0.1 s
+# for a million jobs of ~5 skills (benchmarks/bench_skill_gap.py). Top-k
+# uses argpartition rather than sorting every job.
+#
+# Supply updates are staged per user and folded into the matrix in bulk;
+# they only invalidate that user's cached results, since demand is fixed.
+
+# Staged supply updates before they are folded into the supply matrix
+COMPACT_EVERY = 10_000
+
+
+def dedupe_max(rows, cols, scores, num_cols):
+    """
+    Keeps the highest score of every duplicate (row, col) pair.
+    """
+    key = rows.astype(np.int64) * num_cols + cols
+    order = np.lexsort((scores, key))
+    key = key[order]
+    last = np.ones(len(key), dtype=bool)
+    last[:-1] = key[1:] != key[:-1]
+    return rows[order][last], cols[order][last], scores[order][last]
+
+
+def triples_to_csr(row_keys, skill_names, scores, skill_index: dict):
+    """
+    (sorted row ids, csr matrix) from (row key, skill, score) triples.
+    Skills missing from `skill_index` are dropped (their rows are kept).
+    """
+    row_keys = np.asarray(row_keys)
+    scores = np.asarray(scores, dtype=np.float32)
+    cols = np.fromiter((skill_index.get(skill, -1) for skill in skill_names), dtype=np.int64, count=len(scores))
+    known = cols >= 0
+    ids, rows = np.unique(row_keys, return_inverse=True)
+    rows, cols, scores = dedupe_max(rows[known], cols[known], scores[known], len(skill_index))
+    matrix = sparse.csr_matrix((scores, (rows, cols)), shape=(len(ids), len(skill_index)), dtype=np.float32)
+    return ids, matrix
+
+
+class GapEngine:
+    def __init__(self, demand: sparse.csr_matrix, job_ids, skills):
+        self.demand = sparse.csr_matrix(demand, dtype=np.float32)
+        self.demand.eliminate_zeros()
+        self.demand.sort_indices()
+        self.job_ids = np.asarray(job_ids)
+        self.skills = np.asarray(skills, dtype=object)
+        self.skill_index = {skill: i for i, skill in enumerate(self.skills)}
+        self.demand_totals = np.asarray(self.demand.sum(axis=1)).ravel()
+        # Jobs demanding each skill, for the market-wide gap vector
+        self.demand_counts = np.bincount(self.demand.indices, minlength=len(self.skills))
+        # Row starts of jobs with any demand; reduceat can't handle empty rows
+        self._demanded = np.flatnonzero(np.diff(self.demand.indptr))
+        self._row_starts = self.demand.indptr[:-1][self._demanded]
+        self._job_row = None
+
+        self.supply = sparse.csr_matrix((0, len(self.skills)), dtype=np.float32)
+        self.user_ids = []
+        self.user_index = {}
+        self._staged = {}  # user row -> dense supply vector
+        self._top = {}  # user_id -> (k, job rows, fits)
+
+    @classmethod
+    def from_demand(cls, job_keys, skill_names, scores, skills=None):
+        """
+        Builds the engine from job_skill_demand rows. The skill vocabulary is
+        `skills`, or every skill in the rows; duplicate (job, skill) pairs
+        keep the highest score.
+        """
+        skills = sorted(set(skill_names if skills is None else skills))
+        job_ids, demand = triples_to_csr(job_keys, skill_names, scores, {skill: i for i, skill in enumerate(skills)})
+        return cls(demand, job_ids, skills)
+
+    # --- Supply ---
+
+    def load_supply(self, user_keys, skill_names, scores):
+        """
+        Replaces all supply with user_skill_supply rows.
+        """
+        user_ids, self.supply = triples_to_csr(user_keys, skill_names, scores, self.skill_index)
+        self.user_ids = user_ids.tolist()
+        self.user_index = {user_id: row for row, user_id in enumerate(self.user_ids)}
+        self._staged.clear()
+        self._top.clear()
+
+    def update_user(self, user_id, supply: dict):
+        """
+        Replaces one user's supply ({skill: score}); adds the user if new.
+        Only this user's cached results are invalidated.
+        """
+        row = self.user_index.get(user_id)
+        if row is None:
+            row = self.user_index[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+        vector = np.zeros(len(self.skills), dtype=np.float32)
+        for skill, score in supply.items():
+            col = self.skill_index.get(skill)
+            if col is not None:
+                vector[col] = score
+        self._staged[row] = vector
+        self._top.pop(user_id, None)
+        if len(self._staged) >= COMPACT_EVERY:
+            self.compact()
+
+    def compact(self):
+        """
+        Folds the staged updates into the supply matrix.
+        """
+        if not self._staged:
+            return
+        coo = self.supply.tocoo()
+        staged_rows = np.fromiter(self._staged, dtype=np.int64, count=len(self._staged))
+        keep = ~np.isin(coo.row, staged_rows)
+        staged = np.vstack(list(self._staged.values()))
+        new_rows, new_cols = np.nonzero(staged)
+        rows = np.concatenate([coo.row[keep], staged_rows[new_rows]])
+        cols = np.concatenate([coo.col[keep], new_cols])
+        data = np.concatenate([coo.data[keep], staged[new_rows, new_cols]])
+        self.supply = sparse.csr_matrix((data, (rows, cols)), shape=(len(self.user_ids), len(self.skills)),
+                                        dtype=np.float32)
+        self._staged.clear()
+
+    def supply_vector(self, user_id) -> np.ndarray:
+        row = self.user_index[user_id]
+        if row in self._staged:
+            return self._staged[row]
+        vector = np.zeros(len(self.skills), dtype=np.float32)
+        if row < self.supply.shape[0]:
+            start, end = self.supply.indptr[row], self.supply.indptr[row + 1]
+            vector[self.supply.indices[start:end]] = self.supply.data[start:end]
+        return vector
+
+    # --- Matching ---
+
+    def shortfalls(self, supply: np.ndarray) -> np.ndarray:
+        """
+        max(0, demand - supply) for every nonzero of the demand matrix.
+        """
+        short = self.demand.data - supply[self.demand.indices]
+        np.maximum(short, 0, out=short)
+        return short
+
+    def fit_scores(self, user_id) -> np.ndarray:
+        """
+        Fit (0-1) of the user against every job, in job_ids order. Jobs
+        that demand none of the known skills get 0, so they never rank.
+        """
+        short = self.shortfalls(self.supply_vector(user_id))
+        fits = np.zeros(len(self.job_ids), dtype=np.float32)
+        if len(self._demanded):
+            gaps = np.add.reduceat(short, self._row_starts)
+            fits[self._demanded] = 1.0 - gaps / self.demand_totals[self._demanded]
+        return fits
+
+    def top_jobs(self, user_id, k: int = 10) -> list:
+        """
+        The user's k best-fitting jobs as [(job_id, fit)], best first.
+        """
+        cached = self._top.get(user_id)
+        if cached is None or cached[0] < k:
+            fits = self.fit_scores(user_id)
+            count = min(k, len(fits))
+            if count == 0:
+                return []
+            best = np.argpartition(-fits, count - 1)[:count]
+            best = best[np.argsort(-fits[best], kind="stable")]
+            cached = self._top[user_id] = (k, best, fits[best])
+        _, rows, fits = cached
+        return [(self.job_ids[row].item(), float(fit)) for row, fit in zip(rows[:k], fits[:k])]
+
+    def gap_vector(self, user_id) -> dict:
+        """
+        The user's average shortfall per skill over all jobs that demand it;
+        skills with no gap are left out.
+        """
+        short = self.shortfalls(self.supply_vector(user_id))
+        totals = np.bincount(self.demand.indices, weights=short, minlength=len(self.skills))
+        means = np.divide(totals, self.demand_counts, out=np.zeros_like(totals), where=self.demand_counts > 0)
+        return {self.skills[col]: float(means[col]) for col in np.flatnonzero(means)}
+
+    def job_gap(self, user_id, job_id) -> dict:
+        """
+        {skill: shortfall} for one job; skills the user fully covers are left out.
+        """
+        if self._job_row is None:
+            self._job_row = {job.item() if hasattr(job, "item") else job: row for row, job in enumerate(self.job_ids)}
+        row = self._job_row[job_id]
+        start, end = self.demand.indptr[row], self.demand.indptr[row + 1]
+        cols = self.demand.indices[start:end]
+        short = np.maximum(self.demand.data[start:end] - self.supply_vector(user_id)[cols], 0)
+        return {self.skills[col]: float(gap) for col, gap in zip(cols, short) if gap > 0}
@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+
+from skill_gap import triples_to_csr
+
+# -----------------------------
+# Inverted skill index
+# -----------------------------
+# For every skill, a posting list of (job row, demand_score) sorted by
+# score, all lists back to back in two flat arrays (CSR style, like the
+# demand matrix in skill_gap.py but transposed). Because each list is
+# sorted, the jobs whose demand for a skill is within a user's supply are
+# a prefix of that list, found by binary search: a query only reads the
+# postings it returns and stops at the first one above the user's score.
+#
+# Counting, per job, how many of those prefixes it appears in (ScanCount
+# over the prefixes) answers both "every skill the job asks for is
+# covered" (count == the job's skill count) and "at most one skill short"
+# (count >= skill count - 1), without looking at any job the user shares
+# no covered skill with.
+#
+# The index is a main segment, saved as plain .npy files that load
+# memory-mapped (startup reads no postings, only per-job offsets), plus a small
+# in-memory segment for jobs added since. merge() folds the two together.
+# A job added again replaces its earlier version.
+
+# Jobs added before the in-memory segment is merged into the main one
+MERGE_EVERY = 50_000
+SEGMENT_ARRAYS = ("offsets", "post_rows", "post_scores", "job_offsets", "job_skills", "job_scores", "job_ids")
+
+
+class Segment:
+    """
+    One immutable block of jobs: postings per skill, sorted by score, and
+    each job's own (skill, score) list. `alive` marks jobs not replaced since.
+    """
+
+    def __init__(self, arrays: dict):
+        self.offsets = arrays["offsets"]          # int64, start of each skill's postings
+        self.post_rows = arrays["post_rows"]      # int32, job row per posting
+        self.post_scores = arrays["post_scores"]  # float32, demand per posting
+        self.job_offsets = arrays["job_offsets"]  # int64, start of each job's skills
+        self.job_skills = arrays["job_skills"]    # int32, skill per job entry
+        self.job_scores = arrays["job_scores"]    # float32, demand per job entry
+        self.job_ids = arrays["job_ids"]
+        self.skill_count = np.diff(self.job_offsets)
+        self.alive = np.ones(len(self.job_ids), dtype=bool)
+
+    @classmethod
+    def from_matrix(cls, job_ids, demand: sparse.csr_matrix):
+        """
+        From a jobs x skills demand matrix. Zero demand counts as not demanded.
+        """
+        demand = sparse.csr_matrix(demand, dtype=np.float32)
+        demand.eliminate_zeros()
+        demand.sort_indices()
+        by_skill = demand.tocsc()
+        skills = np.repeat(np.arange(demand.shape[1]), np.diff(by_skill.indptr))
+        order = np.lexsort((by_skill.data, skills))
+        return cls({
+            "offsets": by_skill.indptr.astype(np.int64),
+            "post_rows": by_skill.indices[order].astype(np.int32),
+            "post_scores": by_skill.data[order],
+            "job_offsets": demand.indptr.astype(np.int64),
+            "job_skills": demand.indices.astype(np.int32),
+            "job_scores": demand.data,
+            "job_ids": np.asarray(job_ids),
+        })
+
+    def matrix(self, num_skills: int) -> sparse.csr_matrix:
+        return sparse.csr_matrix((self.job_scores, self.job_skills, self.job_offsets),
+                                 shape=(len(self.job_ids), num_skills))
+
+    def hits(self, supply: list) -> np.ndarray:
+        """
+        Job rows of every posting within the user's supply, one per covered
+        (job, skill) pair. `supply` is [(skill column, score)].
+        """
+        found = []
+        for col, score in supply:
+            if col + 1 >= len(self.offsets):
+                continue  # a skill added to the vocabulary after this segment was built
+            start, end = self.offsets[col], self.offsets[col + 1]
+            count = np.searchsorted(self.post_scores[start:end], score, side="right")
+            if count:
+                found.append(self.post_rows[start:start + count])
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int32)
+
+    def matches(self, supply: list, max_missing: int) -> tuple:
+        """
+        (job rows, skills missing per row) of live jobs at most `max_missing`
+        skills short of the supply, among jobs sharing a covered skill with it.
+        """
+        hits = self.hits(supply)
+        if len(hits) * 8 > len(self.job_ids):
+            # Dense enough that one pass over all jobs beats sorting the hits
+            counts = np.bincount(hits, minlength=len(self.job_ids))
+            rows = np.flatnonzero(counts)
+            counts = counts[rows]
+        else:
+            rows, counts = np.unique(hits, return_counts=True)
+        missing = self.skill_count[rows] - counts
+        keep = (missing <= max_missing) & self.alive[rows]
+        return rows[keep], missing[keep]
+
+    def missing_skills(self, rows: np.ndarray, missing: np.ndarray, supply_vector: np.ndarray) -> list:
+        """
+        For each row, the skill columns it demands more of than the supply
+        (`missing` of them, as returned by matches).
+        """
+        starts = self.job_offsets[rows]
+        lengths = self.job_offsets[rows + 1] - starts
+        # Positions of all the rows' entries, row after row
+        pos = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - starts, lengths)
+        skills = self.job_skills[pos]
+        cols = skills[self.job_scores[pos] > supply_vector[skills]].tolist()
+        ends = np.cumsum(missing).tolist()
+        return [cols[end - count:end] for end, count in zip(ends, missing.tolist())]
+
+
+class SkillIndex:
+    def __init__(self, skills, main: Segment):
+        self.skills = list(skills)
+        self.skill_index = {skill: i for i, skill in enumerate(self.skills)}
+        self.main = main
+        self._staged = {}  # job id -> ([skill names], [scores]), not yet in a segment
+        self._delta = None
+        self._main_row = None  # job id -> row in main, built on first add
+
+    @classmethod
+    def from_demand(cls, job_keys, skill_names, scores, skills=None):
+        """
+        Builds the index from job_skill_demand rows. The skill vocabulary is
+        `skills` plus every skill in the rows, so no demand is dropped;
+        duplicate (job, skill) pairs keep the highest score.
+        """
+        skills = sorted(set(skill_names).union(() if skills is None else skills))
+        job_ids, demand = triples_to_csr(job_keys, skill_names, scores, {skill: i for i, skill in enumerate(skills)})
+        return cls(skills, Segment.from_matrix(job_ids, demand))
+
+    # --- Storage ---
+
+    def save(self, path: str):
+        """
+        Merges, then writes one uncompressed .npy per array plus meta.json into `path`.
+        """
+        self.merge()
+        os.makedirs(path, exist_ok=True)
+        for name in SEGMENT_ARRAYS:
+            np.save(os.path.join(path, name + ".npy"), getattr(self.main, name))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"skills": self.skills, "jobs": len(self.main.job_ids)}, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None)
+            for name in SEGMENT_ARRAYS
+        }
+        return cls(meta["skills"], Segment(arrays))
+
+    # --- Incremental adds ---
+
+    def add_jobs(self, job_keys, skill_names, scores):
+        """
+        Adds job_skill_demand rows of new (or re-scraped) jobs. Skills outside
+        the index's vocabulary are appended to it; the main segment has no
+        postings for them until the next merge. A job id seen before replaces
+        the earlier version, so a job's rows must all come in one call.
+        """
+        for skill in skill_names:
+            if skill not in self.skill_index:
+                self.skill_index[skill] = len(self.skills)
+                self.skills.append(skill)
+        jobs = {}
+        for job_id, skill, score in zip(job_keys, skill_names, scores):
+            names, values = jobs.setdefault(job_id, ([], []))
+            names.append(skill)
+            values.append(score)
+        if self._main_row is None:
+            self._main_row = {job_id: row for row, job_id in enumerate(self.main.job_ids.tolist())}
+        for job_id in jobs:
+            row = self._main_row.get(job_id)
+            if row is not None:
+                self.main.alive[row] = False
+        self._staged.update(jobs)
+        self._delta = None
+        if len(self._staged) >= MERGE_EVERY:
+            self.merge()
+
+    def delta(self):
+        """
+        The segment of staged jobs, built on demand; None if nothing is staged.
+        """
+        if self._delta is None and self._staged:
+            keys = [job_id for job_id, (names, _) in self._staged.items() for _ in names]
+            names = [name for names, _ in self._staged.values() for name in names]
+            scores = [score for _, values in self._staged.values() for score in values]
+            job_ids, demand = triples_to_csr(keys, names, scores, self.skill_index)
+            self._delta = Segment.from_matrix(job_ids, demand)
+        return self._delta
+
+    def segments(self) -> list:
+        delta = self.delta()
+        return [self.main] if delta is None else [self.main, delta]
+
+    def merge(self):
+        """
+        Folds the staged jobs into the main segment, dropping replaced jobs.
+        """
+        delta = self.delta()
+        if delta is None and self.main.alive.all():
+            return
+        live = np.flatnonzero(self.main.alive)
+        parts = [(self.main.job_ids[live], self.main.matrix(len(self.skills))[live])]
+        if delta is not None:
+            parts.append((delta.job_ids, delta.matrix(len(self.skills))))
+        self.main = Segment.from_matrix(np.concatenate([ids for ids, _ in parts]),
+                                        sparse.vstack([matrix for _, matrix in parts], format="csr"))
+        self._staged = {}
+        self._delta = None
+        self._main_row = None
+
+    # --- Queries ---
+
+    def matches(self, supply: dict, max_missing: int = 0) -> list:
+        """
+        Jobs where at most `max_missing` demanded skills exceed the user's
+        supply ({skill: score}), as [(job_id, [missing skills])], fewest
+        missing first. Jobs sharing no covered skill with the user are not
+        considered, so a job asking only for skills the user lacks is never
+        "one skill short".
+        """
+        supply_vector = np.zeros(len(self.skills), dtype=np.float32)
+        for skill, score in supply.items():
+            if skill in self.skill_index:
+                supply_vector[self.skill_index[skill]] = score
+        # Scores as float32, so postings and missing_skills compare alike
+        known = [(col, supply_vector[col]) for col in np.flatnonzero(supply_vector > 0).tolist()]
+        results = []
+        for segment in self.segments():
+            rows, missing = segment.matches(known, max_missing)
+            order = np.argsort(missing, kind="stable")
+            rows, missing = rows[order], missing[order]
+            ready = np.searchsorted(missing, 1)
+            ids = segment.job_ids[rows].tolist()
+            results.extend((job_id, []) for job_id in ids[:ready])
+            short = segment.missing_skills(rows[ready:], missing[ready:], supply_vector)
+            results.extend((job_id, [self.skills[col] for col in cols]) for job_id, cols in zip(ids[ready:], short))
+        return sorted(results, key=lambda match: len(match[1]))
+
+    def ready_jobs(self, supply: dict) -> list:
+        """
+        Ids of jobs whose every demanded skill is within the user's supply.
+        """
+        return [job_id for job_id, _ in self.matches(supply, max_missing=0)]
+
+    def almost_ready(self, supply: dict) -> list:
+        """
+        [(job_id, missing skill)] for jobs exactly one skill short.
+        """
+        return [(job_id, missing[0]) for job_id, missing in self.matches(supply, max_missing=1) if missing]
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Build the inverted skill index from job_skill_demand rows.")
+    parser.add_argument("demand_csv", help="CSV with job_id, skill_name and demand_score columns")
+    parser.add_argument("--output", default="skill_index")
+    args = parser.parse_args()
+
+    demand = pd.read_csv(args.demand_csv, usecols=["job_id", "skill_name", "demand_score"])
+    index = SkillIndex.from_demand(demand["job_id"].to_numpy(), demand["skill_name"].to_numpy(),
+                                   demand["demand_score"].to_numpy())
+    index.save(args.output)
+    print(f"Indexed {len(index.main.job_ids):,} jobs, {len(index.main.post_rows):,} postings "
+          f"over {len(index.skills)} skills into {args.output}")
@@ -0,0 +1,82 @@
+import numpy as np
+
+# -----------------------------
+# Demand scoring with the trained model ("Model 2")
+# -----------------------------
+# train_model.py one-hot encodes rows with pd.get_dummies and saves the
+# resulting column order next to the model. Doing the same per request is
+# far too slow, so the category -> column index is computed once at load time
+# and rows are written straight into a preallocated matrix.
+
+CATEGORICAL_FIELDS = ("skill_name", "context_keywords", "company_tier")
+
+
+class SkillScorer:
+    def __init__(self, model, columns):
+        self.model = model
+        self.columns = list(columns)
+        # Optional ScoreTable of this model's predictions (see score_table.py)
+        self.table = None
+        self.years_col = self.columns.index("years_required")
+        self.required_col = self.columns.index("is_required")
+        # field -> {category: column}; categories get_dummies never saw
+        # (e.g. "None", which read_csv turned into NaN) encode as all zeros
+        self.one_hot = {field: {} for field in CATEGORICAL_FIELDS}
+        for col, name in enumerate(self.columns):
+            for field in CATEGORICAL_FIELDS:
+                if name.startswith(field + "_"):
+                    self.one_hot[field][name[len(field) + 1:]] = col
+
+        # The model was fitted on a DataFrame; we pass the same columns as
+        # a plain array, so skip sklearn's per-call feature-name check
+        names = getattr(model, "feature_names_in_", None)
+        if names is not None:
+            if list(names) != self.columns:
+                raise ValueError("Model columns do not match model_columns.joblib")
+            del model.feature_names_in_
+
+    @classmethod
+    def load(cls, model_path, columns_path):
+        import joblib
+
+        return cls(joblib.load(model_path), joblib.load(columns_path))
+
+    def encode(self, rows) -> np.ndarray:
+        """
+        Encodes rows (dicts or objects with the training fields) into the
+        model's feature matrix. float32 is what the trees compare against.
+        """
+        n = len(rows)
+        X = np.zeros((n, len(self.columns)), dtype=np.float32)
+        if not n:
+            return X
+        if isinstance(rows[0], dict):
+            get = dict.get
+        else:
+            get = getattr
+
+        X[:, self.years_col] = [get(row, "years_required") for row in rows]
+        X[:, self.required_col] = [bool(get(row, "is_required")) for row in rows]
+        index = np.arange(n)
+        for field, columns in self.one_hot.items():
+            cols = np.fromiter((columns.get(get(row, field), -1) for row in rows), dtype=np.int64, count=n)
+            known = cols >= 0
+            X[index[known], cols[known]] = 1.0
+        return X
+
+    def score(self, rows) -> np.ndarray:
+        """
+        Predicted demand scores for a batch of rows. Rows the table covers
+        are looked up; the rest are predicted together in one call.
+        """
+        if not len(rows):
+            return np.zeros(0)
+        if self.table is None:
+            return self.model.predict(self.encode(rows))
+
+        scores, covered = self.table.lookup(rows)
+        if not covered.all():
+            missing = np.flatnonzero(~covered)
+            scores[missing] = self.model.predict(self.encode([rows[i] for i in missing]))
+        return scores
+
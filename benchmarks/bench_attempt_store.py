@@ -0,0 +1,156 @@
+"""
+Saving completed attempts: per-row inserts vs. batched transactions.
+
+Every strategy writes the same synthetic attempts (--answers answers each)
+into a fresh SQLite database in WAL mode:
+
+  per row      every INSERT/upsert is its own transaction (autocommit),
+               like a synchronous write per answer on the request path
+  per attempt  one transaction per attempt (AttemptDB.write([attempt]))
+  batch of N   one transaction per N attempts, as the write-behind queue does
+
+Then --candidates concurrent end_test calls go through AttemptWriter, to
+show what the request path pays (the time to queue an attempt) and how a
+small queue pushes back. On a disk where each commit is expensive the gap
+between per-row and batched writes is much wider than on tmpfs.
+
+Usage: python benchmarks/bench_attempt_store.py [--attempts 5000] [--answers 10]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from attempt_store import INSERT_ANSWER, UPSERT_SUPPLY, SCHEMA, Attempt, AttemptDB, AttemptWriter
+
+SKILLS = ["Python", "SQL", "React", "Docker", "AWS"]
+
+
+def make_attempts(count, answers, seed=7):
+    rng = random.Random(seed)
+    attempts = []
+    for i in range(count):
+        rows = [
+            (q, f"Question {q} of attempt {i}: which option is correct?", rng.choice(["opt1", "opt2", "opt3", "opt4"]),
+             rng.random() < 0.6, rng.randint(0, 100))
+            for q in range(1, answers + 1)
+        ]
+        grade = sum(row[3] for row in rows) / answers * 100
+        attempts.append(Attempt(f"user-{rng.randrange(count // 2)}", rng.choice(SKILLS), time.time() + i, grade,
+                                rng.randint(0, 1000), rows))
+    return attempts
+
+
+def per_row(path, attempts):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    for a in attempts:
+        attempt_id = conn.execute(
+            "INSERT INTO user_assessment_attempts "
+            "(user_id, skill, completed_at, final_grade_percentage, calculated_score) VALUES (?, ?, ?, ?, ?)",
+            (a.user_id, a.skill, a.completed_at, a.final_grade_percentage, a.calculated_score),
+        ).lastrowid
+        for answer in a.answers:
+            conn.execute(INSERT_ANSWER, (attempt_id, *answer))
+        conn.execute(UPSERT_SUPPLY, (a.user_id, a.skill, a.calculated_score, a.completed_at))
+    conn.close()
+
+
+def batched(path, attempts, size):
+    db = AttemptDB(path)
+    for i in range(0, len(attempts), size):
+        db.write(attempts[i:i + size])
+    db.close()
+
+
+def check(path, attempts, answers):
+    conn = sqlite3.connect(path)
+    counts = [conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ("user_assessment_attempts", "user_answers")]
+    latest = {}
+    for a in attempts:
+        latest[(a.user_id, a.skill)] = a.calculated_score
+    supply = dict(((user, skill), score) for user, skill, score in
+                  conn.execute("SELECT user_id, skill, supply_score FROM user_skill_supply"))
+    conn.close()
+    if counts != [len(attempts), len(attempts) * answers] or supply != latest:
+        raise SystemExit(f"❌ Wrong rows in {path}: {counts}")
+
+
+async def through_writer(path, attempts, concurrency, max_queued, flush_seconds):
+    """
+    (submit latencies in ms, seconds until everything is on disk)
+    """
+    writer = AttemptWriter(AttemptDB(path), batch_size=500, flush_seconds=flush_seconds,
+                           max_queued=max_queued, submit_timeout=60)
+    latencies = []
+    pending = iter(attempts)
+
+    async def candidate():
+        for attempt in pending:
+            start = time.perf_counter()
+            await writer.submit(attempt)
+            latencies.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(candidate() for _ in range(concurrency)))
+    await writer.close()
+    return latencies, time.perf_counter() - start
+
+
+def main(args):
+    attempts = make_attempts(args.attempts, args.answers)
+    root = tempfile.mkdtemp(prefix="attempts_")
+    try:
+        strategies = [
+            ("per row", lambda path: per_row(path, attempts)),
+            ("per attempt", lambda path: batched(path, attempts, 1)),
+        ]
+        for size in (10, 100, 1000):
+            strategies.append((f"batch of {size}", lambda path, size=size: batched(path, attempts, size)))
+
+        print(f"{args.attempts:,} attempts x {args.answers} answers, SQLite WAL, synchronous=NORMAL")
+        print(f"  {'strategy':<14} {'seconds':>8} {'attempts/s':>11} {'rows/s':>10}")
+        rows = args.attempts * (args.answers + 2)
+        baseline = None
+        for name, write in strategies:
+            path = os.path.join(root, name.replace(" ", "_") + ".db")
+            start = time.perf_counter()
+            write(path)
+            seconds = time.perf_counter() - start
+            check(path, attempts, args.answers)
+            baseline = baseline or seconds
+            print(f"  {name:<14} {seconds:>8.2f} {args.attempts / seconds:>11,.0f} {rows / seconds:>10,.0f}"
+                  f"   {baseline / seconds:>5.1f}x")
+        print("✅ Every strategy wrote the same rows and final supply scores")
+
+        print(f"\n{args.candidates} concurrent end_test calls through AttemptWriter:")
+        for max_queued in (10_000, 100):
+            path = os.path.join(root, f"writer_{max_queued}.db")
+            latencies, seconds = asyncio.run(through_writer(path, attempts, args.candidates, max_queued, 0.05))
+            check(path, attempts, args.answers)
+            latencies.sort()
+            print(f"  queue of {max_queued:>6,}: submit p50 {statistics.median(latencies) * 1000:6.0f} µs, "
+                  f"p99 {latencies[int(len(latencies) * 0.99)]:7.2f} ms, max {latencies[-1]:7.2f} ms; "
+                  f"all saved after {seconds:.2f}s")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=5000)
+    parser.add_argument("--answers", type=int, default=10)
+    parser.add_argument("--candidates", type=int, default=200, help="concurrent submitters for the writer test")
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+"""
+LLM calls and tokens per delivered question: one question per call vs. batches.
+
+Generates the same number of questions across all five difficulty buckets,
+with a share of malformed items, and reports calls, prompt/completion
+tokens and estimated cost per valid question.
+
+Usage: python benchmarks/bench_batch_generation.py [--questions 100] [--malformed 0.05]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import api
+import question_bank
+from fake_llm import FakeLLM
+
+
+def levels_for(count):
+    return [question_bank.bucket_level(i % question_bank.NUM_BUCKETS) for i in range(count)]
+
+
+async def one_per_call(levels):
+    async def one(level):
+        prompt = api.question_prompt.format_messages(skill="Python", level=level, qid=1, history="[]")
+        try:
+            return [await api.generate_question(prompt)]
+        except Exception:
+            return []
+    results = await asyncio.gather(*(one(level) for level in levels))
+    return [q for result in results for q in result]
+
+
+async def batched(levels, size):
+    batches = [levels[i:i + size] for i in range(0, len(levels), size)]
+    results = await asyncio.gather(*(api.generate_question_batch("Python", b, []) for b in batches))
+    return [q for result in results for q in result]
+
+
+async def main(args):
+    levels = levels_for(args.questions)
+    modes = [("1 per call", lambda: one_per_call(levels))]
+    modes += [(f"batch of {size}", lambda size=size: batched(levels, size)) for size in args.sizes]
+
+    print(f"{args.questions} questions, {args.malformed:.0%} malformed items, "
+          f"${args.input_price}/${args.output_price} per 1M input/output tokens")
+    print(f"{'mode':>12} {'calls':>6} {'valid':>6} {'in tok/q':>9} {'out tok/q':>10} {'$/1k q':>8} {'time s':>7}")
+    for name, run in modes:
+        api.llm = FakeLLM(latency=args.latency, output_token_latency=args.output_token_ms / 1000,
+                          malformed_rate=args.malformed)
+        start = time.perf_counter()
+        questions = await run()
+        elapsed = time.perf_counter() - start
+        valid = max(1, len(questions))
+        in_tokens = api.llm.prompt_chars / 4 / valid
+        out_tokens = api.llm.completion_chars / 4 / valid
+        cost = 1000 * (in_tokens * args.input_price + out_tokens * args.output_price) / 1e6
+        print(f"{name:>12} {api.llm.calls:>6} {len(questions):>6} {in_tokens:>9.0f} "
+              f"{out_tokens:>10.0f} {cost:>8.3f} {elapsed:>7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--malformed", type=float, default=0.05)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--output-token-ms", type=float, default=2.0)
+    parser.add_argument("--input-price", type=float, default=0.10)
+    parser.add_argument("--output-price", type=float, default=0.40)
+    asyncio.run(main(parser.parse_args()))
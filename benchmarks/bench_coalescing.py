@@ -0,0 +1,67 @@
+"""
+A cohort starting the same assessment at once, with and without coalescing.
+
+Fires `--users` concurrent /start_test requests for one skill and
+self-rating (bank and prefetch off) and counts the LLM calls made.
+
+Usage: python benchmarks/bench_coalescing.py [--users 200] [--variants 1 3]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("LLM_MAX_CONCURRENCY", "64")
+os.environ["PREFETCH_ENABLED"] = "0"
+os.environ["QUESTION_BANK"] = "off"
+
+import httpx
+
+import api
+from fake_llm import FakeLLM
+from singleflight import SingleFlight
+
+
+async def cohort(client, users, tag):
+    latencies = []
+
+    async def one(i):
+        start = time.perf_counter()
+        r = await client.post("/start_test", json={
+            "user_id": f"{tag}-{i}", "skill": "Python", "self_rating": 50
+        })
+        r.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        return r.json()["question_title"]
+
+    titles = await asyncio.gather(*(one(i) for i in range(users)))
+    return latencies, len(set(titles))
+
+
+async def main(args):
+    transport = httpx.ASGITransport(app=api.app)
+    modes = [("off", None)] + [(f"on, {v} variant(s)", v) for v in args.variants]
+    print(f"{args.users} users start Python at 50, LLM {args.latency * 1000:.0f} ms, "
+          f"max {api.LLM_MAX_CONCURRENCY} concurrent LLM calls")
+    print(f"{'coalescing':>18} {'LLM calls':>9} {'distinct q':>10} {'p50 ms':>8} {'max ms':>8}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, variants in modes:
+            api.COALESCE_ENABLED = variants is not None
+            api.first_question_flights = SingleFlight(variants or 1)
+            api.llm = FakeLLM(latency=args.latency)
+            latencies, distinct = await cohort(client, args.users, name)
+            print(f"{name:>18} {api.llm.calls:>9} {distinct:>10} "
+                  f"{statistics.median(latencies) * 1000:>8.1f} {max(latencies) * 1000:>8.1f}")
+    print(f"saved calls counter: {api.coalesce_saved.value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--variants", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--latency", type=float, default=0.5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,149 @@
+"""
+Flattened, memory-mapped forest vs. the joblib RandomForestRegressor.
+
+Checks that FlatForest.predict gives exactly the forest's predictions, then
+compares cold load time and memory with N workers alive at once (each a
+fresh process that loads the model and scores a batch; PSS counts shared
+pages once across them), and batch prediction latency.
+
+Linux only (memory is read from /proc/<pid>/smaps_rollup).
+
+Usage: python benchmarks/bench_flat_forest.py [--workers 8] [--rows 1 100 1000 5000]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+
+from flat_forest import FlatForest
+from skill_scorer import SkillScorer
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "skillsync-model")
+MODEL_PATH = os.path.join(MODEL_DIR, "skill_sync_model.joblib")
+COLUMNS_PATH = os.path.join(MODEL_DIR, "model_columns.joblib")
+
+# Runs in each worker: load, score one batch, report, then wait to be released
+WORKER = """
+import json, sys, time, warnings
+warnings.simplefilter("ignore")
+sys.path.insert(0, {backend!r})
+import numpy as np
+start = time.perf_counter()
+if {flat!r}:
+    from flat_forest import FlatForest
+    model = FlatForest.load({forest_path!r})
+else:
+    import joblib
+    model = joblib.load({model_path!r})
+    model.n_jobs = 1
+load = time.perf_counter() - start
+model.predict(np.zeros((100, model.n_features_in_ if hasattr(model, "n_features_in_") else {n_features}), np.float32))
+print(json.dumps({{"load_ms": load * 1000}}), flush=True)
+sys.stdin.read()
+"""
+
+
+def smaps_kib(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1]] = int(parts[1])
+    return values
+
+
+def workers_memory(count, flat, forest_path, n_features):
+    code = WORKER.format(backend=os.path.abspath(BACKEND_DIR), flat=flat, forest_path=forest_path,
+                         model_path=os.path.abspath(MODEL_PATH), n_features=n_features)
+    procs = [subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True) for _ in range(count)]
+    try:
+        loads = [json.loads(proc.stdout.readline())["load_ms"] for proc in procs]
+        # All workers are alive and loaded now
+        memory = [smaps_kib(proc.pid) for proc in procs]
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+    return {
+        "load_ms": float(np.median(loads)),
+        "rss_mib": sum(m["Rss"] for m in memory) / count / 1024,
+        "pss_mib": sum(m["Pss"] for m in memory) / count / 1024,
+    }
+
+
+def random_matrix(scorer, count, seed=0):
+    rng = random.Random(seed)
+    values = {field: list(columns) + ["None"] for field, columns in scorer.one_hot.items()}
+    rows = [
+        {
+            "skill_name": rng.choice(values["skill_name"]),
+            "years_required": rng.randint(0, 20),
+            "context_keywords": rng.choice(values["context_keywords"]),
+            "is_required": rng.random() < 0.7,
+            "company_tier": rng.choice(values["company_tier"]),
+        }
+        for _ in range(count)
+    ]
+    return scorer.encode(rows)
+
+
+def best_of(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main(num_workers, batch_sizes):
+    with warnings.catch_warnings():
+        # The committed model may come from another scikit-learn version
+        warnings.simplefilter("ignore")
+        scorer = SkillScorer.load(MODEL_PATH, COLUMNS_PATH)
+    model = scorer.model
+    model.n_jobs = 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        forest_path = os.path.join(tmp, "model.forest")
+        FlatForest.from_sklearn(model, scorer.columns, meta={}).save(forest_path)
+        forest = FlatForest.load(forest_path)
+
+        X = random_matrix(scorer, max(batch_sizes + [20_000]))
+        expected, actual = model.predict(X), forest.predict(X)
+        if not np.array_equal(expected, actual):
+            raise SystemExit(f"❌ FlatForest differs from predict on {np.sum(expected != actual)} rows")
+        print(f"✅ FlatForest == RandomForestRegressor.predict on {len(X):,} random rows")
+
+        print(f"\n{num_workers} workers alive at once (per worker):")
+        for label, flat in (("joblib + scikit-learn", False), ("FlatForest (mmap)", True)):
+            m = workers_memory(num_workers, flat, forest_path, len(scorer.columns))
+            print(f"  {label:<22} load {m['load_ms']:>8.1f} ms   RSS {m['rss_mib']:>6.1f} MiB"
+                  f"   PSS {m['pss_mib']:>6.1f} MiB")
+
+        print(f"\n{'rows':>6}  {'sklearn':>10}  {'FlatForest':>10}   (ms per predict)")
+        for n in batch_sizes:
+            sk = best_of(lambda: model.predict(X[:n]))
+            flat = best_of(lambda: forest.predict(X[:n]))
+            print(f"{n:>6}  {sk:>10.2f}  {flat:>10.2f}")
+        del forest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 10, 100, 1000, 5000])
+    args = parser.parse_args()
+    main(args.workers, args.rows)
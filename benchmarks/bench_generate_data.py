@@ -0,0 +1,69 @@
+"""
+Throughput and peak memory of the mock data generators.
+
+Runs generate_mock_data (row by row) and generate_mock_data_fast (vectorized
+batches, CSV and Parquet) for growing numbers of jobs, each in a fresh
+subprocess so its peak RSS is measured on its own. The row-by-row generator
+holds every row in memory; the fast one should stay flat.
+
+Usage: python benchmarks/bench_generate_data.py [--jobs 100000 1000000] [--slow-max 200000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "skillsync-model")
+
+# Runs in the child: generate, then report rows, time and own peak RSS as JSON
+CHILD = """
+import contextlib, io, json, resource, sys, time
+sys.path.insert(0, {model_dir!r})
+from generate_data import generate_mock_data, generate_mock_data_fast
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    rows = {call}
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"rows": rows, "seconds": elapsed, "rss_kib": rss}}))
+"""
+
+
+def run_child(call):
+    code = CHILD.format(model_dir=os.path.abspath(MODEL_DIR), call=call)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def report(label, result):
+    print(f"  {label:<22} {result['rows']:>12,} rows  {result['seconds']:>7.2f}s"
+          f"  {result['rows'] / result['seconds']:>12,.0f} rows/s"
+          f"   peak RSS {result['rss_kib'] / 1024:>7.1f} MiB")
+
+
+def main(job_counts, slow_max, seed):
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "data.csv")
+        parquet_path = os.path.join(tmp, "data.parquet")
+        for jobs in job_counts:
+            print(f"{jobs:,} jobs:")
+            if jobs <= slow_max:
+                report("row by row (CSV)", run_child(f"generate_mock_data({jobs}, {csv_path!r}, seed={seed})"))
+            report("fast (CSV)", run_child(f"generate_mock_data_fast({jobs}, {csv_path!r}, seed={seed})"))
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                continue
+            report("fast (Parquet)", run_child(f"generate_mock_data_fast({jobs}, {parquet_path!r}, seed={seed})"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[100_000, 1_000_000, 2_000_000])
+    parser.add_argument("--slow-max", type=int, default=200_000,
+                        help="skip the row-by-row generator above this many jobs")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    main(args.jobs, args.slow_max, args.seed)
@@ -0,0 +1,90 @@
+"""
+Parity and throughput of the vectorized heuristic labeler.
+
+First checks that get_heuristic_scores matches get_heuristic_score on every
+row of mock_skill_data.csv, and that process_data writes the same file as
+the row-by-row reference. Then compares rows/sec on a tiled copy of the data.
+
+Usage: python benchmarks/bench_heuristic.py [--rows 1000000]
+"""
+import argparse
+import contextlib
+import csv
+import filecmp
+import io
+import os
+import sys
+import tempfile
+import time
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "skillsync-model")
+sys.path.insert(0, MODEL_DIR)
+
+import numpy as np
+import pandas as pd
+
+from apply_heuristic import (
+    CSV_DTYPES, get_heuristic_score, process_data, process_data_rowwise, score_frame,
+)
+
+MOCK_CSV = os.path.join(MODEL_DIR, "mock_skill_data.csv")
+
+
+def check_parity():
+    with open(MOCK_CSV, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    expected = np.array([get_heuristic_score(row) for row in rows])
+    frame = pd.read_csv(MOCK_CSV, dtype=CSV_DTYPES, keep_default_na=False)
+    actual = score_frame(frame)
+    mismatches = np.flatnonzero(expected != actual)
+    if len(mismatches):
+        raise SystemExit(f"❌ Parity failed on {len(mismatches)} rows, e.g. {rows[mismatches[0]]}")
+    print(f"✅ Scores identical on all {len(rows)} rows of mock_skill_data.csv")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = os.path.join(tmp, "rowwise.csv")
+        vectorized = os.path.join(tmp, "vectorized.csv")
+        with contextlib.redirect_stdout(io.StringIO()):
+            process_data_rowwise(MOCK_CSV, reference)
+            process_data(MOCK_CSV, vectorized)
+        if not filecmp.cmp(reference, vectorized, shallow=False):
+            raise SystemExit("❌ process_data output differs from the row-by-row reference")
+    print("✅ process_data output is byte-identical to the row-by-row reference")
+
+
+def rate(rows, fn):
+    start = time.perf_counter()
+    fn()
+    return rows / (time.perf_counter() - start)
+
+
+def throughput(rows):
+    base = pd.read_csv(MOCK_CSV, dtype=str, keep_default_na=False)
+    tiled = pd.concat([base] * (rows // len(base) + 1), ignore_index=True).iloc[:rows]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_csv = os.path.join(tmp, "input.csv")
+        tiled.to_csv(input_csv, index=False)
+        records = tiled.to_dict("records")
+        frame = pd.read_csv(input_csv, dtype=CSV_DTYPES, keep_default_na=False)
+
+        score_rowwise = rate(len(records), lambda: [get_heuristic_score(row) for row in records])
+        score_vectorized = rate(len(frame), lambda: score_frame(frame))
+        # The script prints progress; keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            file_rowwise = rate(rows, lambda: process_data_rowwise(input_csv, os.path.join(tmp, "a.csv")))
+            file_vectorized = rate(rows, lambda: process_data(input_csv, os.path.join(tmp, "b.csv")))
+
+    print(f"{rows:,} rows, rows/s:")
+    print(f"  scoring only   row by row {score_rowwise:>12,.0f}   vectorized {score_vectorized:>12,.0f}"
+          f"  ({score_vectorized / score_rowwise:.0f}x)")
+    print(f"  CSV in -> out  row by row {file_rowwise:>12,.0f}   vectorized {file_vectorized:>12,.0f}"
+          f"  ({file_vectorized / file_rowwise:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    check_parity()
+    throughput(args.rows)
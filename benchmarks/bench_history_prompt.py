@@ -0,0 +1,72 @@
+"""
+Prompt size and end-to-end test latency: full JSON history vs. history digest.
+
+Runs one candidate through tests of 10, 30 and 60 questions with the bank
+and prefetch disabled, so every question is generated on the request path.
+The fake LLM charges a per-token delay to mimic prefill cost.
+
+Usage: python benchmarks/bench_history_prompt.py [--per-token-ms 0.05]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ["PREFETCH_ENABLED"] = "0"
+os.environ["QUESTION_BANK"] = "off"
+# Fixed-length sessions: the level estimator must not end tests early
+os.environ["LEVEL_ESTIMATOR"] = "step"
+
+import httpx
+
+import api
+from fake_llm import FakeLLM
+
+digest_history = api.render_history
+
+
+def full_history(session):
+    return json.dumps([q.to_dict() for q in session.history])
+
+
+async def run_test(client, questions):
+    r = await client.post("/start_test", json={"user_id": "bench", "skill": "Python", "self_rating": 50})
+    question = r.json()
+    for i in range(questions - 1):
+        r = await client.post("/next_question", json={
+            "user_id": "bench",
+            "question_id": question["question_id"],
+            "selected_option": "opt1" if i % 3 else "opt2",
+            "time_taken": 20,
+            "previous_level": 50,
+            "correct_answer": question["correct_answer"],
+        })
+        r.raise_for_status()
+        question = r.json()
+    await client.post("/end_test", json={"user_id": "bench", "skill": "Python"})
+
+
+async def main(args):
+    transport = httpx.ASGITransport(app=api.app)
+    print(f"{'history':>8} {'questions':>9} {'last prompt tok':>15} {'total prompt tok':>16} {'test time s':>11}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, render in (("full", full_history), ("digest", digest_history)):
+            api.render_history = render
+            for questions in (10, 30, 60):
+                api.llm = FakeLLM(latency=args.latency, per_token_latency=args.per_token_ms / 1000)
+                start = time.perf_counter()
+                await run_test(client, questions)
+                elapsed = time.perf_counter() - start
+                print(f"{name:>8} {questions:>9} {api.llm.last_prompt_chars // 4:>15} "
+                      f"{api.llm.prompt_chars // 4:>16} {elapsed:>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--per-token-ms", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
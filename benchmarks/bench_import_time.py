@@ -0,0 +1,98 @@
+"""
+Import time of the API and the model tooling, with a per-package breakdown.
+
+Each target is imported in a fresh interpreter, --repeat times, keeping the
+fastest; one more run under `python -X importtime` attributes the time to
+top-level packages (self time, summed over their submodules). Cold starts
+of autoscaled workers and of short CLI jobs pay all of it before doing any
+work.
+
+  api             import backend/api.py as uvicorn does (no key needed;
+                  the LLM client, prompts and model are built on first use)
+  api, prewarmed  the same plus api.prewarm(), what the startup hook adds
+                  with PREWARM=1 (fake LLM, so no provider SDK)
+  cli             skillsync-model/cli.py, before a subcommand is chosen
+
+Usage: python benchmarks/bench_import_time.py [--repeat 5] [--top 6]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.normpath(os.path.join(BENCH_DIR, "..", "backend"))
+MODEL_DIR = os.path.normpath(os.path.join(BENCH_DIR, "..", "skillsync-model"))
+
+# name -> (directory, statement, extra environment)
+TARGETS = {
+    "api": (BACKEND_DIR, "import api", {}),
+    "api, prewarmed": (BACKEND_DIR, "import api; api.prewarm()", {"LLM_PROVIDER": "fake"}),
+    "cli": (MODEL_DIR, "import cli", {}),
+    "generate_data": (MODEL_DIR, "import generate_data", {}),
+    "label_pipeline": (MODEL_DIR, "import label_pipeline", {}),
+    "train_model": (MODEL_DIR, "import train_model", {}),
+}
+
+TIMED = "import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+
+
+def run(directory, statement, env, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", statement]
+    # Warnings (e.g. from unpickling) are not what is measured
+    out = subprocess.run(cmd, cwd=directory, env=dict(os.environ, PYTHONWARNINGS="ignore", **env),
+                         capture_output=True, text=True)
+    if out.returncode != 0:
+        print(out.stderr, file=sys.stderr)
+        raise SystemExit(f"❌ {statement!r} failed in {directory}")
+    return out
+
+
+def import_ms(directory, statement, env=None, repeat=5):
+    """
+    Fastest in-process time of `statement` in a fresh interpreter, in ms.
+    """
+    return min(
+        float(run(directory, TIMED.format(statement=statement), env or {}).stdout.strip().splitlines()[-1]) * 1000
+        for _ in range(repeat)
+    )
+
+
+def breakdown(directory, statement, env=None) -> Counter:
+    """
+    {top-level package: ms} from one `-X importtime` run, interpreter startup included.
+    """
+    packages = Counter()
+    for line in run(directory, statement, env or {}, importtime=True).stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us) / 1000
+    return packages
+
+
+def main(args):
+    names = args.targets or list(TARGETS)
+    print(f"{'target':<16} {'import ms':>10}   heaviest packages (self ms, -X importtime)")
+    for name in names:
+        directory, statement, env = TARGETS[name]
+        ms = import_ms(directory, statement, env, args.repeat)
+        heaviest = breakdown(directory, statement, env).most_common(args.top)
+        print(f"{name:<16} {ms:>10.0f}   " + ", ".join(f"{package} {t:.0f}" for package, t in heaviest))
+
+    # The point of the lazy imports: none of these may load at import time
+    heavy = ("langchain_core", "langchain_google_genai", "sklearn", "numpy")
+    loaded = [package for name in ("api", "cli") for package in heavy
+              if package in breakdown(*TARGETS[name])]
+    if loaded:
+        raise SystemExit(f"❌ Imported eagerly: {', '.join(loaded)}")
+    print(f"✅ api and cli import none of {', '.join(heavy)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), help="default: all")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per target; the fastest counts")
+    parser.add_argument("--top", type=int, default=6, help="packages listed per target")
+    main(parser.parse_args())
@@ -0,0 +1,110 @@
+"""
+Overhead of the request instrumentation (phase timers, latency histograms).
+
+First times the primitives on their own (phase() and Histogram.observe),
+then runs the same start -> answers -> end sessions through the app with
+INSTRUMENTATION=1 and =0, each in a fresh subprocess, on a zero-latency
+fake LLM so the service's own work is all that is measured.
+
+Usage: python benchmarks/bench_instrumentation.py [--candidates 200] [--questions 5] [--rounds 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+sys.path.insert(0, BACKEND_DIR)
+
+# Runs in the child with INSTRUMENTATION set: one round of sessions, report µs per request
+CHILD = """
+import asyncio, json, os, sys, time
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["FAKE_LLM_LATENCY"] = "0"
+os.environ["PREFETCH_ENABLED"] = "0"
+os.environ["QUESTION_BANK"] = "off"
+os.environ["LEVEL_ESTIMATOR"] = "step"
+sys.path.insert(0, {backend!r})
+import httpx
+import api
+api.prewarm()
+
+async def session(client, user_id):
+    r = await client.post("/start_test", json={{"user_id": user_id, "skill": "Python", "self_rating": 50}})
+    question = r.json()
+    for _ in range({questions}):
+        r = await client.post("/next_question", json={{
+            "user_id": user_id, "question_id": question["question_id"], "selected_option": "opt1",
+            "time_taken": 20.0, "previous_level": 50, "correct_answer": question["correct_answer"],
+        }})
+        question = r.json()
+    await client.post("/end_test", json={{"user_id": user_id, "skill": "Python"}})
+
+async def main():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench") as client:
+        await session(client, "warmup")
+        best = float("inf")
+        for round in range({rounds}):
+            start = time.perf_counter()
+            for i in range({candidates}):
+                await session(client, f"bench-{{round}}-{{i}}")
+            best = min(best, time.perf_counter() - start)
+    print(json.dumps({{"us_per_request": best / ({candidates} * ({questions} + 2)) * 1e6}}))
+
+asyncio.run(main())
+"""
+
+
+def per_call_ns(fn, calls=200_000):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def primitives():
+    import instrumentation
+    import metrics
+
+    histogram = metrics.Histogram("bench_seconds", "Benchmark histogram.", label="phase")
+
+    def timed():
+        with instrumentation.phase("bench"):
+            pass
+
+    def empty():
+        pass
+
+    baseline = per_call_ns(empty)
+    print("Primitives (ns per call, loop overhead subtracted):")
+    print(f"  Histogram.observe      {per_call_ns(lambda: histogram.observe(0.001, 'llm')) - baseline:>8.0f}")
+    print(f"  with phase(...): pass  {per_call_ns(timed) - baseline:>8.0f}")
+
+
+def run_child(enabled, args):
+    code = CHILD.format(backend=BACKEND_DIR, candidates=args.candidates, questions=args.questions,
+                        rounds=args.rounds)
+    env = dict(os.environ, INSTRUMENTATION="1" if enabled else "0")
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True, env=env)
+    return json.loads(out.stdout.strip().splitlines()[-1])["us_per_request"]
+
+
+def main(args):
+    primitives()
+    off = min(run_child(False, args) for _ in range(args.repeat))
+    on = min(run_child(True, args) for _ in range(args.repeat))
+    print(f"\n{args.candidates} sessions x {args.questions + 2} requests, zero-latency fake LLM "
+          f"(µs of service time per request, best of {args.repeat}):")
+    print(f"  instrumentation off  {off:>8.1f}")
+    print(f"  instrumentation on   {on:>8.1f}   ({on - off:+.1f} µs, {on / off - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per setting")
+    main(parser.parse_args())
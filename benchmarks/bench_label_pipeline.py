@@ -0,0 +1,84 @@
+"""
+Throughput and peak memory of the streaming labeling pipeline.
+
+Labels tiled copies of mock_skill_data.csv of growing size, once with the
+in-memory process_data and once per worker count with label_pipeline. Each
+run happens in a fresh subprocess so its peak RSS can be measured on its own.
+Peak memory of process_data grows with the input; the pipeline's should not.
+
+Usage: python benchmarks/bench_label_pipeline.py [--rows 500000 2000000] [--workers 1 2 4]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "skillsync-model")
+sys.path.insert(0, MODEL_DIR)
+
+import pandas as pd
+
+MOCK_CSV = os.path.join(MODEL_DIR, "mock_skill_data.csv")
+
+# Runs in the child: label, then report the time and own peak RSS as JSON
+CHILD = """
+import contextlib, io, json, resource, sys, time
+sys.path.insert(0, {model_dir!r})
+from apply_heuristic import process_data
+from label_pipeline import label_pipeline
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    {call}
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "rss_kib": rss, "worker_rss_kib": children}}))
+"""
+
+
+def run_child(call):
+    code = CHILD.format(model_dir=os.path.abspath(MODEL_DIR), call=call)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def write_tiled(path, rows):
+    base = pd.read_csv(MOCK_CSV, dtype=str, keep_default_na=False)
+    tiled = pd.concat([base] * (rows // len(base) + 1), ignore_index=True).iloc[:rows]
+    tiled.to_csv(path, index=False)
+
+
+def report(label, rows, result):
+    print(f"  {label:<26} {rows / result['seconds']:>12,.0f} rows/s"
+          f"   peak RSS {result['rss_kib'] / 1024:>7.1f} MiB"
+          f"   (largest worker {result['worker_rss_kib'] / 1024:>6.1f} MiB)")
+
+
+def main(row_counts, worker_counts, chunk_rows):
+    print(f"{os.cpu_count()} CPU core(s), chunks of {chunk_rows:,} rows")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_csv = os.path.join(tmp, "input.csv")
+        output_csv = os.path.join(tmp, "output.csv")
+        for rows in row_counts:
+            write_tiled(input_csv, rows)
+            print(f"{rows:,} rows ({os.path.getsize(input_csv) / 2**20:.0f} MiB of CSV):")
+            report("process_data (in memory)", rows,
+                   run_child(f"process_data({input_csv!r}, {output_csv!r})"))
+            for workers in worker_counts:
+                result = run_child(
+                    f"label_pipeline({input_csv!r}, {output_csv!r}, chunk_rows={chunk_rows}, "
+                    f"workers={workers}, resume=False)"
+                )
+                report(f"label_pipeline, {workers} worker(s)", rows, result)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[500_000, 2_000_000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk-rows", type=int, default=250_000)
+    args = parser.parse_args()
+    main(args.rows, args.workers, args.chunk_rows)
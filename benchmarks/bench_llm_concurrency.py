@@ -0,0 +1,61 @@
+"""
+Throughput of /start_test against a local fake LLM at increasing concurrency.
+
+With the LLM call awaited instead of blocking, requests/sec should grow
+roughly linearly with concurrency until LLM_MAX_CONCURRENCY is reached.
+
+Usage: python benchmarks/bench_llm_concurrency.py [--latency 0.2] [--requests 256]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("LLM_MAX_CONCURRENCY", "256")
+# Every request asks for the same first question; measure raw LLM concurrency
+os.environ["COALESCE_ENABLED"] = "0"
+
+import httpx
+
+import api
+from fake_llm import FakeLLM
+
+
+async def run_level(client, concurrency, total):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with sem:
+            r = await client.post("/start_test", json={
+                "user_id": f"bench-{concurrency}-{i}",
+                "skill": "Python",
+                "self_rating": 50,
+            })
+            r.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(latency, total, levels):
+    api.llm = FakeLLM(latency=latency)
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"Fake LLM latency: {latency * 1000:.0f} ms, {total} requests per level")
+        print(f"{'concurrency':>12} {'req/s':>10}")
+        for concurrency in levels:
+            rps = await run_level(client, concurrency, total)
+            print(f"{concurrency:>12} {rps:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32, 128])
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.requests, args.levels))
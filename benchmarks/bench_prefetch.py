@@ -0,0 +1,112 @@
+"""
+/next_question latency with and without speculative prefetch.
+
+Each simulated candidate "thinks" for a while before answering, which is
+the window the prefetch uses to generate both branch questions.
+
+Usage: python benchmarks/bench_prefetch.py [--latency 0.3] [--think 0.5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+# Fixed-length sessions: the level estimator must not end tests early
+os.environ["LEVEL_ESTIMATOR"] = "step"
+
+import httpx
+
+import api
+import session_store
+from fake_llm import FakeLLM
+
+
+async def candidate(client, user_id, questions, think, latencies):
+    r = await client.post("/start_test", json={"user_id": user_id, "skill": "Python", "self_rating": 50})
+    question = r.json()
+    for _ in range(questions):
+        await asyncio.sleep(think)
+        start = time.perf_counter()
+        r = await client.post("/next_question", json={
+            "user_id": user_id,
+            "question_id": question["question_id"],
+            "selected_option": random.choice(["opt1", "opt2"]),
+            "time_taken": random.uniform(5, 60),
+            "previous_level": 50,
+            "correct_answer": question["correct_answer"],
+        })
+        r.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        question = r.json()
+    await client.post("/end_test", json={"user_id": user_id, "skill": "Python"})
+
+
+async def run(prefetch, args):
+    api.PREFETCH_ENABLED = prefetch
+    api.llm = FakeLLM(latency=args.latency)
+    latencies = []
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(*(
+            candidate(client, f"bench-{i}", args.questions, args.think, latencies)
+            for i in range(args.candidates)
+        ))
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    print(f"prefetch={'on ' if prefetch else 'off'}  p50={p50:8.1f} ms  p95={p95:8.1f} ms  llm_calls={api.llm.calls}")
+
+
+async def check_orphaned_prefetch():
+    """
+    With a shared SQLite store, a test that ends on another worker leaves
+    this worker's prefetch behind; the sweep must drop it.
+    """
+    api.PREFETCH_ENABLED = True
+    api.llm = FakeLLM()
+    sessions = api.sessions
+    with tempfile.TemporaryDirectory() as tmp:
+        api.sessions = session_store.create_store(f"sqlite:///{tmp}/sessions.db", api.SESSION_TTL_SECONDS, 100)
+        try:
+            transport = httpx.ASGITransport(app=api.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for user_id in ("kept", "ended-elsewhere"):
+                    r = await client.post("/start_test", json={"user_id": user_id, "skill": "Python", "self_rating": 50})
+                    r.raise_for_status()
+            # What /end_test on another worker does to the shared store
+            api.sessions.pop("ended-elsewhere")
+            api.sweep_prefetch()
+            if set(api.pending_prefetch) != {"kept"}:
+                raise SystemExit(f"❌ Prefetches left after the sweep: {sorted(api.pending_prefetch)}")
+            api.cancel_prefetch("kept")
+        finally:
+            api.sessions._conn.close()
+            api.sessions = sessions
+    print("✅ The sweep drops prefetches of sessions ended on another worker")
+
+
+async def main(args):
+    random.seed(0)
+    await check_orphaned_prefetch()
+    wasted = api.prefetch_wasted.value
+    print(f"{args.candidates} candidates x {args.questions} answers, "
+          f"LLM {args.latency * 1000:.0f} ms, think time {args.think * 1000:.0f} ms")
+    await run(False, args)
+    await run(True, args)
+    print(f"hit rate {api.prefetch_hits.value}/{api.prefetch_hits.value + api.prefetch_misses.value}, "
+          f"wasted generations {api.prefetch_wasted.value - wasted}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--think", type=float, default=0.5)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,132 @@
+"""
+Share of LLM calls taken off the request path by the question bank.
+
+Warms the bank for one popular skill, then runs candidates through full
+tests and counts how many questions came from the bank versus the LLM.
+Also checks that a skill nobody asks for any more (e.g. a typo) stops
+being refilled, while warm skills keep being topped up, and that the
+prefetch's "can the bank serve this?" check agrees with drawing.
+
+Usage: python benchmarks/bench_question_bank.py [--store memory|sqlite:///bank.db]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("PREFETCH_ENABLED", "0")
+# Fixed-length sessions: the level estimator must not end tests early
+os.environ["LEVEL_ESTIMATOR"] = "step"
+
+import httpx
+
+import api
+import question_bank
+from fake_llm import FakeLLM
+
+
+async def candidate(client, user_id, skill, questions):
+    r = await client.post("/start_test", json={
+        "user_id": user_id, "skill": skill, "self_rating": random.randint(0, 100)
+    })
+    question = r.json()
+    for _ in range(questions):
+        r = await client.post("/next_question", json={
+            "user_id": user_id,
+            "question_id": question["question_id"],
+            "selected_option": random.choice(["opt1", "opt2"]),
+            "time_taken": random.uniform(5, 60),
+            "previous_level": 50,
+            "correct_answer": question["correct_answer"],
+        })
+        r.raise_for_status()
+        question = r.json()
+    await client.post("/end_test", json={"user_id": user_id, "skill": skill})
+
+
+async def check_demand_expiry(args):
+    store = question_bank.create_store("memory", 3600, args.max_uses, 64 * 1024 * 1024, 100000)
+    bank = question_bank.QuestionBank(store, 2, ["Python"], demand_ttl_seconds=0.2, max_wanted=3)
+    asked = []
+
+    async def generate(skill, levels, existing_titles):
+        asked.append(skill)
+        return []  # nothing banked, so every refill would ask again
+
+    bank.draw("Pyhton", 50, set())
+    await bank.refill_once(generate, 2, 8)
+    first = set(asked)
+    await asyncio.sleep(0.3)
+    asked.clear()
+    await bank.refill_once(generate, 2, 8)
+    if first != {"Python", "Pyhton"} or set(asked) != {"Python"} or "pyhton" in bank.skills:
+        raise SystemExit(f"❌ Refilled {first}, then {set(asked)} after the demand expired")
+
+    for i in range(10):
+        bank.draw(f"junk {i}", 50, set())
+    if len(bank.wanted) != 3:
+        raise SystemExit(f"❌ {len(bank.wanted)} buckets wanted, max_wanted is 3")
+    print("✅ Unused skills stop being refilled; warm skills are kept; demand is capped")
+
+
+def check_has_unseen():
+    question = {"question_title": "What does GIL stand for?", "difficulty": 50}
+    seen = {question_bank.fingerprint(question["question_title"])}
+    with tempfile.TemporaryDirectory() as tmp:
+        for spec in ("memory", f"sqlite:///{tmp}/bank.db"):
+            store = question_bank.create_store(spec, 0.2, 3, 64 * 1024 * 1024, 100000)
+            store.add("Python", 5, question)
+            fresh = (store.has_unseen("Python", 5, set()), store.has_unseen("Python", 5, seen))
+            time.sleep(0.3)
+            expired = store.has_unseen("Python", 5, set())
+            if fresh != (True, False) or expired or store.draw("Python", 5, set()) is not None:
+                raise SystemExit(f"❌ {spec}: has_unseen gave {fresh} fresh, {expired} once expired")
+            if spec != "memory":
+                store._conn.close()
+    print("✅ has_unseen skips seen and expired questions, like draw")
+
+
+async def main(args):
+    await check_demand_expiry(args)
+    check_has_unseen()
+    random.seed(0)
+    store = question_bank.create_store(args.store, 3600, args.max_uses, 64 * 1024 * 1024, 100000)
+    api.bank_store = store
+    api.bank = question_bank.QuestionBank(store, args.depth, ["Python"])
+    api.llm = FakeLLM(latency=args.latency)
+
+    start = time.perf_counter()
+    warmed = await api.bank.refill_once(api.generate_bank_batch, args.depth, api.GENERATION_BATCH_SIZE)
+    print(f"Warmed {warmed} questions in {time.perf_counter() - start:.2f}s ({args.store})")
+
+    calls_before = api.llm.calls
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            candidate(client, f"bench-{i}", "Python", args.questions)
+            for i in range(args.candidates)
+        ))
+        elapsed = time.perf_counter() - start
+
+    served = args.candidates * (args.questions + 1)
+    llm_calls = api.llm.calls - calls_before
+    print(f"{served} questions served in {elapsed:.2f}s")
+    print(f"bank hits {api.bank_hits.value}, LLM calls on request path {llm_calls} "
+          f"({100 * (1 - llm_calls / served):.1f}% of generations avoided)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", default="memory")
+    parser.add_argument("--depth", type=int, default=20)
+    parser.add_argument("--max-uses", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,104 @@
+"""
+Encoding overhead and latency of /score_skills.
+
+Checks that SkillScorer produces the same predictions as the training-time
+encoding (pd.get_dummies + column realignment) on mock_skill_data.csv, then
+times both encoders and one batched predict per batch size, and finally the
+whole endpoint through the ASGI app.
+
+Usage: python benchmarks/bench_score_skills.py [--rows 1 100 1000 5000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import httpx
+import numpy as np
+import pandas as pd
+
+import api
+
+MOCK_CSV = os.path.join(api.SKILL_MODEL_DIR, "mock_skill_data.csv")
+
+
+def get_dummies_encode(rows, columns):
+    """
+    The encoding train_model.py uses, applied to a request's rows.
+    """
+    frame = pd.DataFrame(rows).replace({"context_keywords": {"None": np.nan}})
+    encoded = pd.get_dummies(frame, columns=["skill_name", "context_keywords", "company_tier"])
+    encoded["is_required"] = encoded["is_required"].astype(int)
+    return encoded.reindex(columns=columns, fill_value=0).to_numpy(dtype=np.float32)
+
+
+def load_rows():
+    frame = pd.read_csv(MOCK_CSV, dtype=str, keep_default_na=False)
+    frame["years_required"] = frame["years_required"].astype(int)
+    frame["is_required"] = frame["is_required"] == "True"
+    return frame.drop(columns=["job_id"]).to_dict("records")
+
+
+def best_of(fn, repeat=20):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def check_parity(scorer, rows):
+    fast = scorer.model.predict(scorer.encode(rows))
+    slow = scorer.model.predict(get_dummies_encode(rows, scorer.columns))
+    if not np.array_equal(fast, slow):
+        raise SystemExit(f"❌ Predictions differ on {np.sum(fast != slow)} of {len(rows)} rows")
+    print(f"✅ Same predictions as the get_dummies encoding on all {len(rows)} rows")
+
+
+async def endpoint_latency(rows, repeat=10):
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = {"rows": rows}
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await client.post("/score_skills", json=body)
+            times.append(time.perf_counter() - start)
+            response.raise_for_status()
+    return min(times) * 1000
+
+
+def main(batch_sizes):
+    with warnings.catch_warnings():
+        # The committed model may come from another scikit-learn version
+        warnings.simplefilter("ignore")
+        scorer = api.get_skill_scorer()
+    if scorer is None:
+        raise SystemExit(f"❌ Could not load the model: {api.skill_scorer_error}")
+    scorer.model.n_jobs = 1
+
+    rows = load_rows()
+    check_parity(scorer, rows)
+
+    print(f"{'rows':>6}  {'get_dummies':>12}  {'SkillScorer':>12}  {'predict':>10}  {'endpoint':>10}   (ms)")
+    for n in batch_sizes:
+        batch = (rows * (n // len(rows) + 1))[:n]
+        slow = best_of(lambda: get_dummies_encode(batch, scorer.columns))
+        fast = best_of(lambda: scorer.encode(batch))
+        X = scorer.encode(batch)
+        predict = best_of(lambda: scorer.model.predict(X), repeat=5)
+        endpoint = asyncio.run(endpoint_latency(batch))
+        print(f"{n:>6}  {slow:>12.2f}  {fast:>12.2f}  {predict:>10.2f}  {endpoint:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1000, 5000])
+    args = parser.parse_args()
+    main(args.rows)
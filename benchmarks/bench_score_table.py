@@ -0,0 +1,127 @@
+"""
+Precomputed score table vs. live inference.
+
+Parity first: the model table must give exactly the forest's predictions on
+mock_skill_data.csv and on random rows (including unknown categories and
+years beyond the table, which fall back to the model), and a heuristic table
+must match get_heuristic_score on every mock row. Then compares latency per
+batch size of RandomForestRegressor.predict and of table lookups.
+
+Usage: python benchmarks/bench_score_table.py [--rows 1 100 1000 10000]
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import numpy as np
+
+import score_table
+from score_table import ScoreTable, compile_heuristic_table, compile_model_table
+from skill_scorer import SkillScorer
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "skillsync-model")
+MODEL_PATH = os.path.join(MODEL_DIR, "skill_sync_model.joblib")
+COLUMNS_PATH = os.path.join(MODEL_DIR, "model_columns.joblib")
+MOCK_CSV = os.path.join(MODEL_DIR, "mock_skill_data.csv")
+
+
+def load_rows():
+    with open(MOCK_CSV, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row["years_required"] = int(row["years_required"])
+        row["is_required"] = row["is_required"] == "True"
+    return rows
+
+
+def random_rows(scorer, count, seed=0):
+    """
+    Rows drawn from the known values plus unseen ones, with years up to 30.
+    """
+    rng = random.Random(seed)
+    values = {field: list(scorer.one_hot[field]) + ["Unknown", "None"] for field in score_table.CATEGORICAL_AXES}
+    return [
+        {
+            "skill_name": rng.choice(values["skill_name"]),
+            "years_required": rng.randint(-1, 30),
+            "context_keywords": rng.choice(values["context_keywords"]),
+            "is_required": rng.random() < 0.7,
+            "company_tier": rng.choice(values["company_tier"]),
+        }
+        for _ in range(count)
+    ]
+
+
+def check_parity(scorer, table, rows):
+    sys.path.insert(0, MODEL_DIR)
+    from apply_heuristic import get_heuristic_score
+
+    for name, batch in (("mock_skill_data.csv", rows), ("random rows", random_rows(scorer, 20_000))):
+        expected = scorer.model.predict(scorer.encode(batch))
+        scorer.table = table
+        actual = scorer.score(batch)
+        scorer.table = None
+        if not np.array_equal(expected, actual):
+            raise SystemExit(f"❌ Model table differs from predict on {np.sum(expected != actual)} {name}")
+        covered = table.lookup(batch)[1].mean()
+        print(f"✅ Model table == predict on {len(batch):,} {name} ({covered:.1%} from the table)")
+
+    heuristic = compile_heuristic_table(MODEL_DIR, max_years=20)
+    scores, covered = heuristic.lookup(rows)
+    expected = [get_heuristic_score(dict(row, is_required=str(row["is_required"]))) for row in rows]
+    if not covered.all() or not np.array_equal(scores, expected):
+        raise SystemExit("❌ Heuristic table differs from get_heuristic_score")
+    print(f"✅ Heuristic table == get_heuristic_score on all {len(rows):,} mock rows")
+
+
+def best_of(fn, repeat=10):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main(batch_sizes):
+    with warnings.catch_warnings():
+        # The committed model may come from another scikit-learn version
+        warnings.simplefilter("ignore")
+        scorer = SkillScorer.load(MODEL_PATH, COLUMNS_PATH)
+        start = time.perf_counter()
+        compiled = compile_model_table(MODEL_PATH, COLUMNS_PATH, max_years=20)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "score_table.npy")
+        compiled.save(path)
+        start = time.perf_counter()
+        table = ScoreTable.load(path)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"Compiled {table.values.size:,} scores in {compile_ms:.0f} ms"
+              f" ({table.values.nbytes / 1024:.0f} KiB); mmap load {load_ms:.2f} ms")
+
+        rows = load_rows()
+        check_parity(scorer, table, rows)
+
+        print(f"{'rows':>6}  {'predict':>10}  {'table':>10}  {'speedup':>8}   (ms, encode/lookup included)")
+        for n in batch_sizes:
+            batch = (rows * (n // len(rows) + 1))[:n]
+            live = best_of(lambda: scorer.model.predict(scorer.encode(batch)), repeat=3)
+            lookup = best_of(lambda: table.lookup(batch))
+            print(f"{n:>6}  {live:>10.2f}  {lookup:>10.3f}  {live / lookup:>7.0f}x")
+        del table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    args = parser.parse_args()
+    main(args.rows)
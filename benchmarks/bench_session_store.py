@@ -0,0 +1,103 @@
+"""
+Memory per session and get/put throughput of the session stores.
+
+Memory compares the original nested-dict session layout with the slotted
+Session dataclass, each holding a test of `--questions` questions.
+
+Usage: python benchmarks/bench_session_store.py [--sessions 10000] [--questions 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from history_digest import HistoryDigest
+from question_bank import fingerprint
+from session_store import AskedQuestion, Session, create_store
+
+
+def make_question(i):
+    return {
+        "question_id": i,
+        "question_title": f"Which statement about Python feature number {i} is correct?",
+        "options": {f"opt{k}": f"Option {k} for question {i}" for k in range(1, 5)},
+        "correct_answer": "opt2",
+        "difficulty": 50,
+    }
+
+
+def dict_session(user_id, questions):
+    history = []
+    for i in range(1, questions + 1):
+        question = make_question(i)
+        history.append(dict(question, user_answer="opt1"))
+    return {
+        "user_id": user_id,
+        "skill": "Python",
+        "current_level": 50,
+        "questions_asked": questions,
+        "correct_answers": questions // 2,
+        "history": history,
+        "last_question": make_question(questions),
+    }
+
+
+def dataclass_session(user_id, questions):
+    session = Session(user_id=user_id, skill="Python", current_level=50, digest=HistoryDigest(300))
+    for i in range(1, questions + 1):
+        question = make_question(i)
+        session.history.append(AskedQuestion.from_question(question, user_answer="opt1"))
+        session.digest.add_question(question["question_title"])
+        session.digest.record_answer(i % 2 == 0, 50)
+        session.seen.add(fingerprint(question["question_title"]))
+        session.questions_asked += 1
+    return session
+
+
+def bytes_per_session(factory, count, questions):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [factory(f"user-{i}", questions) for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return used / count
+
+
+def ops_per_second(store, count, questions):
+    session = dataclass_session("template", questions)
+    start = time.perf_counter()
+    for i in range(count):
+        session.user_id = f"user-{i}"
+        store.put(session)
+    put_rate = count / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for i in range(count):
+        store.get(f"user-{i}")
+    get_rate = count / (time.perf_counter() - start)
+    return put_rate, get_rate
+
+
+def main(args):
+    print(f"Memory per session ({args.questions} questions):")
+    print(f"  nested dicts      {bytes_per_session(dict_session, args.sessions, args.questions) / 1024:8.1f} KiB")
+    print(f"  Session dataclass {bytes_per_session(dataclass_session, args.sessions, args.questions) / 1024:8.1f} KiB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        specs = ["memory", f"sqlite:///{os.path.join(tmp, 'sessions.db')}"]
+        print("Store throughput:")
+        for spec in specs:
+            store = create_store(spec, ttl_seconds=3600, max_sessions=args.sessions * 2)
+            put_rate, get_rate = ops_per_second(store, args.sessions, args.questions)
+            print(f"  {spec.split(':')[0]:<8} put {put_rate:>10,.0f}/s  get {get_rate:>10,.0f}/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--questions", type=int, default=10)
+    main(parser.parse_args())
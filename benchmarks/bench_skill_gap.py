@@ -0,0 +1,143 @@
+"""
+Skill-gap matching at corpus scale: a million jobs against many users.
+
+Demand comes from the mock job generator (generate_batch, the in-memory
+core of generate_mock_data_fast) scored by the vectorized heuristic
+(score_frame == get_heuristic_score row by row). Users get 3-10 random
+skills with supply scores 0-1000.
+
+Checks the engine's fit scores against a plain Python loop on a sample,
+then reports build time and memory, per-user top-k latency (argpartition
+vs. a full sort), throughput over many users, and an incremental supply
+update vs. reloading all supply.
+
+Usage: python benchmarks/bench_skill_gap.py [--jobs 1000000] [--users 10000] [--k 10]
+"""
+import argparse
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "skillsync-model"))
+
+import numpy as np
+import pandas as pd
+
+from apply_heuristic import score_frame
+from generate_data import SKILL_NAMES, _archetype_tables, generate_batch
+from skill_gap import GapEngine
+
+
+def make_demand(num_jobs, seed, batch_jobs=200_000):
+    rng = np.random.default_rng(seed)
+    tables = _archetype_tables()
+    frames = []
+    for first in range(0, num_jobs, batch_jobs):
+        batch = generate_batch(rng, first, min(batch_jobs, num_jobs - first), tables)
+        frames.append(pd.DataFrame({
+            "job_id": batch["job_id"].to_numpy(),
+            "skill_name": batch["skill_name"],
+            "demand_score": score_frame(batch),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def make_supply(num_users, seed):
+    rng = np.random.default_rng(seed + 1)
+    counts = rng.integers(3, 11, num_users)
+    users = np.repeat(np.arange(num_users), counts)
+    skills = np.concatenate([rng.choice(len(SKILL_NAMES), count, replace=False) for count in counts])
+    scores = rng.integers(0, 1001, len(users))
+    return users, np.asarray(SKILL_NAMES, dtype=object)[skills], scores
+
+
+def reference_fit(engine, demand_rows, user):
+    """
+    Fit of one user against one job, the slow and obvious way.
+    """
+    supply = dict(zip(engine.skills, engine.supply_vector(user)))
+    total = sum(score for _, score in demand_rows)
+    gap = sum(max(0.0, score - supply.get(skill, 0.0)) for skill, score in demand_rows)
+    return 1 - gap / total if total else 0.0
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(args):
+    demand, seconds = timed(lambda: make_demand(args.jobs, args.seed))
+    print(f"{args.jobs:,} jobs, {len(demand):,} job-skill rows generated and scored in {seconds:.1f}s")
+
+    skill_names = demand["skill_name"].astype(object).to_numpy()
+    engine, seconds = timed(lambda: GapEngine.from_demand(demand["job_id"].to_numpy(), skill_names,
+                                                          demand["demand_score"].to_numpy()))
+    nbytes = engine.demand.data.nbytes + engine.demand.indices.nbytes + engine.demand.indptr.nbytes
+    print(f"Demand matrix {engine.demand.shape[0]:,} x {engine.demand.shape[1]} "
+          f"({engine.demand.nnz:,} nonzeros, {nbytes / 2**20:.0f} MiB) built in {seconds:.1f}s")
+
+    users, skills, scores = make_supply(args.users, args.seed)
+    _, load_seconds = timed(lambda: engine.load_supply(users, skills, scores))
+    print(f"Supply {args.users:,} users ({len(users):,} rows) loaded in {load_seconds * 1000:.0f} ms")
+
+    # Parity against the obvious loop on a sample of jobs
+    rng = np.random.default_rng(args.seed)
+    by_job = demand.groupby("job_id")
+    for user in rng.choice(args.users, 5, replace=False).tolist():
+        fits = engine.fit_scores(user)
+        for row in rng.choice(len(engine.job_ids), 200, replace=False):
+            rows = by_job.get_group(engine.job_ids[row])
+            expected = reference_fit(engine, list(zip(rows["skill_name"], rows["demand_score"])), user)
+            if abs(fits[row] - expected) > 1e-6:
+                raise SystemExit(f"❌ Fit differs for user {user}, job {engine.job_ids[row]}: "
+                                 f"{fits[row]} vs {expected}")
+    print("✅ Fit scores match the reference loop on 1,000 sampled (user, job) pairs")
+    del by_job
+
+    # Per-user latency, cold cache
+    sample = rng.choice(args.users, min(args.users, 200), replace=False).tolist()
+    fit_ms, top_ms, sort_ms = [], [], []
+    for user in sample:
+        fits, seconds = timed(lambda: engine.fit_scores(user))
+        fit_ms.append(seconds * 1000)
+        _, seconds = timed(lambda: engine.top_jobs(user, args.k))
+        top_ms.append(seconds * 1000)
+        _, seconds = timed(lambda: np.argsort(-fits, kind="stable")[:args.k])
+        sort_ms.append(seconds * 1000)
+    print(f"\nPer user, median of {len(sample)} (ms):")
+    print(f"  fit against every job       {statistics.median(fit_ms):>8.1f}")
+    print(f"  top-{args.k} (fit + argpartition) {statistics.median(top_ms):>8.1f}")
+    print(f"  full argsort, for reference {statistics.median(sort_ms):>8.1f}")
+
+    count = min(args.users, args.throughput_users)
+    _, seconds = timed(lambda: [engine.top_jobs(user, args.k) for user in range(count)])
+    print(f"  throughput: {count / seconds:,.1f} users/s ({count:,} users)")
+
+    # One user's supply changes
+    user = sample[0]
+    new_supply = {skill: 900 for skill in SKILL_NAMES[:5]}
+    _, update_seconds = timed(lambda: engine.update_user(user, new_supply))
+    _, rerank_seconds = timed(lambda: engine.top_jobs(user, args.k))
+    _, reload_seconds = timed(lambda: engine.load_supply(users, skills, scores))
+    print("\nOne user's supply changes:")
+    print(f"  update_user                 {update_seconds * 1000:>8.3f} ms")
+    print(f"  re-rank that user           {rerank_seconds * 1000:>8.1f} ms")
+    print(f"  reload all supply instead   {reload_seconds * 1000:>8.1f} ms (and every cached ranking is lost)")
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nPeak RSS {rss:.0f} MiB (includes the generated DataFrame)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--throughput-users", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
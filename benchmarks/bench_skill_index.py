@@ -0,0 +1,133 @@
+"""
+Inverted skill index: threshold queries over a million jobs vs. a full scan.
+
+Same mock corpus and users as bench_skill_gap.py. For every user, "jobs I'm
+ready for" and "jobs one skill short" come from the index (binary search
+into score-sorted posting lists, then counting) and from a vectorized full
+scan of the demand matrix; both must return the same jobs. Also reports
+build, save and memory-mapped load times, and adding freshly scraped jobs.
+
+Usage: python benchmarks/bench_skill_index.py [--jobs 1000000] [--users 200]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import numpy as np
+
+from bench_skill_gap import make_demand, make_supply, timed
+from skill_gap import GapEngine
+from skill_index import SkillIndex
+
+
+def scan(engine, supply):
+    """
+    (ready, one skill short) job id sets from a pass over every job.
+    """
+    vector = np.zeros(len(engine.skills), dtype=np.float32)
+    for skill, score in supply.items():
+        if skill in engine.skill_index:
+            vector[engine.skill_index[skill]] = score
+    short = engine.shortfalls(vector) > 0
+    starts = engine.demand.indptr[:-1][engine._demanded]
+    missing = np.add.reduceat(short.astype(np.int32), starts)
+    counts = np.diff(engine.demand.indptr)[engine._demanded]
+    ids = engine.job_ids[engine._demanded]
+    ready = ids[missing == 0]
+    near = ids[(missing == 1) & (counts > 1)]
+    return set(ready.tolist()), set(near.tolist())
+
+
+def queries(index, engine, supplies, check):
+    index_ms, scan_ms, sizes = [], [], []
+    for supply in supplies:
+        found, seconds = timed(lambda: index.matches(supply, max_missing=1))
+        index_ms.append(seconds * 1000)
+        expected, seconds = timed(lambda: scan(engine, supply))
+        scan_ms.append(seconds * 1000)
+        sizes.append(len(found))
+        ready = {job for job, missing in found if not missing}
+        if check and (ready, {job for job, missing in found if missing}) != expected:
+            raise SystemExit(f"❌ Index and full scan disagree for supply {supply}")
+    return statistics.median(index_ms), statistics.median(scan_ms), statistics.median(sizes)
+
+
+def check_unknown_skills():
+    """
+    Demand for a skill outside the vocabulary must still count as missing,
+    whether it comes with the initial rows or with added jobs.
+    """
+    index = SkillIndex.from_demand(["a", "a", "b"], ["Python", "Rust", "Python"], [200, 900, 300],
+                                   skills=["Python", "SQL"])
+    index.add_jobs(["c", "c"], ["Python", "Go"], [100, 400])
+    supply = {"Python": 600}
+    if sorted(index.ready_jobs(supply)) != ["b"] or sorted(index.almost_ready(supply)) != [("a", "Rust"), ("c", "Go")]:
+        raise SystemExit(f"❌ Skills outside the vocabulary were dropped: {index.matches(supply, max_missing=1)}")
+    index.merge()
+    if sorted(index.ready_jobs(dict(supply, Go=400))) != ["b", "c"]:
+        raise SystemExit("❌ Merged index lost a skill added with add_jobs")
+    print("✅ Skills outside the vocabulary count as missing, before and after a merge")
+
+
+def main(args):
+    check_unknown_skills()
+    demand, seconds = timed(lambda: make_demand(args.jobs, args.seed))
+    print(f"{args.jobs:,} jobs, {len(demand):,} job-skill rows generated and scored in {seconds:.1f}s")
+    job_ids = demand["job_id"].to_numpy()
+    skill_names = demand["skill_name"].astype(object).to_numpy()
+    scores = demand["demand_score"].to_numpy()
+
+    index, build_seconds = timed(lambda: SkillIndex.from_demand(job_ids, skill_names, scores))
+    engine = GapEngine.from_demand(job_ids, skill_names, scores)
+    path = tempfile.mkdtemp(prefix="skill_index_")
+    try:
+        _, save_seconds = timed(lambda: index.save(path))
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        index, load_seconds = timed(lambda: SkillIndex.load(path))
+        print(f"Index: {len(index.main.post_rows):,} postings, {size / 2**20:.0f} MiB on disk")
+        print(f"  build {build_seconds:.1f}s, save {save_seconds:.2f}s, memory-mapped load {load_seconds * 1000:.1f} ms")
+
+        users, user_skills, user_scores = make_supply(args.users, args.seed)
+        supplies = [{} for _ in range(args.users)]
+        for user, skill, score in zip(users.tolist(), user_skills, user_scores.tolist()):
+            supplies[user][skill] = score
+        # The mock skills are few and widely demanded; strong users match a large share of jobs
+        strong = [dict(supply, **{skill: 1000 for skill in list(supply)[:3]}) for supply in supplies]
+
+        print(f"\nPer query, median over {args.users} users (matches(supply, max_missing=1)):")
+        print(f"  {'users':<16} {'index ms':>9} {'scan ms':>9} {'jobs returned':>14}")
+        for name, group in (("random supply", supplies), ("3 skills maxed", strong)):
+            index_ms, scan_ms, returned = queries(index, engine, group, check=True)
+            print(f"  {name:<16} {index_ms:>9.1f} {scan_ms:>9.1f} {returned:>14,.0f}")
+        print("✅ Index and full scan return the same jobs for every user")
+
+        rng = np.random.default_rng(args.seed)
+        new_jobs = make_demand(args.add, args.seed + 2)
+        new_jobs["job_id"] += args.jobs
+        # Re-scrape some existing jobs as well: they replace the old version
+        old = demand[demand["job_id"].isin(rng.choice(args.jobs, args.add // 10, replace=False))]
+        batch = [np.concatenate([new_jobs[c].astype(object).to_numpy(), old[c].astype(object).to_numpy()])
+                 for c in ("job_id", "skill_name", "demand_score")]
+        _, add_seconds = timed(lambda: index.add_jobs(*batch))
+        _, first_seconds = timed(lambda: index.ready_jobs(supplies[0]))
+        index_ms, _, _ = queries(index, engine, supplies[:20], check=False)
+        _, merge_seconds = timed(index.merge)
+        print(f"\nAdding {args.add:,} new and {len(old['job_id'].unique()):,} re-scraped jobs:")
+        print(f"  add_jobs {add_seconds * 1000:.0f} ms, first query after {first_seconds * 1000:.0f} ms "
+              f"(builds the in-memory segment), then {index_ms:.1f} ms per query, merge {merge_seconds:.1f}s")
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--add", type=int, default=10_000, help="freshly scraped jobs to add")
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,113 @@
+"""
+Time-to-first-content of the SSE endpoints versus the blocking ones.
+
+With the fake LLM spreading its latency over the streamed chunks, the
+title should reach the client well before the full question is done.
+
+Usage: python benchmarks/bench_streaming.py [--latency 1.0] [--runs 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ["PREFETCH_ENABLED"] = "0"
+os.environ["QUESTION_BANK"] = "off"
+
+import httpx
+import uvicorn
+
+import api
+from fake_llm import FakeLLM
+
+START = {"skill": "Python", "self_rating": 50}
+
+
+async def blocking(client, user_id):
+    start = time.perf_counter()
+    r = await client.post("/start_test", json=dict(START, user_id=user_id))
+    r.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def streaming(client, user_id):
+    """Returns seconds until the title, the last option and the full question."""
+    marks = {}
+    start = time.perf_counter()
+    async with client.stream("POST", "/start_test/stream", json=dict(START, user_id=user_id)) as r:
+        event = None
+        async for line in r.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                if event == "error":
+                    raise RuntimeError(json.loads(line[len("data: "):]))
+                marks[event] = time.perf_counter() - start
+    return marks["title"], marks["option"], marks["question"]
+
+
+def serve_in_background(app):
+    """
+    Runs the app under uvicorn in a daemon thread (the in-process ASGI
+    transport buffers whole responses, so streaming needs a real server).
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def check_slow_client():
+    """
+    A client that stops reading mid-stream must not keep the LLM slot once
+    the LLM itself is done.
+    """
+    api.llm = FakeLLM(latency=0.1)
+    semaphore, api.llm_semaphore = api.llm_semaphore, asyncio.Semaphore(1)
+    try:
+        prompt = api.question_prompt.format_messages(skill="Python", level=50, qid=1, history="[]")
+        events = api.stream_llm_question(prompt, {"question_id": 1, "difficulty": 50})
+        await events.__anext__()
+        await asyncio.sleep(0.3)  # the client stalls; the LLM finishes meanwhile
+        held = api.llm_semaphore.locked()
+        await events.aclose()
+    finally:
+        api.llm_semaphore = semaphore
+    if held:
+        raise SystemExit("❌ A stalled client kept the LLM slot after the LLM finished")
+    print("✅ The LLM slot is released when the LLM finishes, not when the client does")
+
+
+async def main(args):
+    await check_slow_client()
+    api.llm = FakeLLM(latency=args.latency)
+    server, base_url = serve_in_background(api.app)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        full = [await blocking(client, f"block-{i}") for i in range(args.runs)]
+        marks = [await streaming(client, f"stream-{i}") for i in range(args.runs)]
+    server.should_exit = True
+
+    ms = lambda values: statistics.median(values) * 1000
+    print(f"Fake LLM latency {args.latency * 1000:.0f} ms, median of {args.runs} runs")
+    print(f"  /start_test           full question  {ms(full):8.1f} ms")
+    print(f"  /start_test/stream    title          {ms([m[0] for m in marks]):8.1f} ms")
+    print(f"                        last option    {ms([m[1] for m in marks]):8.1f} ms")
+    print(f"                        full question  {ms([m[2] for m in marks]):8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--runs", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+In-memory vs. streaming (out-of-core) training of Model 2.
+
+Generates and labels corpora of growing size, then trains on each with
+train_dense (get_dummies + RandomForest on every row) and train_stream (per
+distinct row totals + sparse matrix, forest and hist learners), each in a
+fresh subprocess. Reports time, peak RSS and held-out MAE, and finally a warm
+start that folds in 10% appended rows.
+
+Usage: python benchmarks/bench_training.py [--rows 100000 1000000] [--dense-max 200000]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "skillsync-model"))
+sys.path.insert(0, MODEL_DIR)
+
+from generate_data import generate_mock_data_fast
+from label_pipeline import label_pipeline
+
+# Runs in the child (cwd = a scratch dir, since training writes its files there)
+CHILD = """
+import contextlib, io, json, resource, sys, time, warnings
+warnings.simplefilter("ignore")
+sys.path.insert(0, {model_dir!r})
+from train_model import train_dense, train_stream
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    model, mae = {call}
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "rss_kib": rss, "mae": mae}}))
+"""
+
+
+def run_child(call, cwd):
+    code = CHILD.format(model_dir=MODEL_DIR, call=call)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True, cwd=cwd)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def make_corpus(path, rows, seed):
+    """
+    A labeled CSV of about `rows` rows (~5.2 rows per job).
+    """
+    raw = path + ".raw"
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_mock_data_fast(max(1, rows // 5), raw, seed=seed)
+        label_pipeline(raw, path, workers=1, resume=False)
+    os.remove(raw)
+
+
+def report(label, result):
+    print(f"  {label:<28} {result['seconds']:>8.2f}s   peak RSS {result['rss_kib'] / 1024:>7.1f} MiB"
+          f"   MAE {result['mae']:.3f}")
+
+
+def main(row_counts, dense_max, n_estimators):
+    with tempfile.TemporaryDirectory() as tmp:
+        data = os.path.join(tmp, "labeled.csv")
+        for rows in row_counts:
+            make_corpus(data, rows, seed=rows)
+            with open(data, encoding="utf-8") as f:
+                actual = sum(1 for _ in f) - 1
+            print(f"{actual:,} rows:")
+            if rows <= dense_max:
+                report("train_dense", run_child(f"train_dense({data!r})", tmp))
+            for learner in ("forest", "hist"):
+                report(f"train_stream ({learner})", run_child(
+                    f"train_stream({data!r}, learner={learner!r}, n_estimators={n_estimators})", tmp
+                ))
+
+        # Warm start: summarize 90%, then append the last 10% and fold it in
+        rows = row_counts[-1]
+        make_corpus(data, rows, seed=rows)
+        with open(data, encoding="utf-8") as f:
+            lines = f.readlines()
+        cut = 1 + (len(lines) - 1) * 9 // 10
+        with open(data, "w", encoding="utf-8", newline="") as f:
+            f.writelines(lines[:cut])
+        run_child(f"train_stream({data!r}, n_estimators={n_estimators})", tmp)
+        with open(data, "a", encoding="utf-8", newline="") as f:
+            f.writelines(lines[cut:])
+        print(f"Warm start after appending {len(lines) - cut:,} rows to {cut - 1:,}:")
+        del lines
+        report("train_stream --warm-start", run_child(
+            f"train_stream({data!r}, n_estimators={n_estimators}, warm_start=True)", tmp
+        ))
+        report("train_stream (from scratch)", run_child(
+            f"train_stream({data!r}, n_estimators={n_estimators})", tmp
+        ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dense-max", type=int, default=200_000,
+                        help="skip train_dense above this many rows")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    args = parser.parse_args()
+    main(args.rows, args.dense_max, args.n_estimators)
@@ -0,0 +1,212 @@
+"""
+Load generator for the assessment API: many candidates running full test sessions.
+
+Each simulated candidate calls /start_test, answers up to --questions times
+via /next_question (thinking --think seconds before each answer; the level
+estimator may end the test sooner), then calls /end_test. At most --concurrency candidates are in a session at once.
+
+With --url it drives a running server; start that one with
+LLM_PROVIDER=fake (and FAKE_LLM_* settings) to load-test without a Gemini
+key. Without --url the app runs in this process on the fake LLM configured
+by --latency/--jitter/--malformed/--fixable/--invalid-json, and the report also
+covers memory per live session.
+
+Reports throughput, p50/p95/p99 latency and errors per endpoint.
+
+Usage: python benchmarks/load_test.py [--candidates 2000] [--concurrency 200] [--questions 10]
+                                      [--url http://127.0.0.1:8000] [--output load.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import httpx
+
+ENDPOINTS = ("/start_test", "/next_question", "/end_test")
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {endpoint: [] for endpoint in ENDPOINTS}
+        self.errors = {endpoint: {} for endpoint in ENDPOINTS}
+        self.session_bytes = []
+
+    async def post(self, client, endpoint, body):
+        """
+        Returns the response JSON, or None (and records the error) on failure.
+        """
+        start = time.perf_counter()
+        try:
+            r = await client.post(endpoint, json=body)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        else:
+            self.latencies[endpoint].append(time.perf_counter() - start)
+            if r.status_code == 200:
+                return r.json()
+            status = str(r.status_code)
+        self.errors[endpoint][status] = self.errors[endpoint].get(status, 0) + 1
+        return None
+
+
+async def candidate(client, recorder, user_id, args, rng, api=None):
+    skill = rng.choice(args.skills)
+    question = await recorder.post(client, "/start_test", {
+        "user_id": user_id, "skill": skill, "self_rating": rng.randint(0, 100),
+    })
+    if question is None:
+        return
+    for _ in range(args.questions):
+        if args.think:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think)
+        # Right about two thirds of the time, like a typical candidate
+        selected = question["correct_answer"] if rng.random() < 0.66 else "opt4"
+        question = await recorder.post(client, "/next_question", {
+            "user_id": user_id,
+            "question_id": question["question_id"],
+            "selected_option": selected,
+            "time_taken": rng.uniform(5, 60),
+            "previous_level": 50,
+            "correct_answer": question["correct_answer"],
+        })
+        # The level estimator ended the test early
+        if question is None or question.get("test_complete"):
+            break
+    if api is not None:
+        session = api.sessions.get(user_id)
+        if session is not None:
+            recorder.session_bytes.append(len(session.to_json()))
+    await recorder.post(client, "/end_test", {"user_id": user_id, "skill": skill})
+
+
+async def sample_sessions(api, peak):
+    while True:
+        peak["sessions"] = max(peak["sessions"], len(api.sessions))
+        await asyncio.sleep(0.05)
+
+
+def percentile_ms(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * q // 100)] * 1000 if values else float("nan")
+
+
+async def run(args, api=None):
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    sem = asyncio.Semaphore(args.concurrency)
+    if api is not None:
+        # What the startup hook does; ASGITransport does not run the lifespan
+        api.prewarm()
+        transport = httpx.ASGITransport(app=api.app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://load", timeout=args.timeout)
+    else:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits)
+
+    async def one(i):
+        async with sem:
+            await candidate(client, recorder, f"load-{args.seed}-{i}", args, random.Random(rng.random()), api)
+
+    peak = {"sessions": 0}
+    sampler = asyncio.ensure_future(sample_sessions(api, peak)) if api is not None else None
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    async with client:
+        await asyncio.gather(*(one(i) for i in range(args.candidates)))
+    elapsed = time.perf_counter() - start
+    if sampler:
+        sampler.cancel()
+
+    result = {
+        "candidates": args.candidates,
+        "concurrency": args.concurrency,
+        "questions": args.questions,
+        "seconds": elapsed,
+        "sessions_per_s": args.candidates / elapsed,
+        "requests_per_s": sum(len(v) for v in recorder.latencies.values()) / elapsed,
+        "endpoints": {
+            endpoint: {
+                "requests": len(recorder.latencies[endpoint]),
+                "p50_ms": percentile_ms(recorder.latencies[endpoint], 50),
+                "p95_ms": percentile_ms(recorder.latencies[endpoint], 95),
+                "p99_ms": percentile_ms(recorder.latencies[endpoint], 99),
+                "errors": recorder.errors[endpoint],
+            }
+            for endpoint in ENDPOINTS
+        },
+    }
+    if api is not None:
+        rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024
+        result["memory"] = {
+            "peak_live_sessions": peak["sessions"],
+            "session_json_bytes": sum(recorder.session_bytes) / max(1, len(recorder.session_bytes)),
+            "peak_rss_growth_mib": rss_growth / 2**20,
+            # Upper bound: also counts in-flight requests and allocator slack
+            "rss_per_live_session_kib": rss_growth / max(1, peak["sessions"]) / 1024,
+        }
+    return result
+
+
+def report(result):
+    print(f"{result['candidates']:,} candidates x {result['questions']} answers, "
+          f"{result['concurrency']} at once: {result['seconds']:.1f}s")
+    print(f"  {result['sessions_per_s']:,.1f} sessions/s, {result['requests_per_s']:,.1f} requests/s\n")
+    print(f"  {'endpoint':<16} {'requests':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  errors")
+    for endpoint, stats in result["endpoints"].items():
+        errors = ", ".join(f"{status}: {count}" for status, count in sorted(stats["errors"].items())) or "-"
+        print(f"  {endpoint:<16} {stats['requests']:>9,} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f}"
+              f" {stats['p99_ms']:>9.1f}  {errors}")
+    memory = result.get("memory")
+    if memory:
+        print(f"\n  peak live sessions {memory['peak_live_sessions']:,}, "
+              f"session JSON {memory['session_json_bytes'] / 1024:.1f} KiB, "
+              f"peak RSS growth {memory['peak_rss_growth_mib']:.1f} MiB "
+              f"(<= {memory['rss_per_live_session_kib']:.1f} KiB per live session)")
+
+
+def import_api(args):
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.latency)
+    os.environ["FAKE_LLM_JITTER"] = str(args.jitter)
+    os.environ["FAKE_LLM_MALFORMED_RATE"] = str(args.malformed)
+    os.environ["FAKE_LLM_FIXABLE_RATE"] = str(args.fixable)
+    os.environ["FAKE_LLM_INVALID_JSON_RATE"] = str(args.invalid_json)
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", str(max(32, args.concurrency)))
+    import api
+    return api
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running server; default: run the app in this process")
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200, help="candidates in a session at once")
+    parser.add_argument("--questions", type=int, default=10, help="answers per candidate, unless the test ends earlier")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds before each answer")
+    parser.add_argument("--skills", nargs="+", default=["Python", "SQL", "Docker", "React", "AWS"])
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.5, help="in process: fake LLM seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.2, help="in process: fake LLM random extra seconds")
+    parser.add_argument("--malformed", type=float, default=0.0,
+                        help="in process: share of questions without a correct_answer")
+    parser.add_argument("--fixable", type=float, default=0.0,
+                        help="in process: share of questions with a slip repaired locally")
+    parser.add_argument("--invalid-json", type=float, default=0.0,
+                        help="in process: share of replies cut off mid-JSON")
+    parser.add_argument("--output", help="also write the results as JSON here")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args, None if args.url else import_api(args)))
+    report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,125 @@
+"""
+Simulated assessments: how many questions each level estimator needs.
+
+Synthetic candidates have a true level (uniform 5-95) and a self-rating
+off by N(0, --rating-noise). Each question is asked at the level the
+estimator picks; its actual difficulty is off from that by
+N(0, --difficulty-noise) (LLM-written questions only roughly hit their
+target), and the candidate answers it right with the IRT probability under
+--true-scale/--true-guess, which need not match the estimator's own
+constants. Answer times are log-normal around 30 s.
+
+Reports the error of the final level for the step rule and IRT after a
+fixed number of questions, and for IRT stopping early at several interval
+widths, then how many questions (one LLM generation each, without the bank
+or prefetch) IRT needs to match the step rule's accuracy.
+
+Usage: python benchmarks/sim_level_estimator.py [--candidates 2000] [--seed 7]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import numpy as np
+
+from level_estimator import IRTEstimator, StepEstimator
+
+FIXED_LENGTHS = (3, 5, 8, 10, 15, 20, 30, 40, 60)
+STOP_WIDTHS = (30, 25, 20, 15)
+
+
+def make_candidates(args):
+    rng = np.random.default_rng(args.seed)
+    levels = rng.uniform(5, 95, args.candidates)
+    ratings = np.clip(np.round(levels + rng.normal(0, args.rating_noise, args.candidates)), 0, 100)
+    return levels, ratings.astype(int)
+
+
+def run(estimator, level, rating, rng, args, max_questions):
+    """
+    One assessment; returns the final Estimate.
+    """
+    state = estimator.start(int(rating))
+    for _ in range(max_questions):
+        if estimator.done(state):
+            break
+        difficulty = estimator.estimate(state).level
+        actual = difficulty + rng.normal(0, args.difficulty_noise)
+        p = args.true_guess + (1 - args.true_guess) / (1 + np.exp((actual - level) / args.true_scale))
+        correct = rng.random() < p
+        state = estimator.update(state, difficulty, correct, float(rng.lognormal(np.log(30), 0.5)))
+    return estimator.estimate(state)
+
+
+def evaluate(estimator, args, max_questions):
+    levels, ratings = make_candidates(args)
+    rng = np.random.default_rng(args.seed + 1)
+    estimates = [run(estimator, level, rating, rng, args, max_questions) for level, rating in zip(levels, ratings)]
+    errors = np.array([e.level for e in estimates]) - levels
+    result = {
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "within_10": float(np.mean(np.abs(errors) <= 10)),
+        "questions": float(np.mean([e.answered for e in estimates])),
+    }
+    if estimates[0].low is not None:
+        result["coverage"] = float(np.mean([e.low <= level <= e.high for e, level in zip(estimates, levels)]))
+    return result
+
+
+def questions_for(rmse, fixed):
+    """
+    Questions the fixed-length runs need for `rmse`, interpolated.
+    """
+    for (n0, r0), (n1, r1) in zip(fixed, fixed[1:]):
+        if r0 <= rmse:
+            return n0
+        if r1 <= rmse:
+            return n0 + (n1 - n0) * (r0 - rmse) / (r0 - r1)
+    return fixed[-1][0]
+
+
+def main(args):
+    print(f"{args.candidates:,} candidates; self-rating noise {args.rating_noise}, "
+          f"difficulty noise {args.difficulty_noise}, true scale {args.true_scale}, guess {args.true_guess}\n")
+    print(f"{'estimator':<24} {'questions':>9} {'RMSE':>6} {'|err|<=10':>9} {'coverage':>9}")
+
+    def report(name, result):
+        coverage = f"{result['coverage']:>9.0%}" if "coverage" in result else f"{'-':>9}"
+        print(f"{name:<24} {result['questions']:>9.1f} {result['rmse']:>6.1f} {result['within_10']:>9.0%} {coverage}")
+
+    fixed = {}
+    # stop_width=-1: never stop early
+    for name, estimator in (("step", StepEstimator()), ("irt", IRTEstimator(stop_width=-1, max_questions=10 ** 6))):
+        fixed[name] = []
+        for length in FIXED_LENGTHS:
+            result = evaluate(estimator, args, length)
+            fixed[name].append((length, result["rmse"]))
+            report(f"{name}, {length} questions", result)
+
+    stopping = {}
+    for width in STOP_WIDTHS:
+        result = evaluate(IRTEstimator(stop_width=width), args, 10 ** 6)
+        stopping[width] = result
+        report(f"irt, stop at width {width}", result)
+
+    print("\nQuestions (= LLM generations) per assessment at equal accuracy:")
+    for length, rmse in fixed["step"][1:]:
+        irt = questions_for(rmse, fixed["irt"])
+        print(f"  step rule, {length:>2} questions (RMSE {rmse:4.1f}): IRT needs ~{irt:.1f}, {1 - irt / length:.0%} fewer")
+    best = min(rmse for _, rmse in fixed["step"])
+    for width, result in stopping.items():
+        print(f"  irt stopping at width {width}: {result['questions']:.1f} questions on average, RMSE "
+              f"{result['rmse']:.1f} (the step rule's best is {best:.1f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--rating-noise", type=float, default=20)
+    parser.add_argument("--difficulty-noise", type=float, default=8)
+    parser.add_argument("--true-scale", type=float, default=12)
+    parser.add_argument("--true-guess", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,557 @@
+"""
+Benchmark suite: API, labeling, training, inference and import times, with a baseline check.
+
+Every case runs in fresh subprocesses (so imports, caches and peak RSS are
+its own), --runs times, keeping the best value of each metric (the median
+for noisy timings, see below). Results are written as JSON and compared
+against a stored baseline: a metric that got worse by more than its
+tolerance (relative) is a regression, and the run exits with status 1.
+
+Counts, ratios and memory use --tolerance. Absolute timings can drift up
+to 2x between processes on a shared machine, so they get at least
+TIMING_TOLERANCE: that still catches e.g. an eager scikit-learn import,
+and ratios measured within one process (like flat_1000_vs_sklearn) gate
+the finer changes.
+
+Metrics ending in "_per_s" are higher-is-better, all others (times, MAE,
+memory) lower-is-better. Baselines are machine-specific; record one on the
+machine you compare on with --save-baseline.
+
+Usage:
+  python benchmarks/suite.py                     # run everything, compare with benchmarks/baseline.json
+  python benchmarks/suite.py --quick             # skip the slow cases
+  python benchmarks/suite.py --cases model_inference clean_llm_json
+  python benchmarks/suite.py --save-baseline     # store this run as the new baseline
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.normpath(os.path.join(BENCH_DIR, "..", "backend"))
+MODEL_DIR = os.path.normpath(os.path.join(BENCH_DIR, "..", "skillsync-model"))
+BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+# Results of each run; ignored by git
+RESULTS = os.path.join(BENCH_DIR, "results", "suite_results.json")
+
+# Smallest tolerance for absolute timings
+TIMING_TOLERANCE = 1.0
+
+# name -> (function, slow)
+CASES = {}
+
+
+def case(slow=False):
+    def register(fn):
+        CASES[fn.__name__] = (fn, slow)
+        return fn
+    return register
+
+
+def best_of(fn, repeat=5, min_seconds=0.5):
+    """
+    Fastest call in seconds, out of at least `repeat` calls and `min_seconds`
+    of total runtime (so sub-millisecond timings get enough samples).
+    """
+    best = float("inf")
+    deadline = time.perf_counter() + min_seconds
+    calls = 0
+    while calls < repeat or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+        calls += 1
+    return best
+
+
+def quiet():
+    # The scripts under test print progress; keep the suite output readable
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def import_api():
+    """
+    Imports the backend with the background features that would make timings
+    depend on scheduling (prefetch, question bank, coalescing) turned off, and
+    fixed-length sessions (no early stopping).
+    """
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["PREFETCH_ENABLED"] = "0"
+    os.environ["QUESTION_BANK"] = "off"
+    os.environ["COALESCE_ENABLED"] = "0"
+    os.environ["LEVEL_ESTIMATOR"] = "step"
+    sys.path.insert(0, BACKEND_DIR)
+    import api
+    return api
+
+
+def mock_csv(path, rows, seed=1):
+    """
+    A raw (unlabeled) CSV with exactly `rows` data rows.
+    """
+    sys.path.insert(0, MODEL_DIR)
+    from generate_data import generate_mock_data_fast
+
+    with quiet():
+        generate_mock_data_fast(rows // 5 + 1, path + ".full", seed=seed)
+    with open(path + ".full", encoding="utf-8", newline="") as src, \
+            open(path, "w", encoding="utf-8", newline="") as dst:
+        dst.writelines(itertools.islice(src, rows + 1))
+    os.remove(path + ".full")
+
+
+# ===================================================================
+# CASES
+# ===================================================================
+
+@case()
+def clean_llm_json(args):
+    api = import_api()
+    from fake_llm import FakeLLM
+
+    llm = FakeLLM()
+    single = [llm.render(f'skill: **Python**\n"question_id": {i}\n"difficulty": {i % 100}') for i in range(1000)]
+    batch = [llm.render(f"skill: **Python**\nDifficulty of each question, in order: {', '.join(['50'] * 8)}")
+             for _ in range(100)]
+
+    def parse(replies):
+        for reply in replies:
+            json.loads(api.clean_llm_json(reply))
+
+    return {
+        "single_us": best_of(lambda: parse(single)) / len(single) * 1e6,
+        "batch_of_8_us": best_of(lambda: parse(batch)) / len(batch) * 1e6,
+    }
+
+
+@case()
+def question_repair(args):
+    """
+    Parsing LLM replies into questions: valid replies, replies fixed
+    locally (aliased keys, list options, letter answers, trailing commas,
+    truncated tails) and replies missing a field, which cost a targeted
+    re-prompt. Fails if a path is counted under the wrong metric; the
+    per-question rates of a fake LLM with locally fixable, malformed and
+    cut-off replies are deterministic, so any change in them shows against
+    the baseline. Cut-off replies are closed and re-prompted, so the mix
+    never needs a full regeneration.
+    """
+    api = import_api()
+    from fake_llm import FakeLLM
+
+    api.llm = FakeLLM(latency=0)
+    expected = {"question_id": 7, "difficulty": 50}
+    valid = [json.loads(api.clean_llm_json(api.llm.render(f"skill: **Python**\n\"question_id\": {i}")))
+             for i in range(200)]
+
+    def local_fixes(question):
+        aliased = dict(question, question=question["question_title"])
+        del aliased["question_title"]
+        text = json.dumps(question)
+        return [
+            json.dumps(aliased),
+            json.dumps(dict(question, options=list(question["options"].values()))),
+            json.dumps(dict(question, correct_answer="A")),
+            text[:-1] + ",}",
+            text[:-2],
+        ]
+
+    local = [reply for question in valid for reply in local_fixes(question)]
+    missing = [json.dumps({k: v for k, v in question.items() if k != "correct_answer"}) for question in valid]
+    # Every reply carries the wrong question_id: overriding it is not a repair
+    valid = [json.dumps(dict(question, question_id=1)) for question in valid]
+
+    async def parse_all(replies):
+        for reply in replies:
+            await api.parse_question(reply, "skill: **Python**", expected)
+
+    def counts():
+        return api.local_repairs.value, api.reprompts.value, api.regenerations.value
+
+    result = {}
+    for name, replies, per_reply in (("valid", valid, (0, 0, 0)), ("local_repair", local, (1, 0, 0)),
+                                     ("reprompt", missing, (0, 1, 0))):
+        before = counts()
+        asyncio.run(parse_all(replies))
+        delta = tuple((after - start) / len(replies) for after, start in zip(counts(), before))
+        if delta != per_reply:
+            raise SystemExit(f"❌ {name} replies counted as (local repairs, re-prompts, regenerations) {delta}, "
+                             f"expected {per_reply}")
+        result[f"{name}_us"] = best_of(lambda: asyncio.run(parse_all(replies)), 3, 0) / len(replies) * 1e6
+
+    # Realistic mix, through generate_question
+    api.llm = FakeLLM(latency=0, malformed_rate=0.2, fixable_rate=0.25, invalid_json_rate=0.2, seed=1)
+    questions = 500
+    before = counts()
+
+    async def generate_all():
+        for i in range(questions):
+            prompt = api.question_prompt.format_messages(skill="Python", level=50, qid=i + 1, history="[]")
+            try:
+                await api.generate_question(prompt, expected={"question_id": i + 1, "difficulty": 50})
+            except ValueError:
+                pass
+
+    asyncio.run(generate_all())
+    local_repairs, reprompts, regenerations = (after - start for after, start in zip(counts(), before))
+    result["mix_local_repairs_per_question"] = local_repairs / questions
+    result["mix_reprompts_per_question"] = reprompts / questions
+    result["mix_regenerations_per_question"] = regenerations / questions
+    result["mix_llm_calls_per_question"] = api.llm.calls / questions
+    # The compare step skips zero baselines
+    if not (local_repairs and reprompts):
+        raise SystemExit(f"❌ The mix did not exercise local repairs ({local_repairs}) and re-prompts ({reprompts})")
+    return result
+
+
+@case()
+def api_session(args):
+    """
+    Candidates going through /start_test, /next_question x N and /end_test
+    over an in-process ASGI client, against a fake LLM with fixed latency.
+    """
+    api = import_api()
+    import httpx
+    from fake_llm import FakeLLM
+
+    latencies = {"start": [], "next": [], "end": []}
+
+    async def timed(kind, client, path, body):
+        start = time.perf_counter()
+        r = await client.post(path, json=body)
+        latencies[kind].append(time.perf_counter() - start)
+        r.raise_for_status()
+        return r.json()
+
+    async def candidate(client, user_id, sem):
+        async with sem:
+            question = await timed("start", client, "/start_test",
+                                   {"user_id": user_id, "skill": "Python", "self_rating": 50})
+            for i in range(args.questions):
+                question = await timed("next", client, "/next_question", {
+                    "user_id": user_id,
+                    "question_id": question["question_id"],
+                    "selected_option": "opt1" if i % 2 else "opt2",
+                    "time_taken": 20.0,
+                    "previous_level": 50,
+                    "correct_answer": question["correct_answer"],
+                })
+            await timed("end", client, "/end_test", {"user_id": user_id, "skill": "Python"})
+
+    async def run():
+        # What the startup hook does; ASGITransport does not run the lifespan
+        api.prewarm()
+        api.llm = FakeLLM(latency=args.llm_latency)
+        sem = asyncio.Semaphore(args.concurrency)
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(candidate(client, f"bench-{i}", sem) for i in range(args.candidates)))
+            return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    ms = lambda values, q: sorted(values)[len(values) * q // 100] * 1000
+    return {
+        "start_p50_ms": ms(latencies["start"], 50),
+        "next_p50_ms": ms(latencies["next"], 50),
+        "next_p95_ms": ms(latencies["next"], 95),
+        "end_p50_ms": ms(latencies["end"], 50),
+        "sessions_per_s": args.candidates / elapsed,
+    }
+
+
+def heuristic(rows, rowwise):
+    sys.path.insert(0, MODEL_DIR)
+    import pandas as pd
+    from apply_heuristic import CSV_DTYPES, get_heuristic_score, process_data, score_frame
+
+    # A single pass over a large file is already long enough to time
+    single_run = (1, 0) if rows > 100_000 else ()
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = os.path.join(tmp, "raw.csv")
+        mock_csv(raw, rows)
+        frame = pd.read_csv(raw, dtype=CSV_DTYPES, keep_default_na=False)
+        result = {"score_frame_rows_per_s": rows / best_of(lambda: score_frame(frame))}
+        with quiet():
+            result["process_data_rows_per_s"] = rows / best_of(
+                lambda: process_data(raw, os.path.join(tmp, "labeled.csv")), *single_run
+            )
+        if rowwise:
+            records = pd.read_csv(raw, dtype=str, keep_default_na=False).to_dict("records")
+            result["rowwise_rows_per_s"] = rows / best_of(
+                lambda: [get_heuristic_score(row) for row in records], 1, min_seconds=0
+            )
+    return result
+
+
+@case()
+def heuristic_10k(args):
+    return heuristic(10_000, rowwise=True)
+
+
+@case(slow=True)
+def heuristic_1m(args):
+    return heuristic(1_000_000, rowwise=False)
+
+
+@case()
+def generate_data(args):
+    sys.path.insert(0, MODEL_DIR)
+    from generate_data import generate_mock_data, generate_mock_data_fast
+
+    with tempfile.TemporaryDirectory() as tmp, quiet():
+        path = os.path.join(tmp, "data.csv")
+        start = time.perf_counter()
+        rows = generate_mock_data(20_000, path, seed=1)
+        rowwise = rows / (time.perf_counter() - start)
+        start = time.perf_counter()
+        rows = generate_mock_data_fast(200_000, path, seed=1)
+        fast = rows / (time.perf_counter() - start)
+    return {"rowwise_rows_per_s": rowwise, "fast_rows_per_s": fast}
+
+
+@case(slow=True)
+def training(args):
+    """
+    train_dense and train_stream on ~50k labeled rows (in a scratch dir,
+    since both write their side files to the working directory).
+    """
+    sys.path.insert(0, MODEL_DIR)
+    from apply_heuristic import process_data
+    from train_model import train_dense, train_stream
+
+    result = {}
+    with tempfile.TemporaryDirectory() as tmp, quiet(), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        os.chdir(tmp)
+        mock_csv("raw.csv", 50_000)
+        process_data("raw.csv", "labeled.csv")
+        for name, train in (("dense", train_dense), ("stream", train_stream)):
+            start = time.perf_counter()
+            _, mae = train("labeled.csv")
+            result[f"{name}_seconds"] = time.perf_counter() - start
+            result[f"{name}_mae"] = mae
+        os.chdir(BENCH_DIR)
+    return result
+
+
+@case()
+def model_inference(args):
+    """
+    Cold load and batch predict of the committed model: joblib + scikit-learn
+    versus the memory-mapped FlatForest export.
+    """
+    sys.path.insert(0, BACKEND_DIR)
+    import joblib
+    from flat_forest import FlatForest
+    from skill_scorer import SkillScorer
+
+    model_path = os.path.join(MODEL_DIR, "skill_sync_model.joblib")
+    forest_path = os.path.join(MODEL_DIR, "skill_sync_model.forest")
+    with warnings.catch_warnings():
+        # The committed model may come from another scikit-learn version
+        warnings.simplefilter("ignore")
+        start = time.perf_counter()
+        model = joblib.load(model_path)
+        result = {"joblib_load_ms": (time.perf_counter() - start) * 1000}
+        scorer = SkillScorer(model, joblib.load(os.path.join(MODEL_DIR, "model_columns.joblib")))
+    model.n_jobs = 1
+    # Cheap enough to repeat (joblib takes seconds, so it is timed once)
+    result["flat_load_ms"] = best_of(lambda: FlatForest.load(forest_path)) * 1000
+    forest = FlatForest.load(forest_path)
+
+    skills = list(scorer.one_hot["skill_name"]) + ["None"]
+    rows = [
+        {"skill_name": skills[i % len(skills)], "years_required": i % 15,
+         "context_keywords": "None", "is_required": bool(i % 3), "company_tier": "Tier 2"}
+        for i in range(1000)
+    ]
+    X = scorer.encode(rows)
+    for n in (1, 1000):
+        result[f"sklearn_predict_{n}_ms"] = best_of(lambda: model.predict(X[:n])) * 1000
+        result[f"flat_predict_{n}_ms"] = best_of(lambda: forest.predict(X[:n])) * 1000
+    result["encode_1000_ms"] = best_of(lambda: scorer.encode(rows)) * 1000
+
+    # /score_skills predicts table misses with the export whatever the batch
+    # size. The ratio gates large batches independently of the machine; each
+    # round times both back to back, so a slow spell hits both.
+    result["flat_1000_vs_sklearn"] = statistics.median(
+        best_of(lambda: forest.predict(X), min_seconds=0.1) / best_of(lambda: model.predict(X), min_seconds=0.1)
+        for _ in range(5)
+    )
+    return result
+
+
+@case()
+def import_time(args):
+    """
+    Cold imports in fresh interpreters (see bench_import_time.py): what an
+    autoscaled API worker and a CLI job pay before doing any work.
+    """
+    from bench_import_time import TARGETS, import_ms
+
+    # cli.py imports in a few ms, too little to compare against a baseline
+    return {
+        "api_import_ms": import_ms(*TARGETS["api"], repeat=3),
+        "api_prewarm_ms": import_ms(*TARGETS["api, prewarmed"], repeat=3),
+        "train_model_import_ms": import_ms(*TARGETS["train_model"], repeat=3),
+    }
+
+
+# ===================================================================
+# RUNNER
+# ===================================================================
+
+def run_child(args):
+    """
+    Runs one case in this process and prints its metrics as JSON.
+    """
+    import resource
+
+    fn, _ = CASES[args.child]
+    metrics = fn(args)
+    metrics["peak_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(metrics))
+
+
+def run_case(name, args):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", name,
+           "--llm-latency", str(args.llm_latency), "--candidates", str(args.candidates),
+           "--questions", str(args.questions), "--concurrency", str(args.concurrency)]
+    out = subprocess.run(cmd, capture_output=True, text=True, cwd=BENCH_DIR)
+    if out.returncode != 0:
+        print(out.stderr, file=sys.stderr)
+        raise SystemExit(f"❌ Case {name} failed")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def best_run(runs):
+    """
+    Merges the metrics of repeated runs of a case, keeping the best value of
+    each; the median for noisy timings, so one lucky run can't set a
+    baseline that is never met again.
+    """
+    def merge(metric, values):
+        if noisy(metric, values[0]):
+            return statistics.median(values)
+        return (max if higher_is_better(metric) else min)(values)
+
+    return {metric: merge(metric, [run[metric] for run in runs]) for metric in runs[0]}
+
+
+def machine():
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def higher_is_better(metric):
+    return metric.endswith("_per_s")
+
+
+def is_timing(metric):
+    return metric.endswith(("_us", "_ms", "_s", "_per_s"))
+
+
+def noisy(metric, value):
+    """
+    Import times and sub-millisecond timings, which drift the most.
+    """
+    return metric.endswith(("_import_ms", "_prewarm_ms", "_us")) or (metric.endswith("_ms") and value < 1)
+
+
+def tolerance_for(metric, tolerance):
+    return max(tolerance, TIMING_TOLERANCE) if is_timing(metric) else tolerance
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints current vs. baseline per metric. Returns the regressions.
+    """
+    if baseline["machine"] != results["machine"]:
+        print(f"⚠️  Baseline was recorded on {baseline['machine']}; timings may not be comparable.")
+    regressions = []
+    print(f"\n{'metric':<44} {'baseline':>12} {'current':>12} {'change':>8} {'tol':>5}")
+    for name, metrics in results["cases"].items():
+        old_metrics = baseline["cases"].get(name, {})
+        for metric, value in metrics.items():
+            old = old_metrics.get(metric)
+            if not old:
+                continue
+            change = value / old - 1
+            worse = -change if higher_is_better(metric) else change
+            allowed = tolerance_for(metric, tolerance)
+            status = ""
+            if worse > allowed:
+                status = " ❌"
+                regressions.append(f"{name}.{metric}")
+            elif worse < -allowed:
+                status = " ✅"
+            print(f"{name + '.' + metric:<44} {old:>12.4g} {value:>12.4g} {change:>+8.1%} {allowed:>5.0%}{status}")
+    return regressions
+
+
+def main(args):
+    names = args.cases or [name for name, (_, slow) in CASES.items() if not (slow and args.quick)]
+    unknown = set(names) - set(CASES)
+    if unknown:
+        raise SystemExit(f"❌ Unknown case(s): {', '.join(sorted(unknown))}. Known: {', '.join(CASES)}")
+
+    results = {"machine": machine(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "cases": {}}
+    for name in names:
+        start = time.perf_counter()
+        results["cases"][name] = best_run([run_case(name, args) for _ in range(args.runs)])
+        print(f"{name:<20} {time.perf_counter() - start:>6.1f}s  "
+              + "  ".join(f"{k}={v:.4g}" for k, v in results["cases"][name].items()))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Saved as the baseline in {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --save-baseline.")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        raise SystemExit(f"\n❌ {len(regressions)} regression(s) beyond their tolerance: {', '.join(regressions)}")
+    print("\n✅ No regressions beyond tolerance")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", nargs="+", help=f"subset of: {', '.join(CASES)}")
+    parser.add_argument("--quick", action="store_true", help="skip the slow cases")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="fresh processes per case; the best value of each metric is kept")
+    parser.add_argument("--output", default=RESULTS)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative worsening that counts as a regression (timings get more, see above)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="api_session: fake LLM seconds per call")
+    parser.add_argument("--candidates", type=int, default=50, help="api_session: simulated candidates")
+    parser.add_argument("--questions", type=int, default=5, help="api_session: answers per candidate")
+    parser.add_argument("--concurrency", type=int, default=10, help="api_session: candidates at once")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args)
+    else:
+        main(args)
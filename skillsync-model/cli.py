@@ -0,0 +1,42 @@
+"""
+Model tooling in one command: generate, label, train and inspect.
+
+  python cli.py generate --jobs 100000 --fast      # generate_data.py
+  python cli.py label mock_skill_data.csv          # label_pipeline.py
+  python cli.py train --stream                     # train_model.py
+  python cli.py inspect                            # test_load.py
+
+Everything after the subcommand is passed to that script's own arguments
+(`python cli.py train -h` lists them). Only the chosen script is imported,
+so a subcommand does not pay for the others' pandas/scikit-learn imports.
+"""
+import argparse
+import importlib
+
+# subcommand -> (module, help)
+COMMANDS = {
+    "generate": ("generate_data", "generate mock job-skill data"),
+    "label": ("label_pipeline", "label a job-skill CSV with the heuristic model"),
+    "train": ("train_model", "train Model 2 on the labeled dataset"),
+    "inspect": ("test_load", "load the trained model and print its features"),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+        epilog="\n".join(__doc__.strip().splitlines()[2:]),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help) in COMMANDS.items():
+        # No -h here: it goes to the script's own parser
+        commands.add_parser(name, help=help, add_help=False)
+    args, rest = parser.parse_known_args(argv)
+
+    module, _ = COMMANDS[args.command]
+    importlib.import_module(module).main(rest, prog=f"{parser.prog} {args.command}")
+
+
+if __name__ == "__main__":
+    main()
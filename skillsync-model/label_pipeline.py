@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from apply_heuristic import CSV_DTYPES, score_frame
+
+# ===================================================================
+# STREAMING LABELING PIPELINE
+# ===================================================================
+# Labels job-skill CSVs of any size in bounded memory:
+# - the input is read in chunks of `chunk_rows` rows,
+# - chunks are scored (and serialized) in a process pool,
+# - results are written in input order as soon as they are ready,
+# - at most `workers * 2` chunks are in flight at any time,
+# - a checkpoint after every written chunk lets a crashed run resume.
+#
+# CSV output is a single file, identical to process_data's.
+# Parquet output (needs pyarrow) is a directory of part files, one per chunk.
+
+def label_chunk_csv(chunk):
+    """
+    Worker: scores a chunk and returns it as CSV bytes (no header).
+    """
+    chunk["target_score"] = score_frame(chunk)
+    # Same line endings as csv.DictWriter in process_data
+    return chunk.to_csv(index=False, header=False, lineterminator="\r\n").encode("utf-8")
+
+
+def label_chunk_parquet(chunk, part_path):
+    """
+    Worker: scores a chunk and writes it as one Parquet part file.
+    """
+    chunk["target_score"] = score_frame(chunk)
+    # Plain strings, so every part has the same schema
+    for column in ("skill_name", "context_keywords", "is_required", "company_tier"):
+        chunk[column] = chunk[column].astype(str)
+    tmp_path = part_path + ".tmp"
+    chunk.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, part_path)
+    return os.path.getsize(part_path)
+
+
+def read_checkpoint(path, expected):
+    """
+    Returns the saved progress if it belongs to the same job, else None.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if any(state.get(key) != value for key, value in expected.items()):
+        return None
+    return state
+
+
+def write_checkpoint(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def label_pipeline(input_file, output_file, chunk_rows=250_000, workers=None,
+                   output_format=None, resume=True, progress_every=1.0):
+    """
+    Labels `input_file` into `output_file` (CSV file, or Parquet directory if
+    the format is "parquet" or the name ends in .parquet). Returns the
+    number of rows labeled by this run.
+    """
+    workers = workers or os.cpu_count() or 1
+    if output_format is None:
+        output_format = "parquet" if output_file.endswith(".parquet") else "csv"
+    if output_format not in ("csv", "parquet"):
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    checkpoint_path = output_file.rstrip("/\\") + ".checkpoint"
+    job = {
+        "input": os.path.abspath(input_file),
+        "input_size": os.path.getsize(input_file),
+        "chunk_rows": chunk_rows,
+        "format": output_format,
+    }
+    state = read_checkpoint(checkpoint_path, job) if resume else None
+    if state is None:
+        state = dict(job, chunks_done=0, rows_done=0, output_bytes=0)
+    elif state["chunks_done"]:
+        print(f"Resuming after {state['rows_done']:,} rows ({state['chunks_done']} chunks).")
+
+    # --- Prepare the output ---
+    if output_format == "csv":
+        out = open(output_file, "r+b" if state["output_bytes"] else "wb")
+        # Drop anything written after the last checkpoint
+        out.truncate(state["output_bytes"])
+        out.seek(state["output_bytes"])
+        if not state["output_bytes"]:
+            header = list(pd.read_csv(input_file, nrows=0).columns) + ["target_score"]
+            out.write((",".join(header) + "\r\n").encode("utf-8"))
+    else:
+        import pyarrow  # noqa: F401  (fail early with a clear ImportError)
+        os.makedirs(output_file, exist_ok=True)
+        out = None
+
+    # Already-labeled rows are skipped by the parser, not re-scored
+    rows_done = state["rows_done"]
+    reader = pd.read_csv(
+        input_file,
+        dtype=CSV_DTYPES,
+        keep_default_na=False,
+        chunksize=chunk_rows,
+        skiprows=(lambda i: 0 < i <= rows_done) if rows_done else None,
+    )
+
+    start = time.perf_counter()
+    last_report = start
+    rows_this_run = 0
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    in_flight = deque()
+
+    def submit(chunk, index):
+        if output_format == "csv":
+            args = (label_chunk_csv, chunk)
+        else:
+            args = (label_chunk_parquet, chunk, os.path.join(output_file, f"part-{index:05d}.parquet"))
+        if pool is None:
+            return _Done(args[0](*args[1:])), len(chunk)
+        return pool.submit(*args), len(chunk)
+
+    def finish_oldest():
+        nonlocal rows_this_run, last_report
+        future, rows = in_flight.popleft()
+        result = future.result()
+        if out is not None:
+            out.write(result)
+            out.flush()
+            state["output_bytes"] = out.tell()
+        state["chunks_done"] += 1
+        state["rows_done"] += rows
+        rows_this_run += rows
+        write_checkpoint(checkpoint_path, state)
+
+        now = time.perf_counter()
+        if now - last_report >= progress_every:
+            last_report = now
+            print(f"  {state['rows_done']:,} rows labeled "
+                  f"({rows_this_run / (now - start):,.0f} rows/s)")
+
+    try:
+        next_index = state["chunks_done"]
+        for chunk in reader:
+            in_flight.append(submit(chunk, next_index))
+            next_index += 1
+            # Bound memory: never hold more than a few chunks at once
+            while len(in_flight) >= workers * 2:
+                finish_oldest()
+        while in_flight:
+            finish_oldest()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if out is not None:
+            out.close()
+
+    os.remove(checkpoint_path)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Labeled {rows_this_run:,} rows in {elapsed:.2f}s "
+          f"({rows_this_run / max(elapsed, 1e-9):,.0f} rows/s) -> {output_file}")
+    return rows_this_run
+
+
+class _Done:
+    """
+    A finished stand-in for a Future, used when running without a pool.
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Label a job-skill CSV with the heuristic model, in chunks.")
+    parser.add_argument("input", nargs="?", default="mock_skill_data.csv")
+    parser.add_argument("output", nargs="?", default="v1_labeled_dataset.csv")
+    parser.add_argument("--chunk-rows", type=int, default=250_000)
+    parser.add_argument("--workers", type=int, default=None, help="default: number of CPU cores")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None,
+                        help="default: parquet if the output ends in .parquet, else csv")
+    parser.add_argument("--no-resume", action="store_true", help="ignore any checkpoint and start over")
+    args = parser.parse_args(argv)
+    label_pipeline(args.input, args.output, args.chunk_rows, args.workers, args.format, not args.no_resume)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+from train_model import LABELED_DTYPES, chunk_keys, default_vocabulary, design_matrix, save_model, vocabulary_columns
+
+# ===================================================================
+# MODEL SEARCH: ACCURACY VS. INFERENCE SPEED
+# ===================================================================
+# The dataset is encoded once into a float32 feature matrix and cached on
+# disk together with the cross-validation folds. Every candidate is then
+# evaluated in a process pool, where workers memory-map the cache instead of
+# re-reading and re-encoding the CSV. Besides the MAE, each candidate
+# reports what it costs in production: pickled size, load time and predict
+# latency. The winner is the fastest model within `tolerance` MAE points of
+# the most accurate one.
+
+SEARCH_CACHE = "search_cache"
+SEARCH_RESULTS = "search_results.json"
+
+LEARNERS = {
+    "forest": RandomForestRegressor,
+    "extra_trees": ExtraTreesRegressor,
+    "hist": HistGradientBoostingRegressor,
+    "tree": DecisionTreeRegressor,
+}
+
+
+def default_grid():
+    """
+    (learner, params) candidates: forest sizes x depths, plus a few other families.
+    """
+    grid = []
+    for n_estimators in (10, 25, 50, 100):
+        for max_depth in (None, 10, 16):
+            grid.append(("forest", {"n_estimators": n_estimators, "max_depth": max_depth}))
+    for n_estimators in (25, 100):
+        grid.append(("extra_trees", {"n_estimators": n_estimators, "max_depth": None}))
+    for max_iter in (100, 300):
+        grid.append(("hist", {"max_iter": max_iter}))
+    for max_depth in (None, 12):
+        grid.append(("tree", {"max_depth": max_depth}))
+    return grid
+
+
+def make_model(learner, params):
+    extra = {"random_state": 42}
+    if learner in ("forest", "extra_trees"):
+        # The pool already runs one candidate per core
+        extra["n_jobs"] = 1
+    return LEARNERS[learner](**params, **extra)
+
+
+# --- 1. ENCODE ONCE, CACHE THE FOLDS ---
+
+def cache_dir_for(data_file, folds, cache_root):
+    stat = os.stat(data_file)
+    key = json.dumps([os.path.abspath(data_file), stat.st_size, stat.st_mtime_ns, folds, default_vocabulary()])
+    return os.path.join(cache_root, hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest())
+
+
+def build_cache(data_file, folds, cache_root=SEARCH_CACHE, chunk_rows=250_000):
+    """
+    Encodes `data_file` into X.npy / y.npy and a fold number per row, unless a
+    cache for the same file, folds and vocabulary already exists. Returns its path.
+    """
+    path = cache_dir_for(data_file, folds, cache_root)
+    if os.path.exists(os.path.join(path, "done")):
+        print(f"Using cached encoding in {path}")
+        return path
+    os.makedirs(path, exist_ok=True)
+
+    vocabulary = default_vocabulary()
+    with open(data_file, "rb") as f:
+        rows = sum(1 for _ in f) - 1
+    X = np.lib.format.open_memmap(os.path.join(path, "X.npy"), mode="w+", dtype=np.float32,
+                                  shape=(rows, len(vocabulary_columns(vocabulary))))
+    y = np.lib.format.open_memmap(os.path.join(path, "y.npy"), mode="w+", dtype=np.float64, shape=(rows,))
+    start = 0
+    for chunk in pd.read_csv(data_file, dtype=LABELED_DTYPES, keep_default_na=False, chunksize=chunk_rows):
+        keys = chunk_keys(chunk, vocabulary)
+        X[start:start + len(keys)] = design_matrix(keys, vocabulary, dense=True)
+        y[start:start + len(keys)] = keys["target"].to_numpy()
+        start += len(keys)
+    X.flush()
+    y.flush()
+    del X, y
+
+    # Shuffled, fixed fold assignment
+    fold = np.random.default_rng(42).permutation(rows) % folds
+    np.save(os.path.join(path, "fold.npy"), fold.astype(np.int8))
+    open(os.path.join(path, "done"), "w").close()
+    print(f"Encoded {rows:,} rows into {path}")
+    return path
+
+
+# --- 2. EVALUATE ONE CANDIDATE (IN A WORKER) ---
+
+def best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def evaluate_candidate(cache_path, learner, params):
+    """
+    Cross-validated MAE, plus size / load time / latency of the last fold's model.
+    """
+    X = np.load(os.path.join(cache_path, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(cache_path, "y.npy"), mmap_mode="r")
+    fold = np.load(os.path.join(cache_path, "fold.npy"))
+
+    start = time.perf_counter()
+    errors = []
+    for k in range(int(fold.max()) + 1):
+        test = fold == k
+        model = make_model(learner, params)
+        model.fit(X[~test], y[~test])
+        errors.append(np.mean(np.abs(model.predict(X[test]) - y[test])))
+    fit_seconds = time.perf_counter() - start
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    blob = buffer.getvalue()
+    batch = np.ascontiguousarray(X[:1000])
+    return {
+        "learner": learner,
+        "params": params,
+        "mae": float(np.mean(errors)),
+        "fit_seconds": fit_seconds,
+        "size_bytes": len(blob),
+        "load_ms": best_time(lambda: joblib.load(io.BytesIO(blob)), 3) * 1000,
+        "latency_ms": best_time(lambda: model.predict(batch[:1]), 20) * 1000,
+        "batch_us_per_row": best_time(lambda: model.predict(batch), 5) / len(batch) * 1e6,
+    }
+
+
+# --- 3. SEARCH, PICK, SAVE ---
+
+def search(data_file="v1_labeled_dataset.csv", folds=3, tolerance=1.0, workers=None, grid=None,
+           cache_root=SEARCH_CACHE, results_file=SEARCH_RESULTS):
+    """
+    Evaluates every candidate of `grid` (default_grid() if None), saves the
+    fastest one within `tolerance` MAE points of the best as Model 2, and
+    writes all results to `results_file`. Returns the winning result.
+    """
+    if not os.path.exists(data_file):
+        print(f"❌ ERROR: {data_file} not found.")
+        return None
+    cache_path = build_cache(data_file, folds, cache_root)
+    grid = grid or default_grid()
+    workers = workers or os.cpu_count() or 1
+
+    print(f"Evaluating {len(grid)} candidates with {folds}-fold CV on {workers} worker(s)...")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(evaluate_candidate, cache_path, learner, params) for learner, params in grid]
+        results = [future.result() for future in futures]
+    print(f"Search took {time.perf_counter() - start:.1f}s.\n")
+
+    best_mae = min(result["mae"] for result in results)
+    eligible = [result for result in results if result["mae"] <= best_mae + tolerance]
+    winner = min(eligible, key=lambda result: result["latency_ms"])
+
+    print(f"{'candidate':<46} {'MAE':>7} {'size KiB':>9} {'load ms':>8} {'1-row ms':>9} {'µs/row':>7}")
+    for result in sorted(results, key=lambda result: result["mae"]):
+        name = f"{result['learner']} {json.dumps(result['params'])}"
+        mark = " ⭐" if result is winner else ""
+        print(f"{name:<46} {result['mae']:>7.2f} {result['size_bytes'] / 1024:>9.0f} {result['load_ms']:>8.1f}"
+              f" {result['latency_ms']:>9.2f} {result['batch_us_per_row']:>7.1f}{mark}")
+    print(f"\n✅ Fastest within {tolerance} MAE points of the best ({best_mae:.2f}): "
+          f"{winner['learner']} {json.dumps(winner['params'])}")
+
+    with open(results_file, "w", encoding="utf-8") as f:
+        json.dump({"data_file": os.path.abspath(data_file), "folds": folds, "tolerance": tolerance,
+                   "winner": winner, "results": results}, f, indent=2)
+
+    # Refit the winner on everything and save it as Model 2
+    X = np.load(os.path.join(cache_path, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(cache_path, "y.npy"), mmap_mode="r")
+    model = make_model(winner["learner"], winner["params"])
+    model.fit(X, y)
+    save_model(model, vocabulary_columns(default_vocabulary()))
+    return winner
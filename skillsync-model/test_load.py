@@ -1,21 +1,44 @@
+import argparse
+
 import joblib
 
-print("Loading the model and its columns...")
-
-# Load the two files we saved
-try:
-    model = joblib.load("skill_sync_model.joblib")
-    columns = joblib.load("model_columns.joblib")
-
-    print("✅ Success! Model loaded.")
-    print("\n--- Model Info ---")
-    print(model)
-    
-    print(f"\nModel was trained with {len(columns)} features.")
-    print("First 5 features:", columns[:5])
-
-except FileNotFoundError:
-    print("❌ ERROR: Could not find model files.")
-    print("Make sure 'skill_sync_model.joblib' and 'model_columns.joblib' are in the same folder.")
-except Exception as e:
-    print(f"An error occurred: {e}")
\ No newline at end of file
+
+def inspect_model(model_path="skill_sync_model.joblib", columns_path="model_columns.joblib"):
+    """
+    Loads the trained model and its columns and prints what they contain.
+    Returns False if they could not be loaded.
+    """
+    print("Loading the model and its columns...")
+
+    # Load the two files we saved
+    try:
+        model = joblib.load(model_path)
+        columns = joblib.load(columns_path)
+
+        print("✅ Success! Model loaded.")
+        print("\n--- Model Info ---")
+        print(model)
+
+        print(f"\nModel was trained with {len(columns)} features.")
+        print("First 5 features:", columns[:5])
+        return True
+
+    except FileNotFoundError:
+        print("❌ ERROR: Could not find model files.")
+        print(f"Make sure '{model_path}' and '{columns_path}' exist.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    return False
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Load the trained model and print its features.")
+    parser.add_argument("--model", default="skill_sync_model.joblib")
+    parser.add_argument("--columns", default="model_columns.joblib")
+    args = parser.parse_args(argv)
+    if not inspect_model(args.model, args.columns):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,96 +1,384 @@
+import argparse
+import json
+import os
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error
+import numpy as np
+import scipy.sparse as sp
 import joblib
 import time
 
-# --- 1. LOAD THE LABELED DATA ---
-print("Loading v1_labeled_dataset.csv...")
+from apply_heuristic import CSV_DTYPES
+
 try:
-    data = pd.read_csv("v1_labeled_dataset.csv")
-except FileNotFoundError:
-    print("❌ ERROR: v1_labeled_dataset.csv not found.")
-    print("Please make sure it's in the same folder as this script.")
-    exit()
-
-print(f"Loaded {len(data)} rows of data.")
-
-# --- 2. PRE-PROCESS THE DATA ---
-# A machine learning model can't read text like "React" or "Tier 1".
-# We must convert all our text columns into numbers.
-# "One-Hot Encoding" turns a column like 'company_tier' into:
-# 'company_tier_Tier 1', 'company_tier_Tier 2', 'company_tier_Tier 3'
-# with 1s and 0s.
-
-print("Pre-processing data (One-Hot Encoding)...")
-
-# Define which columns are our 'features' (X) and 'target' (y)
-y = data['target_score']
-# We drop 'target_score' (it's the answer) and 'job_id' (it's just an ID)
-X = data.drop(['target_score', 'job_id'], axis=1)
-
-# pd.get_dummies() automatically converts all text columns into numbers
-X_processed = pd.get_dummies(X, columns=['skill_name', 'context_keywords', 'company_tier'])
-
-# Convert 'is_required' from True/False to 1/0
-X_processed['is_required'] = X_processed['is_required'].astype(int)
-
-print(f"Data converted into {X_processed.shape[1]} features.")
-
-# --- 3. SPLIT DATA FOR TRAINING AND TESTING ---
-# We use 80% of data to train the model and 20% to test how accurate it is.
-# random_state=42 ensures we get the same "random" split every time.
-X_train, X_test, y_train, y_test = train_test_split(
-    X_processed, 
-    y, 
-    test_size=0.2, 
-    random_state=42
-)
-
-print(f"Splitting data: {len(X_train)} rows for training, {len(X_test)} rows for testing.")
-
-# --- 4. TRAIN THE "MODEL 2" (Random Forest) ---
-print("Training Model 2 (RandomForestRegressor)...")
-start_time = time.time()
-
-# n_estimators=100 means it builds 100 "decision trees" (a good default).
-# random_state=42 ensures the model is built the same way every time.
-# n_jobs=-1 uses all your computer's CPU cores to train faster.
-model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-model.fit(X_train, y_train)
-
-end_time = time.time()
-print(f"✅ Model trained successfully in {end_time - start_time:.2f} seconds.")
-
-# --- 5. EVALUATE THE MODEL ---
-print("Evaluating model performance...")
-y_pred = model.predict(X_test)
-mae = mean_absolute_error(y_test, y_pred)
-
-print("\n--- MODEL EVALUATION ---")
-print(f"Mean Absolute Error (MAE): {mae:.2f} points")
-print(f"--- This means, on average, our new model's score prediction is off by ~{mae:.0f} points. ---")
-if mae < 50:
-    print("--- 🎯 This is a great score! ---")
-else:
-    print("--- This is a good start. We can improve it by refining our heuristic rules. ---")
-
-
-# --- 6. SAVE THE MODEL ---
-# We save the trained model and the list of feature columns to files.
-# These two files ARE "Model 2". We'll need them in production.
-print("\nSaving model to disk...")
-
-# Save the model itself
-joblib.dump(model, "skill_sync_model.joblib")
-
-# Save the list of columns. This is CRITICAL.
-# We need this to ensure any *new* data is encoded in the exact same order.
-model_columns = list(X_processed.columns)
-joblib.dump(model_columns, "model_columns.joblib")
-
-print("✅ Model and columns saved as:")
-print("1. skill_sync_model.joblib")
-print("2. model_columns.joblib")
-print("\nAll done!")
\ No newline at end of file
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+
+def train_dense(data_file="v1_labeled_dataset.csv"):
+    """
+    The original in-memory training: the whole CSV, one-hot encoded with
+    get_dummies, one RandomForestRegressor. Returns (model, MAE), or None.
+    """
+    # scikit-learn takes over a second to import; only training needs it
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_absolute_error
+    from sklearn.model_selection import train_test_split
+
+    # --- 1. LOAD THE LABELED DATA ---
+    print(f"Loading {data_file}...")
+    try:
+        data = pd.read_csv(data_file)
+    except FileNotFoundError:
+        print(f"❌ ERROR: {data_file} not found.")
+        print("Please make sure it's in the same folder as this script.")
+        return None
+
+    print(f"Loaded {len(data)} rows of data.")
+
+    # --- 2. PRE-PROCESS THE DATA ---
+    # A machine learning model can't read text like "React" or "Tier 1".
+    # We must convert all our text columns into numbers.
+    # "One-Hot Encoding" turns a column like 'company_tier' into:
+    # 'company_tier_Tier 1', 'company_tier_Tier 2', 'company_tier_Tier 3'
+    # with 1s and 0s.
+
+    print("Pre-processing data (One-Hot Encoding)...")
+
+    # Define which columns are our 'features' (X) and 'target' (y)
+    y = data['target_score']
+    # We drop 'target_score' (it's the answer) and 'job_id' (it's just an ID)
+    X = data.drop(['target_score', 'job_id'], axis=1)
+
+    # pd.get_dummies() automatically converts all text columns into numbers
+    X_processed = pd.get_dummies(X, columns=['skill_name', 'context_keywords', 'company_tier'])
+
+    # Convert 'is_required' from True/False to 1/0
+    X_processed['is_required'] = X_processed['is_required'].astype(int)
+
+    print(f"Data converted into {X_processed.shape[1]} features.")
+
+    # --- 3. SPLIT DATA FOR TRAINING AND TESTING ---
+    # We use 80% of data to train the model and 20% to test how accurate it is.
+    # random_state=42 ensures we get the same "random" split every time.
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_processed,
+        y,
+        test_size=0.2,
+        random_state=42
+    )
+
+    print(f"Splitting data: {len(X_train)} rows for training, {len(X_test)} rows for testing.")
+
+    # --- 4. TRAIN THE "MODEL 2" (Random Forest) ---
+    print("Training Model 2 (RandomForestRegressor)...")
+    start_time = time.time()
+
+    # n_estimators=100 means it builds 100 "decision trees" (a good default).
+    # random_state=42 ensures the model is built the same way every time.
+    # n_jobs=-1 uses all your computer's CPU cores to train faster.
+    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+    model.fit(X_train, y_train)
+
+    end_time = time.time()
+    print(f"✅ Model trained successfully in {end_time - start_time:.2f} seconds.")
+
+    # --- 5. EVALUATE THE MODEL ---
+    print("Evaluating model performance...")
+    y_pred = model.predict(X_test)
+    mae = float(mean_absolute_error(y_test, y_pred))
+    report_mae(mae)
+
+    # --- 6. SAVE THE MODEL ---
+    save_model(model, list(X_processed.columns))
+    return model, mae
+
+
+def report_mae(mae):
+    print("\n--- MODEL EVALUATION ---")
+    print(f"Mean Absolute Error (MAE): {mae:.2f} points")
+    print(f"--- This means, on average, our new model's score prediction is off by ~{mae:.0f} points. ---")
+    if mae < 50:
+        print("--- 🎯 This is a great score! ---")
+    else:
+        print("--- This is a good start. We can improve it by refining our heuristic rules. ---")
+
+
+def save_model(model, model_columns):
+    # We save the trained model and the list of feature columns to files.
+    # These two files ARE "Model 2". We'll need them in production.
+    print("\nSaving model to disk...")
+
+    # Save the model itself
+    joblib.dump(model, "skill_sync_model.joblib")
+
+    # Save the list of columns. This is CRITICAL.
+    # We need this to ensure any *new* data is encoded in the exact same order.
+    joblib.dump(model_columns, "model_columns.joblib")
+
+    print("✅ Model and columns saved as:")
+    print("1. skill_sync_model.joblib")
+    print("2. model_columns.joblib")
+    print("\nRe-run backend/flat_forest.py and backend/score_table.py to refresh the API's copies of the model.")
+
+
+# ===================================================================
+# STREAMING (OUT-OF-CORE) TRAINING
+# ===================================================================
+# Every feature is categorical or a small integer, so a corpus of any size
+# holds only a bounded number of distinct rows. Each chunk of the CSV is
+# reduced to (distinct row -> count, sum of targets); the model is then fit
+# on those distinct rows, weighted by count, as a sparse one-hot matrix with
+# a fixed vocabulary. Memory depends on the taxonomy, not on the row count.
+#
+# The running totals are saved with the model, so a warm start only reads
+# the rows appended to the CSV since the last run.
+
+KEY_COLUMNS = ["skill", "years", "context", "required", "tier"]
+CATEGORICAL_FIELDS = {"skill": "skill_name", "context": "context_keywords", "tier": "company_tier"}
+TRAINING_STATE = "training_state.npz"
+# The labeled CSV, read like apply_heuristic reads the unlabeled one
+LABELED_DTYPES = dict(CSV_DTYPES, target_score="float64")
+# Every HOLDOUT_EVERY-th row is kept for evaluation (a 20% split, fixed by position)
+HOLDOUT_EVERY = 5
+
+
+def default_vocabulary():
+    """
+    The categories the model knows, from the taxonomy in generate_data.py.
+    "None" is left out: like get_dummies on NaN, it encodes as all zeros.
+    """
+    from generate_data import COMPANY_TIERS, JOB_ARCHETYPES, SKILL_CLUSTERS
+
+    return {
+        "skill_name": sorted({skill for skills in SKILL_CLUSTERS.values() for skill in skills}),
+        "context_keywords": sorted(
+            {ctx for arch in JOB_ARCHETYPES.values() for ctx in arch["context_keywords"]} - {"None"}
+        ),
+        "company_tier": sorted(COMPANY_TIERS),
+    }
+
+
+def vocabulary_columns(vocabulary):
+    """
+    Feature columns in the same order get_dummies produces.
+    """
+    columns = ["years_required", "is_required"]
+    for field in CATEGORICAL_FIELDS.values():
+        columns += [f"{field}_{value}" for value in vocabulary[field]]
+    return columns
+
+
+def chunk_keys(chunk, vocabulary):
+    """
+    KEY_COLUMNS codes (plus "target") for every row of a chunk. Categories
+    outside the vocabulary get code -1 (encoded as all zeros).
+    """
+    keys = pd.DataFrame({
+        key: pd.Categorical(chunk[field], categories=vocabulary[field]).codes.astype(np.int64)
+        for key, field in CATEGORICAL_FIELDS.items()
+    })
+    keys["years"] = chunk["years_required"].to_numpy()
+    keys["required"] = (chunk["is_required"].astype(str) == "True").to_numpy().astype(np.int64)
+    keys["target"] = chunk["target_score"].to_numpy(dtype=np.float64)
+    return keys
+
+
+def summarize_chunk(chunk, vocabulary, first_row):
+    """
+    Reduces a chunk to (train, test) totals per distinct row.
+    """
+    keys = chunk_keys(chunk, vocabulary)
+
+    holdout = (np.arange(first_row, first_row + len(chunk)) % HOLDOUT_EVERY) == 0
+    train = keys[~holdout].groupby(KEY_COLUMNS).target.agg(["count", "sum"])
+    # MAE needs every target value, not just their sum
+    test = keys[holdout].groupby(KEY_COLUMNS + ["target"]).size().rename("count").to_frame()
+    return train, test
+
+
+def merge_totals(total, part):
+    if total is None:
+        return part
+    return total.add(part, fill_value=0)
+
+
+def design_matrix(keys, vocabulary, dense=False):
+    """
+    Sparse one-hot matrix (CSR, float32) for a frame of KEY_COLUMNS codes.
+    `dense` is for learners without sparse support; there are only distinct rows.
+    """
+    n = len(keys)
+    rows, cols, data = [np.arange(n)] * 2, [np.zeros(n, np.int64), np.ones(n, np.int64)], [
+        keys["years"].to_numpy(dtype=np.float32), keys["required"].to_numpy(dtype=np.float32)
+    ]
+    offset = 2
+    for key, field in CATEGORICAL_FIELDS.items():
+        codes = keys[key].to_numpy()
+        known = codes >= 0
+        rows.append(np.flatnonzero(known))
+        cols.append(codes[known] + offset)
+        data.append(np.ones(known.sum(), np.float32))
+        offset += len(vocabulary[field])
+    X = sp.csr_matrix(
+        (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=(n, offset), dtype=np.float32
+    )
+    X.eliminate_zeros()
+    return X.toarray() if dense else X
+
+
+def save_state(path, train, test, meta):
+    frames = {"train": train.reset_index(), "test": test.reset_index()}
+    arrays = {f"{name}_{col}": frame[col].to_numpy() for name, frame in frames.items() for col in frame.columns}
+    np.savez(path, meta=np.array(json.dumps(meta)), **arrays)
+
+
+def load_state(path):
+    with np.load(path) as saved:
+        meta = json.loads(str(saved["meta"]))
+        frames = {}
+        for name, extra in (("train", ["count", "sum"]), ("test", ["target", "count"])):
+            frame = pd.DataFrame({col: saved[f"{name}_{col}"] for col in KEY_COLUMNS + extra})
+            index = KEY_COLUMNS + (["target"] if name == "test" else [])
+            frames[name] = frame.set_index(index)
+    return frames["train"], frames["test"], meta
+
+
+def make_learner(learner, n_estimators):
+    from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+    if learner == "forest":
+        # Same model family as train_dense, so flat_forest.py can export it
+        return RandomForestRegressor(n_estimators=n_estimators, random_state=42, n_jobs=-1)
+    if learner == "hist":
+        return HistGradientBoostingRegressor(max_iter=300, random_state=42)
+    raise ValueError(f"Unknown learner: {learner}")
+
+
+def train_stream(data_file="v1_labeled_dataset.csv", chunk_rows=250_000, learner="forest",
+                 n_estimators=100, warm_start=False, state_file=TRAINING_STATE):
+    """
+    Out-of-core training (see above). With `warm_start`, only rows appended
+    to `data_file` since the saved state are read. Returns (model, MAE on
+    the held-out rows), or None.
+    """
+    if not os.path.exists(data_file):
+        print(f"❌ ERROR: {data_file} not found.")
+        return None
+
+    start = time.perf_counter()
+    vocabulary = default_vocabulary()
+    train, test, rows_seen, bytes_seen = None, None, 0, 0
+    if warm_start:
+        if not os.path.exists(state_file):
+            print(f"❌ ERROR: no {state_file} to warm start from; train with --stream first.")
+            return None
+        train, test, meta = load_state(state_file)
+        if meta["data_file"] != os.path.abspath(data_file) or meta["vocabulary"] != vocabulary:
+            print("❌ ERROR: the saved state belongs to another dataset or vocabulary; retrain with --stream.")
+            return None
+        if os.path.getsize(data_file) < meta["bytes_seen"]:
+            print("❌ ERROR: the dataset shrank since the last run (rows were not just appended); "
+                  "retrain with --stream.")
+            return None
+        rows_seen, bytes_seen = meta["rows_seen"], meta["bytes_seen"]
+        print(f"Warm start: {rows_seen:,} rows already summarized, reading only the new ones...")
+
+    # --- 1. STREAM THE CSV INTO PER-ROW TOTALS ---
+    new_rows = 0
+    with open(data_file, "rb") as f:
+        names = f.readline().decode("utf-8").strip().split(",")
+        # Jump straight past the rows summarized last time
+        if bytes_seen:
+            f.seek(bytes_seen)
+        if f.tell() < os.fstat(f.fileno()).st_size:
+            reader = pd.read_csv(
+                f, names=names, header=None, dtype=LABELED_DTYPES, keep_default_na=False, chunksize=chunk_rows,
+            )
+            for chunk in reader:
+                chunk_train, chunk_test = summarize_chunk(chunk, vocabulary, rows_seen + new_rows)
+                train = merge_totals(train, chunk_train)
+                test = merge_totals(test, chunk_test)
+                new_rows += len(chunk)
+        # The parser stops at end of file, so this is where the next run resumes
+        bytes_seen = f.tell()
+    rows_seen += new_rows
+    if train is None or not len(train):
+        print("❌ ERROR: no rows to train on.")
+        return None
+    read_time = time.perf_counter() - start
+    print(f"Read {new_rows:,} new rows ({rows_seen:,} in total) in {read_time:.2f}s; "
+          f"{len(train):,} distinct training rows.")
+
+    # --- 2. FIT ON THE DISTINCT ROWS, WEIGHTED BY COUNT ---
+    print(f"Training Model 2 ({learner})...")
+    fit_start = time.perf_counter()
+    keys = train.index.to_frame(index=False)
+    X = design_matrix(keys, vocabulary, dense=learner == "hist")
+    model = make_learner(learner, n_estimators)
+    model.fit(X, (train["sum"] / train["count"]).to_numpy(), sample_weight=train["count"].to_numpy())
+    fit_time = time.perf_counter() - fit_start
+    print(f"✅ Model trained successfully in {fit_time:.2f} seconds.")
+
+    # --- 3. EVALUATE ON THE HELD-OUT ROWS ---
+    mae = None
+    if test is not None and len(test):
+        test_keys = test.index.to_frame(index=False)
+        predicted = model.predict(design_matrix(test_keys, vocabulary, dense=learner == "hist"))
+        counts = test["count"].to_numpy()
+        mae = float(np.sum(counts * np.abs(test_keys["target"].to_numpy() - predicted)) / counts.sum())
+        report_mae(mae)
+
+    # --- 4. SAVE THE MODEL AND THE RUNNING TOTALS ---
+    save_model(model, vocabulary_columns(vocabulary))
+    save_state(state_file, train, test, {
+        "data_file": os.path.abspath(data_file), "rows_seen": rows_seen, "bytes_seen": bytes_seen,
+        "vocabulary": vocabulary,
+    })
+    print(f"Saved running totals to {state_file} (for --warm-start).")
+
+    total = time.perf_counter() - start
+    peak = f", peak memory {peak_memory_mib():.0f} MiB" if resource is not None else ""
+    print(f"\nTotal time {total:.2f}s (read {read_time:.2f}s, fit {fit_time:.2f}s){peak}")
+    return model, mae
+
+
+def peak_memory_mib():
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if os.uname().sysname == "Darwin" else 1)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Train Model 2 on the labeled dataset.")
+    parser.add_argument("--data", default="v1_labeled_dataset.csv")
+    parser.add_argument("--stream", action="store_true",
+                        help="out-of-core training in chunks (for datasets that do not fit in memory)")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="with --stream: only read rows appended since the last streaming run")
+    parser.add_argument("--chunk-rows", type=int, default=250_000)
+    parser.add_argument("--learner", choices=["forest", "hist"], default="forest")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--search", action="store_true",
+                        help="cross-validate a grid of models and keep the fastest accurate one")
+    parser.add_argument("--folds", type=int, default=3, help="with --search")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="with --search: MAE points a faster model may lose against the best")
+    parser.add_argument("--workers", type=int, default=None, help="with --search; default: number of CPU cores")
+    args = parser.parse_args(argv)
+
+    if args.search:
+        from model_search import search
+
+        result = search(args.data, args.folds, args.tolerance, args.workers)
+    elif args.stream or args.warm_start:
+        result = train_stream(args.data, args.chunk_rows, args.learner, args.n_estimators, args.warm_start)
+    else:
+        result = train_dense(args.data)
+    if result is None:
+        raise SystemExit(1)
+    print("\nAll done!")
+
+
+if __name__ == "__main__":
+    main()